@@ -1,11 +1,19 @@
 import streamlit as st, pandas as pd, plotly.express as px, plotly.graph_objects as go
 from pathlib import Path
-import os
+import os, sys, time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]/"scripts"))
+from pipeline_config import OUTPUTS
+from nfhs_query import NFHSQueryEngine, INDEX_PATH
+from plot_reduction import reduce_series
+from search_trends import load_matrix, min_history, STORE_PATH as TRENDS_STORE, WINDOW
+from topic_index import TopicIndex, INDEX_PATH as TOPIC_INDEX
+from tweet_store import TweetStore, STORE_PATH as TWEET_STORE
 
 st.set_page_config(page_title="Vaccine Hesitancy Dashboard", layout="wide", page_icon="💉")
-BASE = Path("projects/vaccine_hesitancy")
-TABS = BASE/"outputs/tables"
-REPORTS = BASE/"outputs/reports"
+TABS = OUTPUTS/"tables"
+REPORTS = OUTPUTS/"reports"
+VIEWS = OUTPUTS/"views"
 
 st.title("💉 Vaccine Hesitancy in India")
 st.markdown("### Socio-Demographic Determinants and Digital Sentiments (2015–2025)")
@@ -14,9 +22,20 @@ st.markdown("### Socio-Demographic Determinants and Digital Sentiments (2015–2
 st.sidebar.title("📊 Analysis Sections")
 section = st.sidebar.radio(
     "Navigate to:",
-    ["Overview", "NFHS Survey Data", "Twitter Sentiment", "Regression Analysis", "Data Sources"]
+    ["Overview", "NFHS Survey Data", "Explore Subgroups", "Twitter Sentiment", "Topic Search", "Search Trends",
+     "Source Fusion", "Regression Analysis", "Data Sources"]
 )
 
+@st.cache_resource
+def load_query_engine(index_mtime):
+    """Load the bitmap index once per build of the index file"""
+    return NFHSQueryEngine.load(INDEX_PATH)
+
+@st.cache_resource
+def load_topic_index(meta_mtime):
+    """Open the topic index segments once per index update"""
+    return TopicIndex(TOPIC_INDEX)
+
 if section == "Overview":
     st.header("📈 Project Overview")
 
@@ -42,14 +61,11 @@ if section == "Overview":
     """)
 
     # Quick data summary
-    if nfhs_exists:
+    if os.path.exists(VIEWS/"overview.csv"):
         try:
-            df = pd.read_csv(TABS/"nfhs_clean.csv")
-            st.success(f"📊 Dataset loaded: {len(df):,} respondents")
-
-            if 'vaccine_hesitant' in df.columns:
-                hesitancy_rate = df['vaccine_hesitant'].mean()
-                st.metric("Vaccine Hesitancy Rate", f"{hesitancy_rate:.1%}")
+            overview = pd.read_csv(VIEWS/"overview.csv").iloc[0]
+            st.success(f"📊 Dataset loaded: {int(overview['respondents']):,} respondents")
+            st.metric("Vaccine Hesitancy Rate", f"{overview['hesitancy_rate']:.1%}")
         except Exception as e:
             st.error(f"Error loading data: {e}")
 
@@ -57,32 +73,85 @@ elif section == "NFHS Survey Data":
     st.header("📋 NFHS-5 Survey Analysis")
 
     try:
-        df = pd.read_csv(TABS/"nfhs_clean.csv")
-        st.success(f"✅ Loaded {len(df):,} survey responses")
+        overview = pd.read_csv(VIEWS/"overview.csv").iloc[0]
+        st.success(f"✅ Loaded {int(overview['respondents']):,} survey responses")
 
         col1, col2 = st.columns(2)
 
         # Hesitancy by education
-        if "education" in df.columns:
-            fig1 = px.histogram(df, x="education", color="vaccine_hesitant",
-                              barmode="group", title="Vaccine Hesitancy by Education Level")
+        if os.path.exists(VIEWS/"education_hesitancy_counts.csv"):
+            edu_counts = pd.read_csv(VIEWS/"education_hesitancy_counts.csv")
+            edu_counts["vaccine_hesitant"] = edu_counts["vaccine_hesitant"].astype(str)
+            fig1 = px.bar(edu_counts, x="education", y="count", color="vaccine_hesitant",
+                          barmode="group", title="Vaccine Hesitancy by Education Level")
             col1.plotly_chart(fig1, use_container_width=True)
 
-        # Hesitancy by state
-        if "state" in df.columns:
-            state_hesitancy = df.groupby("state")["vaccine_hesitant"].mean().reset_index()
-            fig2 = px.bar(state_hesitancy.sort_values("vaccine_hesitant", ascending=False),
-                         x="state", y="vaccine_hesitant", title="Vaccine Hesitancy by State")
+        # Hesitancy by state: shrunken model estimates with intervals when available
+        if os.path.exists(REPORTS/"hesitancy_small_area.csv"):
+            small_area = pd.read_csv(REPORTS/"hesitancy_small_area.csv")
+            states = small_area[small_area["level"] == "state"].sort_values("estimate", ascending=False)
+            fig2 = px.bar(states, x="state", y="estimate",
+                          error_y=states["ci_upper"] - states["estimate"],
+                          error_y_minus=states["estimate"] - states["ci_lower"],
+                          hover_data=["respondents", "observed_rate"],
+                          title="Vaccine Hesitancy by State (model estimate and interval)")
+            col2.plotly_chart(fig2, use_container_width=True)
+
+            districts = small_area[small_area["level"] == "district"]
+            if len(districts):
+                with st.expander(f"District estimates ({len(districts)} districts)"):
+                    st.dataframe(districts.drop(columns="level").sort_values("estimate", ascending=False),
+                                 use_container_width=True)
+        elif os.path.exists(VIEWS/"state_rates.csv"):
+            state_hesitancy = pd.read_csv(VIEWS/"state_rates.csv")
+            fig2 = px.bar(state_hesitancy, x="state", y="vaccine_hesitant",
+                          title="Vaccine Hesitancy by State")
             col2.plotly_chart(fig2, use_container_width=True)
 
         # Gender analysis
-        if "gender" in df.columns:
-            gender_stats = df.groupby("gender")["vaccine_hesitant"].agg(["count", "mean"]).round(3)
+        if os.path.exists(VIEWS/"gender_stats.csv"):
+            gender_stats = pd.read_csv(VIEWS/"gender_stats.csv", index_col="gender")
             st.dataframe(gender_stats)
 
     except FileNotFoundError:
         st.warning("NFHS data not found. Run the analysis pipeline first.")
-        st.info("Execute: python projects/vaccine_hesitancy/run_all.py")
+        st.info("Execute: python vh.py run")
+
+elif section == "Explore Subgroups":
+    st.header("🔎 Explore Subgroups")
+
+    if not os.path.exists(INDEX_PATH):
+        st.warning("Query index not found. Run data cleaning first.")
+        st.info("Execute: python vh.py clean")
+    else:
+        engine = load_query_engine(os.path.getmtime(INDEX_PATH))
+
+        st.sidebar.subheader("Filters")
+        filters = {}
+        for col in engine.columns:
+            filters[col] = st.sidebar.multiselect(col.replace("_", " ").title(), engine.categories[col])
+
+        group_by = st.selectbox("Group by", engine.columns,
+                                format_func=lambda c: c.replace("_", " ").title())
+
+        start = time.perf_counter()
+        rates = engine.rates(group_by, filters)
+        n_selected, rate = engine.overall(filters)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Respondents", f"{n_selected:,}")
+        col2.metric("Hesitancy Rate", f"{rate:.1%}" if n_selected else "–")
+        col3.metric("Query Time", f"{elapsed_ms:.1f} ms")
+
+        if len(rates):
+            fig = px.bar(rates.sort_values("hesitancy_rate", ascending=False),
+                         x=group_by, y="hesitancy_rate", hover_data=["count"],
+                         title=f"Vaccine Hesitancy by {group_by.replace('_', ' ').title()}")
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(rates.round(3))
+        else:
+            st.info("No respondents match the selected filters.")
 
 elif section == "Twitter Sentiment":
     st.header("🐦 Twitter/X Sentiment Analysis")
@@ -94,24 +163,165 @@ elif section == "Twitter Sentiment":
 
         # Sentiment trend over time
         if "month" in sentiment_df.columns and "sentiment_mean" in sentiment_df.columns:
-            fig1 = px.line(sentiment_df, x="month", y="sentiment_mean",
+            trend_df = reduce_series(sentiment_df, "month", "sentiment_mean")
+            # With near-duplicate clustering, compare against the mean that counts every copy
+            trend_y = ["sentiment_mean", "sentiment_raw_mean"] if "sentiment_raw_mean" in trend_df.columns else "sentiment_mean"
+            fig1 = px.line(trend_df, x="month", y=trend_y,
                           title="Twitter Sentiment Trend on Vaccines")
             col1.plotly_chart(fig1, use_container_width=True)
 
         # Sentiment distribution
         try:
-            detailed_df = pd.read_csv(TABS/"twitter_sentiment_detailed.csv")
-            sentiment_counts = detailed_df["label"].value_counts()
-            fig2 = px.pie(sentiment_counts, values=sentiment_counts.values,
-                         names=sentiment_counts.index, title="Sentiment Distribution")
+            label_counts = pd.read_csv(VIEWS/"sentiment_label_counts.csv")
+            fig2 = px.pie(label_counts, values="count", names="label",
+                         title="Sentiment Distribution")
             col2.plotly_chart(fig2, use_container_width=True)
-        except:
-            col2.info("Detailed sentiment data not available")
+        except FileNotFoundError:
+            col2.info("Sentiment label counts not available")
+
+        # Score distribution from pre-binned counts
+        if os.path.exists(VIEWS/"sentiment_score_bins.csv"):
+            score_bins = pd.read_csv(VIEWS/"sentiment_score_bins.csv")
+            fig3 = px.bar(score_bins, x="bin_center", y="count",
+                         title="Sentiment Score Distribution",
+                         labels={"bin_center": "Sentiment Score", "count": "Tweets"})
+            st.plotly_chart(fig3, use_container_width=True)
+
+        # Tweets per detected language, with the label mix in each
+        if os.path.exists(TABS/"twitter_sentiment_by_language.csv"):
+            languages = pd.read_csv(TABS/"twitter_sentiment_by_language.csv")
+            label_columns = [c for c in ("negative", "neutral", "positive") if c in languages.columns]
+            fig4 = px.bar(languages, x="name", y=label_columns, title="Tweets by Language and Sentiment",
+                          labels={"name": "Language", "value": "Tweets", "variable": "Sentiment"})
+            st.plotly_chart(fig4, use_container_width=True)
+
+        if TWEET_STORE.exists():
+            tweets = TweetStore.open(TWEET_STORE)
+            negative, positive = tweets.thresholds
+            st.caption(f"Scored with the {tweets.backend} backend; positive above {positive:g}, negative below {negative:g}.")
+
+        # Throughput and agreement of each backend, from `python scripts/sentiment_backends.py`
+        if os.path.exists(REPORTS/"sentiment_backend_benchmark.csv"):
+            st.subheader("Sentiment Backends")
+            st.dataframe(pd.read_csv(REPORTS/"sentiment_backend_benchmark.csv"), use_container_width=True)
 
     except FileNotFoundError:
         st.warning("Twitter sentiment data not found.")
         st.info("Run the analysis pipeline to generate sentiment data.")
 
+elif section == "Topic Search":
+    st.header("🏷 Topics and Hashtags in Tweets")
+
+    if os.path.exists(TOPIC_INDEX/"meta.json"):
+        index = load_topic_index(os.path.getmtime(TOPIC_INDEX/"meta.json"))
+
+        query = st.text_input("Terms or hashtags (comma-separated)", "side effects")
+        col1, col2, col3 = st.columns(3)
+        states = col1.multiselect("States", index.states)
+        period = col2.selectbox("Period", ["month", "week", "day"])
+        match_all = col3.radio("Match", ["any term", "all terms"], horizontal=True) == "all terms"
+
+        terms = [t for t in query.split(",") if t.strip()]
+        start = time.perf_counter()
+        summary = index.summary(terms, states, period, match_all)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        col1, col2, col3 = st.columns(3)
+        matched = int(summary["tweets"].sum())
+        col1.metric("Matching Tweets", f"{matched:,}")
+        col2.metric("Mean Sentiment",
+                    f"{(summary['sentiment'] * summary['tweets']).sum() / matched:.3f}" if matched else "–")
+        col3.metric("Query Time", f"{elapsed_ms:.1f} ms")
+
+        if len(summary):
+            trend = reduce_series(summary, "period", "sentiment")
+            st.plotly_chart(px.line(trend, x="period", y="sentiment", hover_data=["tweets"],
+                                    title=f"Sentiment of Tweets Mentioning: {', '.join(t.strip() for t in terms)}"),
+                            use_container_width=True)
+        else:
+            st.info("No indexed tweets match the query.")
+
+        col1, col2 = st.columns(2)
+        col1.plotly_chart(px.bar(index.top_terms(20, hashtags=True), x="tweets", y="term", orientation="h",
+                                 title="Top Hashtags"), use_container_width=True)
+        col2.plotly_chart(px.bar(index.top_terms(20), x="tweets", y="term", orientation="h",
+                                 title="Top Terms"), use_container_width=True)
+    else:
+        st.warning("Topic index not found.")
+        st.info("Run: python vh.py sentiment")
+
+elif section == "Search Trends":
+    st.header("🔍 Google Trends Search Interest")
+
+    if os.path.exists(TABS/"trends_latest.csv") and os.path.exists(TRENDS_STORE/"meta.json"):
+        latest = pd.read_csv(TABS/"trends_latest.csv")
+        spiking = int(latest["spike"].sum())
+        col1, col2 = st.columns(2)
+        col1.metric("Search Terms", len(latest))
+        col2.metric(f"Spiking on {latest['date'].iloc[0]}", spiking)
+        st.dataframe(latest.sort_values("zscore", ascending=False))
+
+        term = st.selectbox("Search term", latest["term"])
+        dates, terms, values = load_matrix()
+        series = pd.DataFrame({"date": dates, "value": values[:, terms.index(term)]})
+        # Trailing mean of the days before each day, as the spike z-scores use
+        series["rolling_mean"] = series["value"].rolling(WINDOW, min_periods=min_history(WINDOW)).mean().shift(1)
+        series = reduce_series(series.dropna(subset=["value"]), "date", "value")
+        fig = px.line(series, x="date", y=["value", "rolling_mean"],
+                      title=f"Search Interest: {term} ({WINDOW}-day trailing mean)")
+        st.plotly_chart(fig, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        if os.path.exists(VIEWS/"trends_seasonal.csv"):
+            seasonal = pd.read_csv(VIEWS/"trends_seasonal.csv")
+            fig = px.bar(seasonal[seasonal["term"] == term], x="phase", y="seasonal",
+                         title="Seasonal Profile (deviation from rolling mean)")
+            col1.plotly_chart(fig, use_container_width=True)
+        if os.path.exists(TABS/"trends_spikes.csv"):
+            spikes = pd.read_csv(TABS/"trends_spikes.csv")
+            col2.markdown(f"**Recent spikes: {term}**")
+            col2.dataframe(spikes[spikes["term"] == term].tail(20).iloc[::-1])
+    else:
+        st.warning("Search trend statistics not found.")
+        st.info("Run: python vh.py trends")
+
+elif section == "Source Fusion":
+    st.header("🔗 Survey, Sentiment and Search Trends by State")
+
+    if os.path.exists(TABS/"fusion_panel.csv"):
+        panel = pd.read_csv(TABS/"fusion_panel.csv")
+        state = st.selectbox("State", sorted(panel["state"].unique()))
+        state_panel = panel[panel["state"] == state]
+
+        if "hesitancy_rate" in state_panel.columns and state_panel["hesitancy_rate"].notna().any():
+            st.metric("NFHS Hesitancy Rate", f"{state_panel['hesitancy_rate'].iloc[0]:.1%}")
+
+        col1, col2 = st.columns(2)
+        for col, measure, title in [(col1, "search_interest", "Search Interest"),
+                                    (col2, "sentiment", "Tweet Sentiment")]:
+            if measure in state_panel.columns and state_panel[measure].notna().any():
+                series = reduce_series(state_panel.dropna(subset=[measure]), "period", measure)
+                col.plotly_chart(px.line(series, x="period", y=measure, title=f"{title} in {state}"),
+                                 use_container_width=True)
+            else:
+                col.info(f"No {title.lower()} data for {state}")
+
+        if os.path.exists(REPORTS/"fusion_cross_correlations.csv"):
+            correlations = pd.read_csv(REPORTS/"fusion_cross_correlations.csv")
+            correlations["pair"] = correlations["x"] + " → " + correlations["y"]
+            lagged = correlations[correlations["lag"].notna()]
+            if len(lagged):
+                fig = px.bar(lagged, x="lag", y="r", color="pair", barmode="group",
+                             title="Lagged Cross-Correlations (positive lag: second series follows the first)")
+                st.plotly_chart(fig, use_container_width=True)
+            across = correlations[correlations["lag"].isna()]
+            if len(across):
+                st.markdown("**Correlation with NFHS hesitancy across states** (state means; the survey has no time axis)")
+                st.dataframe(across[["x", "y", "r", "n"]].rename(columns={"n": "states"}))
+    else:
+        st.warning("Fusion panel not found.")
+        st.info("Run: python vh.py fuse")
+
 elif section == "Regression Analysis":
     st.header("📊 Statistical Analysis")
 
@@ -126,7 +336,6 @@ elif section == "Regression Analysis":
             odds_df = pd.read_csv(REPORTS/"logit_odds_ratios.csv")
             st.dataframe(odds_df.round(3))
 
-            # Feature importance
             fig = px.bar(odds_df.sort_values("odds_ratio", ascending=False),
                         x="odds_ratio", y=odds_df.index, orientation="h",
                         title="Odds Ratios by Factor")
@@ -135,10 +344,46 @@ elif section == "Regression Analysis":
         except FileNotFoundError:
             st.info("Odds ratios data not available")
 
+        # Feature importance: leave-one-feature-out deviance change, Wald tests, standardized coefficients
+        if os.path.exists(REPORTS/"feature_importance.csv"):
+            importance = pd.read_csv(REPORTS/"feature_importance.csv")
+            features = importance.drop_duplicates("feature")
+            fig = px.bar(features.iloc[::-1], x="deviance_change", y="feature", orientation="h",
+                         hover_data=["feature_df", "deviance_p", "feature_wald_chi2"],
+                         title="Feature Importance (deviance increase when left out)")
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(importance[["feature", "term", "std_coefficient", "odds_ratio", "wald_z", "p_value"]].round(3))
+
     except FileNotFoundError:
         st.warning("Regression analysis not found.")
         st.info("Run the analysis pipeline to generate regression results.")
 
+    # Regularized logistic and gradient-boosted models
+    if os.path.exists(REPORTS/"model_cv_scores.csv"):
+        st.subheader("🧮 Model Track")
+        cv_scores = pd.read_csv(REPORTS/"model_cv_scores.csv")
+        st.dataframe(cv_scores[cv_scores["selected"]].drop(columns="selected").round(4))
+
+        col1, col2 = st.columns(2)
+        if os.path.exists(REPORTS/"permutation_importance.csv"):
+            importance = pd.read_csv(REPORTS/"permutation_importance.csv")
+            fig = px.bar(importance, x="log_loss_increase", y="feature", color="model",
+                         barmode="group", orientation="h", error_x="log_loss_increase_sd",
+                         title="Permutation Importance (held-out log-loss increase)")
+            col1.plotly_chart(fig, use_container_width=True)
+        if os.path.exists(REPORTS/"model_calibration.csv"):
+            calib = pd.read_csv(REPORTS/"model_calibration.csv")
+            fig = px.line(calib, x="mean_predicted", y="observed_rate", color="model", markers=True,
+                          title="Calibration by Decile of Predicted Risk")
+            col2.plotly_chart(fig, use_container_width=True)
+
+        # Each selected model's predicted hesitancy for the most common respondent profiles
+        if os.path.exists(TABS/"model_predictions.csv"):
+            preds = pd.read_csv(TABS/"model_predictions.csv")
+            preds.insert(preds.columns.get_loc("hesitant") + 1, "observed_rate", preds["hesitant"] / preds["respondents"])
+            st.markdown("**Predicted hesitancy by respondent profile** (largest profiles first)")
+            st.dataframe(preds.sort_values("respondents", ascending=False).head(500).round(3))
+
 elif section == "Data Sources":
     st.header("📁 Data Sources & Methodology")
 
@@ -153,7 +398,7 @@ elif section == "Data Sources":
     st.markdown("""
     1. **Data Extraction**: Automated collection from multiple sources
     2. **Data Cleaning**: Standardization and missing value handling
-    3. **Sentiment Analysis**: TextBlob-based sentiment scoring
+    3. **Sentiment Analysis**: TextBlob, VADER-style lexicon or local ONNX model scoring (chosen per run)
     4. **Statistical Modeling**: Logistic regression for hesitancy prediction
     5. **Visualization**: Interactive dashboard with Plotly
     """)
@@ -163,7 +408,7 @@ elif section == "Data Sources":
     To use with real data:
     1. Replace sample data in `data/` directories with actual datasets
     2. Update API keys in `.env` file for live data collection
-    3. Run: `python projects/vaccine_hesitancy/run_all.py`
+    3. Run: `python vh.py run`
     """)
 
 # Footer
@@ -1,22 +1,25 @@
-import pandas as pd, statsmodels.api as sm
-from pathlib import Path
-import numpy as np
-
-BASE = Path("projects/vaccine_hesitancy")
-TABS = BASE/"outputs/tables"
-OUTR = BASE/"outputs/reports"
+import argparse
+import warnings
+
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS
+from nfhs_store import load_nfhs_frame
+from small_area import estimate_small_areas
+from model_track import train_models, penalized_logit
+from feature_importance import compute_importance, write_importance
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+sm = lazy_import("statsmodels.api")
+sm_exceptions = lazy_import("statsmodels.tools.sm_exceptions")
+
+TABS = OUTPUTS/"tables"
+OUTR = OUTPUTS/"reports"
+VIEWS = OUTPUTS/"views"
 OUTR.mkdir(parents=True, exist_ok=True)
 
-def analyze_vaccine_hesitancy():
-    """Analyze factors associated with vaccine hesitancy"""
-    try:
-        df = pd.read_csv(TABS/"nfhs_clean.csv")
-        print(f"📊 Analyzing {len(df)} records for vaccine hesitancy factors")
-    except FileNotFoundError:
-        print("⚠ NFHS clean data not found. Run data cleaning first:")
-        print("  python projects/vaccine_hesitancy/scripts/clean_data.py")
-        return
-
+def build_design_matrix(df, verbose=True):
+    """Select available predictors and build the one-hot design matrix and outcome"""
     # Prepare features for analysis
     features = []
 
@@ -37,10 +40,12 @@ def analyze_vaccine_hesitancy():
         features.append("wealth_index")
 
     if not features:
-        print("⚠ No suitable features found for analysis")
-        return
+        if verbose:
+            print("⚠ No suitable features found for analysis")
+        return None, None
 
-    print(f"🔍 Analyzing factors: {features}")
+    if verbose:
+        print(f"🔍 Analyzing factors: {features}")
 
     # Create feature matrix
     X = df[features].copy()
@@ -72,6 +77,55 @@ def analyze_vaccine_hesitancy():
     valid_idx = X.dropna().index
     X = X.loc[valid_idx]
     y = y.loc[valid_idx]
+    # Source feature of each block of dummies, for per-feature importance
+    X.attrs['features'] = features
+
+    return X, y
+
+def fit_logit(X, y):
+    """Fit the logistic regression and tabulate odds ratios with 95% CIs"""
+    # statsmodels only warns under separation and returns diverged estimates; make it fail
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", sm_exceptions.PerfectSeparationWarning)
+        model = sm.Logit(y, X.astype(float)).fit(disp=False)
+    if not model.mle_retvals.get('converged', True):
+        raise sm_exceptions.ConvergenceWarning("Logit did not converge (likely quasi-separation)")
+
+    odds_ratios = np.exp(model.params)
+    conf_int = np.exp(model.conf_int())
+
+    results_df = pd.DataFrame({
+        'coefficient': model.params,
+        'odds_ratio': odds_ratios,
+        'conf_int_lower': conf_int[0],
+        'conf_int_upper': conf_int[1],
+        'p_value': model.pvalues
+    })
+    return model, results_df
+
+def fit_logit_or_penalized(X, y):
+    """Fit the Logit, falling back to the L2-penalized fit when it fails; returns
+    (model, results_df, alpha) with alpha the per-respondent penalty (0 for the Logit)"""
+    try:
+        return (*fit_logit(X, y), 0.0)
+    except Exception as e:
+        print(f"⚠ Logit failed ({e}); using the penalized fallback")
+        model, results_df, _ = penalized_logit(X, y)
+        return model, results_df, 1 / (model.C * len(y))
+
+def analyze_vaccine_hesitancy():
+    """Analyze factors associated with vaccine hesitancy"""
+    try:
+        df = load_nfhs_frame()
+        print(f"📊 Analyzing {len(df)} records for vaccine hesitancy factors")
+    except FileNotFoundError:
+        print("⚠ NFHS clean data not found. Run data cleaning first:")
+        print("  python vh.py clean")
+        return
+
+    X, y = build_design_matrix(df)
+    if X is None:
+        return
 
     if len(X) < 50:
         print("⚠ Insufficient data for regression analysis")
@@ -81,7 +135,7 @@ def analyze_vaccine_hesitancy():
 
     # Fit logistic regression
     try:
-        model = sm.Logit(y, X).fit(disp=False)
+        model, results_df, alpha = fit_logit_or_penalized(X, y)
 
         # Save detailed results
         with open(OUTR/"logit_summary.txt", "w") as f:
@@ -90,30 +144,25 @@ def analyze_vaccine_hesitancy():
             f.write(f"Sample size: {len(X)}\n")
             f.write(f"Features: {list(X.columns)}\n")
             f.write(f"Hesitancy rate: {y.mean():.3f}\n\n")
-            f.write(model.summary().as_text())
+            if alpha:
+                f.write(f"Maximum likelihood failed (separation); L2-penalized fit, alpha={alpha:g}\n")
+                f.write("Wald intervals from the penalized information matrix\n\n")
+                f.write(results_df.to_string(float_format=lambda v: f"{v:.4f}"))
+            else:
+                f.write(model.summary().as_text())
 
         # Save odds ratios
-        odds_ratios = np.exp(model.params)
-        conf_int = np.exp(model.conf_int())
-
-        results_df = pd.DataFrame({
-            'coefficient': model.params,
-            'odds_ratio': odds_ratios,
-            'conf_int_lower': conf_int[0],
-            'conf_int_upper': conf_int[1],
-            'p_value': model.pvalues
-        })
-
         results_df.to_csv(OUTR/"logit_odds_ratios.csv")
         print("✅ Odds ratios saved to reports/logit_odds_ratios.csv")
 
-        # Create feature importance plot data
-        feature_importance = results_df.abs().sort_values('coefficient', ascending=False)
-        feature_importance.to_csv(OUTR/"feature_importance.csv")
-        print("✅ Feature importance saved to reports/feature_importance.csv")
+        # Standardized coefficients, Wald tests and leave-one-feature-out deviance changes
+        write_importance(compute_importance(X, y, results_df['coefficient'], alpha=alpha))
 
-        print(f"🎯 Model AIC: {model.aic:.2f}")
-        print(f"📊 Pseudo R-squared: {model.prsquared:.3f}")
+        if alpha:
+            print("🔄 Odds ratios are from the penalized fallback")
+        else:
+            print(f"🎯 Model AIC: {model.aic:.2f}")
+            print(f"📊 Pseudo R-squared: {model.prsquared:.3f}")
 
         # Interpret key findings
         significant_features = results_df[results_df['p_value'] < 0.05]
@@ -131,10 +180,14 @@ def analyze_vaccine_hesitancy():
         print("  - Insufficient variation in predictors")
         print("  - Multicollinearity issues")
 
+def hesitancy_stats(df, col):
+    """Respondent count, hesitancy rate and SD for each value of col"""
+    return df.groupby(col)['vaccine_hesitant'].agg(['count', 'mean', 'std']).round(3).reset_index()
+
 def create_summary_statistics():
     """Create comprehensive summary statistics"""
     try:
-        df = pd.read_csv(TABS/"nfhs_clean.csv")
+        df = load_nfhs_frame()
 
         # Overall statistics
         stats = {
@@ -145,20 +198,22 @@ def create_summary_statistics():
 
         # Group-wise statistics
         if 'state' in df.columns:
-            state_stats = df.groupby('state')['vaccine_hesitant'].agg(['count', 'mean', 'std']).round(3)
-            state_stats.to_csv(OUTR/"hesitancy_by_state.csv")
+            state_stats = hesitancy_stats(df, 'state')
+            state_stats.to_csv(OUTR/"hesitancy_by_state.csv", index=False)
             print("✅ State-wise hesitancy statistics saved")
 
         if 'education' in df.columns:
-            edu_stats = df.groupby('education')['vaccine_hesitant'].agg(['count', 'mean', 'std']).round(3)
-            edu_stats.to_csv(OUTR/"hesitancy_by_education.csv")
+            edu_stats = hesitancy_stats(df, 'education')
+            edu_stats.to_csv(OUTR/"hesitancy_by_education.csv", index=False)
             print("✅ Education-wise hesitancy statistics saved")
 
         if 'gender' in df.columns:
-            gender_stats = df.groupby('gender')['vaccine_hesitant'].agg(['count', 'mean', 'std']).round(3)
-            gender_stats.to_csv(OUTR/"hesitancy_by_gender.csv")
+            gender_stats = hesitancy_stats(df, 'gender')
+            gender_stats.to_csv(OUTR/"hesitancy_by_gender.csv", index=False)
             print("✅ Gender-wise hesitancy statistics saved")
 
+        create_dashboard_views(df)
+
         # Save overall statistics
         with open(OUTR/"summary_statistics.txt", "w") as f:
             f.write("VACCINE HESITANCY SUMMARY STATISTICS\n")
@@ -171,6 +226,36 @@ def create_summary_statistics():
     except FileNotFoundError:
         print("⚠ Clean data not found for summary statistics")
 
+def create_dashboard_views(df):
+    """Write small pre-aggregated tables so the dashboard never loads respondent rows"""
+    VIEWS.mkdir(parents=True, exist_ok=True)
+
+    overview = pd.DataFrame([{
+        'respondents': len(df),
+        'hesitancy_rate': df['vaccine_hesitant'].mean(),
+        'states': df['state'].nunique() if 'state' in df.columns else 0
+    }])
+    overview.to_csv(VIEWS/"overview.csv", index=False)
+
+    if 'education' in df.columns:
+        edu_counts = df.groupby(['education', 'vaccine_hesitant']).size().reset_index(name='count')
+        edu_counts.to_csv(VIEWS/"education_hesitancy_counts.csv", index=False)
+
+    if 'state' in df.columns:
+        state_rates = df.groupby('state')['vaccine_hesitant'].agg(['count', 'mean']).reset_index()
+        state_rates = state_rates.rename(columns={'mean': 'vaccine_hesitant'})
+        state_rates = state_rates.sort_values('vaccine_hesitant', ascending=False)
+        state_rates.to_csv(VIEWS/"state_rates.csv", index=False)
+
+    if 'gender' in df.columns:
+        gender_stats = df.groupby('gender')['vaccine_hesitant'].agg(['count', 'mean']).round(3)
+        gender_stats.to_csv(VIEWS/"gender_stats.csv")
+
+    print(f"✅ Dashboard views saved to {VIEWS}")
+
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Fit the hesitancy regression, small-area estimates, model track and summary statistics").parse_args()
     analyze_vaccine_hesitancy()
     create_summary_statistics()
+    estimate_small_areas()
+    train_models()
@@ -0,0 +1,79 @@
+"""
+Import-Time Budget Check for Vaccine Hesitancy Research
+Imports each pipeline script in a fresh interpreter with -X importtime
+and fails if any of them exceeds the startup budget
+"""
+
+from pathlib import Path
+import argparse
+import os
+import subprocess
+import sys
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Budget for importing one script, on top of bare interpreter startup
+DEFAULT_BUDGET_MS = 150
+
+def pipeline_modules():
+    """Module names of every stage script in vh.py, in pipeline order"""
+    sys.path.insert(0, str(SCRIPTS_DIR.parent))
+    import vh
+    modules = [Path(stage.script).stem for stage in vh.pipeline_stages().values()]
+    return list(dict.fromkeys(modules))
+
+def measure_import(module):
+    """Cumulative import time of module in ms, plus its slowest direct imports"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(SCRIPTS_DIR), os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    # -X importtime lists a module's imports before the module itself, so only the
+    # depth-1 entries since the previous depth-0 entry (interpreter startup) belong to it
+    total_us = None
+    children = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            if name.strip() == module:
+                total_us = int(cumulative)
+                break
+            children = []
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+
+    slowest = sorted(children, key=lambda c: c[1], reverse=True)[:3]
+    return (total_us or 0) / 1000, slowest
+
+def main():
+    parser = argparse.ArgumentParser(description="Check pipeline script import times against a budget")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Maximum import time per script in ms (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("modules", nargs="*",
+                        help="Modules to check (default: every stage script in vh.py)")
+    args = parser.parse_args()
+    args.modules = args.modules or pipeline_modules()
+
+    print(f"⏱ Import-time budget: {args.budget_ms:.0f} ms per script")
+    over = []
+    for module in args.modules:
+        total_ms, slowest = measure_import(module)
+        status = "✅" if total_ms <= args.budget_ms else "❌"
+        print(f"{status} {module:<26} {total_ms:8.1f} ms")
+        if total_ms > args.budget_ms:
+            over.append(module)
+            for name, ms in slowest:
+                print(f"     {name:<30} {ms:8.1f} ms")
+
+    if over:
+        print(f"\n⚠ Over budget: {', '.join(over)}. Move heavy imports behind lazy_import().")
+        sys.exit(1)
+    print("\n✅ All scripts within the import-time budget")
+
+if __name__ == "__main__":
+    main()
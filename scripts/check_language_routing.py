@@ -0,0 +1,54 @@
+"""
+Language Routing Spot Check for Vaccine Hesitancy Research
+Scores a few hand-labelled Hindi, Romanized Hindi and English sentences through
+the language router and fails if any gets the wrong language or label, so
+negation and threshold regressions in the routed lexicons show up before a run
+"""
+
+import argparse
+import sys
+
+from lazy_imports import lazy_import
+from language_routing import LANGUAGES, LanguageRouter
+from sentiment_backends import get_backend
+from tweet_store import clean_text_array, label_array
+
+pa = lazy_import("pyarrow")
+
+# (text, expected language, expected label)
+SPOT_CHECKS = [
+    ("टीका सुरक्षित है", 'hi', 'positive'),
+    ("टीका सुरक्षित नहीं है", 'hi', 'negative'),
+    ("यह टीका अच्छा नहीं है", 'hi', 'negative'),
+    ("vaccine safe nahi hai", 'hi-Latn', 'negative'),
+    ("vaccine accha nahi hai", 'hi-Latn', 'negative'),
+    ("vaccine lagwa liya bahut accha laga", 'hi-Latn', 'positive'),
+    ("bina dar ke tika lagwao", 'hi-Latn', 'positive'),
+    ("the vaccine is safe", 'en', 'positive'),
+    ("the vaccine is not safe", 'en', 'negative'),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Check routed sentiment labels on hand-labelled sentences")
+    parser.add_argument("--backend", help="English sentiment backend (default: [sentiment] backend)")
+    args = parser.parse_args()
+
+    router = LanguageRouter(get_backend(args.backend))
+    texts = [text for text, _, _ in SPOT_CHECKS]
+    scores, codes = router.score(clean_text_array(pa.array(texts, type=pa.string())))
+    labels = label_array(scores, router.thresholds(codes)).to_pylist()
+
+    failed = 0
+    for (text, language, label), score, code, got in zip(SPOT_CHECKS, scores, codes, labels):
+        ok = LANGUAGES[code] == language and got == label
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} {score:+.2f} {LANGUAGES[code]:<8} {got:<9} {text}"
+              + ("" if ok else f"  (expected {language}, {label})"))
+
+    if failed:
+        print(f"\n❌ {failed} of {len(SPOT_CHECKS)} spot checks failed")
+        sys.exit(1)
+    print(f"\n✅ All {len(SPOT_CHECKS)} spot checks passed")
+
+if __name__ == "__main__":
+    main()
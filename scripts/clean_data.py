@@ -1,26 +1,66 @@
-import pandas as pd, os
-from pathlib import Path
-BASE = Path("projects/vaccine_hesitancy")
-NFHS = BASE/"data/nfhs"
-OUTT = BASE/"outputs/tables"
+import os, argparse
+
+from lazy_imports import lazy_import
+from pipeline_config import DATA_DIR, OUTPUTS, get_chunk_rows
+from nfhs_query import build_query_index
+from nfhs_store import write_nfhs_store
+from data_validation import require_valid
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+NFHS = DATA_DIR/"nfhs"
+OUTT = OUTPUTS/"tables"
 OUTT.mkdir(parents=True, exist_ok=True)
 
-def clean_nfhs():
-    files = list(NFHS.glob("*.csv"))
-    if not files:
-        print("⚠ No NFHS data files found. Run data extraction first:")
-        print("  python projects/vaccine_hesitancy/scripts/data_extraction.py")
-        return
+def compact(df):
+    """Text columns as categoricals (int8/int16 codes plus one copy of each distinct value)"""
+    for col in df.columns:
+        if not (pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col])):
+            df[col] = df[col].astype('category')
+    return df
 
+def concat_compact(chunks):
+    """Concatenate compacted chunks, merging each text column's categories instead of falling
+    back to one Python string per row"""
+    if len(chunks) == 1:
+        return chunks[0]
+    columns = list(dict.fromkeys(col for chunk in chunks for col in chunk.columns))
+    combined = {}
+    for col in columns:
+        parts = [chunk[col] if col in chunk.columns else pd.Series(np.nan, index=chunk.index) for chunk in chunks]
+        text = [p for p in parts if isinstance(p.dtype, pd.CategoricalDtype)]
+        if not text:
+            combined[col] = pd.concat(parts, ignore_index=True)
+            continue
+        # Chunks without the column, or with only gaps in it, get no categories of their own
+        empty = text[0].cat.categories[:0]
+        parts = [p if isinstance(p.dtype, pd.CategoricalDtype) or not p.isna().all()
+                 else pd.Series(pd.Categorical([None] * len(p), categories=empty)) for p in parts]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            try:
+                combined[col] = pd.Series(pd.api.types.union_categoricals(parts, sort_categories=True))
+                continue
+            except TypeError:
+                pass
+        # Text in one chunk and numbers in another (or categories of different types): categories
+        # of the values as read
+        combined[col] = pd.concat([p.astype(object) for p in parts], ignore_index=True).astype('category')
+    return pd.DataFrame(combined)
+
+def read_nfhs(files):
+    """Combined NFHS files with normalized, standardized column names and no other changes. Files
+    are read [chunks] nfhs_rows at a time and each chunk's text columns are compacted to
+    categoricals as it arrives, so peak memory is one raw chunk plus the compact table"""
     print(f"📁 Found {len(files)} NFHS data files")
-    dfs = []
+    chunk_rows = get_chunk_rows('nfhs_rows')
+    chunks = []
     for f in files:
         print(f"  Processing: {f.name}")
-        df = pd.read_csv(f)
-        df.columns = [c.strip().lower().replace(" ","_").replace("-","_") for c in df.columns]
-        dfs.append(df)
+        for chunk in (pd.read_csv(f, chunksize=chunk_rows) if chunk_rows else [pd.read_csv(f)]):
+            chunk.columns = [c.strip().lower().replace(" ","_").replace("-","_") for c in chunk.columns]
+            chunks.append(compact(chunk))
 
-    df = pd.concat(dfs, ignore_index=True)
+    df = concat_compact(chunks)
     print(f"📊 Combined dataset shape: {df.shape}")
 
     # Standardize column names for vaccine hesitancy analysis
@@ -36,6 +76,20 @@ def clean_nfhs():
     for old_col, new_col in column_mapping.items():
         if old_col in df.columns and new_col not in df.columns:
             df.rename(columns={old_col: new_col}, inplace=True)
+    return df
+
+def clean_nfhs():
+    files = list(NFHS.glob("*.csv"))
+    if not files:
+        print("⚠ No NFHS data files found. Run data extraction first:")
+        print("  python vh.py extract")
+        return
+
+    df = read_nfhs(files)
+
+    # Missing columns, unknown categories, out-of-range ages and the like stop here, before the
+    # defaults below could paper over them (see data_validation.RULES)
+    require_valid('nfhs', df)
 
     # Create vaccine_hesitant column if it doesn't exist
     if 'vaccine_hesitant' not in df.columns:
@@ -65,9 +119,12 @@ def clean_nfhs():
     df['vaccine_hesitant'] = df['vaccine_hesitant'].astype(int)
 
     # Add derived variables
-    df['education_level'] = df['education'].map({
+    # Mapped per distinct value, then spread over the rows by code
+    codes, uniques = pd.factorize(df['education'])
+    levels = pd.Series(uniques).map({
         'No Education': 0, 'Primary': 1, 'Secondary': 2, 'Higher': 3
-    }).fillna(1)
+    }).fillna(1).to_numpy()
+    df['education_level'] = np.where(codes >= 0, levels[codes], 1)
 
     df['rural'] = (df.get('rural_urban', 'Urban') == 'Rural').astype(int)
 
@@ -77,10 +134,17 @@ def clean_nfhs():
     df.to_csv(OUTT/"nfhs_clean.csv", index=False)
     print("✅ nfhs_clean.csv saved.")
 
+    # Columnar copy that analysis stages and their workers memory-map instead of re-parsing the CSV
+    write_nfhs_store(df)
+
+    # Index for the dashboard's interactive filters
+    build_query_index(df)
+
     # Create summary statistics
-    summary = df.groupby(['state', 'gender', 'education'])['vaccine_hesitant'].agg(['count', 'mean', 'std']).round(3)
+    summary = df.groupby(['state', 'gender', 'education'], observed=True)['vaccine_hesitant'].agg(['count', 'mean', 'std']).round(3)
     summary.to_csv(OUTT/"nfhs_summary.csv")
     print("✅ nfhs_summary.csv saved.")
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Clean and standardize NFHS survey data").parse_args()
     clean_nfhs()
@@ -3,24 +3,26 @@ Data Extraction Module for Vaccine Hesitancy Research
 Extracts data from NFHS-5, Twitter/X, and Google Trends
 """
 
-import pandas as pd
-import numpy as np
-from pathlib import Path
 import os
-import requests
+import argparse
 from datetime import datetime, timedelta
 import time
 import json
 
-BASE = Path("projects/vaccine_hesitancy")
-DATA_DIR = BASE/"data"
+from lazy_imports import lazy_import
+from pipeline_config import DATA_DIR
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
 NFHS_DIR = DATA_DIR/"nfhs"
 TWITTER_DIR = DATA_DIR/"twitter"
 TRENDS_DIR = DATA_DIR/"trends"
+NEWS_DIR = DATA_DIR/"news"
 
 def setup_directories():
     """Create necessary directories for data storage"""
-    for dir_path in [NFHS_DIR, TWITTER_DIR, TRENDS_DIR]:
+    for dir_path in [NFHS_DIR, TWITTER_DIR, TRENDS_DIR, NEWS_DIR]:
         dir_path.mkdir(parents=True, exist_ok=True)
 
 def extract_nfhs_data():
@@ -76,12 +78,13 @@ def extract_twitter_data():
     """Extract Twitter/X data for vaccine sentiment analysis"""
     print("🐦 Extracting Twitter/X data for vaccine sentiment...")
 
-    # Since we don't have Twitter API access, create sample data
-    # In production, this would use Tweepy API or fetch from existing datasets
+    # Sample data; real tweets come from the API collector (tweet_collector.py), which
+    # writes into data/twitter/collected where the sentiment stage also looks
 
     sample_tweets = create_sample_twitter_data()
     sample_tweets.to_csv(TWITTER_DIR/"vaccine_tweets_india.csv", index=False)
-    print("✅ Sample Twitter data created. Replace with actual API data.")
+    print("✅ Sample Twitter data created. Collect real tweets with:")
+    print("  python vh.py collect --start 2024-01-01 --end 2024-02-01")
 
 def create_sample_twitter_data():
     """Create sample Twitter data for vaccine sentiment analysis"""
@@ -159,38 +162,33 @@ def extract_news_articles():
     """Extract news articles related to vaccine hesitancy"""
     print("📰 Extracting news articles...")
 
-    # This would typically use news APIs like NewsAPI, Google News, etc.
-    # For now, create sample data
+    # Only the article URLs are listed here (from feeds, NewsAPI, Google News, etc.); the news
+    # fetcher downloads the pages, extracts the text and scores it like tweets
     sample_news = create_sample_news_data()
-    sample_news.to_csv(DATA_DIR/"vaccine_news_articles.csv", index=False)
-    print("✅ Sample news data created.")
+    sample_news.to_csv(NEWS_DIR/"vaccine_news_articles.csv", index=False)
+    print("✅ Sample news URL list created. Fetch and score the articles with:")
+    print("  python vh.py news")
 
 def create_sample_news_data():
-    """Create sample news articles data"""
+    """Create a sample list of news article URLs"""
     news_data = [
         {
             'title': 'Vaccine Hesitancy Remains High in Rural India',
             'source': 'The Hindu',
             'date': '2023-03-15',
-            'url': 'https://example.com/news1',
-            'content': 'Despite government efforts, vaccine hesitancy continues to be a challenge in rural areas...',
-            'sentiment': 'negative'
+            'url': 'https://example.com/news1'
         },
         {
             'title': 'COVID Vaccination Drive Shows Promising Results',
             'source': 'Times of India',
             'date': '2023-04-20',
-            'url': 'https://example.com/news2',
-            'content': 'India achieves major milestone in vaccination coverage...',
-            'sentiment': 'positive'
+            'url': 'https://example.com/news2'
         },
         {
             'title': 'Misinformation Spreads on Social Media About Vaccines',
             'source': 'Indian Express',
             'date': '2023-05-10',
-            'url': 'https://example.com/news3',
-            'content': 'Health experts warn about vaccine misinformation on WhatsApp and Facebook...',
-            'sentiment': 'negative'
+            'url': 'https://example.com/news3'
         }
     ]
 
@@ -213,12 +211,13 @@ def main():
     print(f"  - NFHS: {NFHS_DIR}")
     print(f"  - Twitter: {TWITTER_DIR}")
     print(f"  - Trends: {TRENDS_DIR}")
-    print(f"  - News: {DATA_DIR}")
+    print(f"  - News: {NEWS_DIR}")
 
     print("\n📝 Next steps:")
     print("1. Replace sample data with actual datasets")
-    print("2. Run: python projects/vaccine_hesitancy/scripts/clean_data.py")
-    print("3. Run: python projects/vaccine_hesitancy/run_all.py")
+    print("2. Run: python vh.py clean")
+    print("3. Run: python vh.py run")
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Extract (or create sample) NFHS, Twitter, Trends and news data").parse_args()
     main()
@@ -0,0 +1,269 @@
+"""
+Data Validation for Vaccine Hesitancy Research
+Declarative rules (required columns, null rates, allowed categories, numeric
+ranges, date bounds, unique keys) checked against each dataset as it is loaded.
+Every rule is one vectorized pass over one column (categories are checked on
+the column's distinct values), so the checks can run on every load; results go
+to a compact report and error-level violations stop the stage, which in turn
+stops `python vh.py run` before any downstream stage reads bad data
+"""
+
+from datetime import date
+import argparse
+import sys
+import time
+
+from lazy_imports import lazy_import
+from pipeline_config import DATA_DIR, OUTPUTS, get_path, settings
+
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+
+REPORT_PATH = OUTPUTS/"reports"/"validation_report.csv"
+
+REPORT_COLUMNS = ['dataset', 'check', 'column', 'severity', 'rows', 'violations', 'rate', 'max_rate',
+                  'status', 'detail']
+
+TODAY = 'today'
+
+# One list of rules per dataset. Each rule names a check and the column(s) it applies to; severity
+# 'error' (the default) blocks the stage, 'warning' is only reported, and max_rate is the share of
+# rows allowed to violate the rule. Columns a dataset does not have are skipped, except by 'required'
+RULES = {
+    'nfhs': [
+        {'check': 'required', 'columns': ['state', 'gender', 'education']},
+        # Hesitancy may instead be derived from vaccination status (see clean_data)
+        {'check': 'required', 'columns': ['vaccine_hesitant', 'vaccination_status'], 'any': True},
+        {'check': 'nulls', 'columns': ['state', 'gender', 'education', 'age', 'rural_urban']},
+        {'check': 'nulls', 'columns': ['vaccine_hesitant', 'vaccination_status'], 'severity': 'warning'},
+        {'check': 'allowed', 'column': 'gender', 'values': ['Male', 'Female', 'Other']},
+        {'check': 'allowed', 'column': 'education', 'values': ['No Education', 'Primary', 'Secondary', 'Higher']},
+        {'check': 'allowed', 'column': 'rural_urban', 'values': ['Rural', 'Urban']},
+        {'check': 'allowed', 'column': 'vaccine_hesitant', 'values': [0, 1]},
+        {'check': 'allowed', 'column': 'vaccination_status', 'values': [0, 1]},
+        {'check': 'allowed', 'column': 'income', 'values': ['Low', 'Middle', 'High'], 'severity': 'warning'},
+        {'check': 'allowed', 'column': 'wealth_index', 'severity': 'warning',
+         'values': ['Poorest', 'Poorer', 'Middle', 'Richer', 'Richest']},
+        {'check': 'range', 'column': 'age', 'min': 18, 'max': 65},
+        {'check': 'unique', 'columns': ['caseid']},
+    ],
+    'tweets': [
+        {'check': 'required', 'columns': ['text']},
+        {'check': 'nulls', 'columns': ['text'], 'severity': 'warning'},
+        # Twitter's launch day to today; unparseable dates count as violations
+        {'check': 'dates', 'column': 'date', 'min': '2006-03-21', 'max': TODAY},
+        {'check': 'unique', 'columns': ['id'], 'severity': 'warning'},
+    ],
+    'trends': [
+        {'check': 'required', 'columns': ['date', 'search_term', 'trend_value']},
+        {'check': 'nulls', 'columns': ['date', 'search_term']},
+        {'check': 'nulls', 'columns': ['trend_value'], 'severity': 'warning'},
+        # Google Trends starts in 2004 and scales interest to 0-100
+        {'check': 'dates', 'column': 'date', 'min': '2004-01-01', 'max': TODAY},
+        {'check': 'range', 'column': 'trend_value', 'min': 0, 'max': 100},
+        # A repeated (date, term, region) would silently overwrite a cell of the trends matrix
+        {'check': 'unique', 'columns': ['date', 'search_term', 'region']},
+    ],
+}
+
+def column_names(frame):
+    """Column names of a pandas DataFrame or an Arrow table"""
+    return list(frame.column_names) if isinstance(frame, pa.Table) else list(frame.columns)
+
+def column(frame, name):
+    """One column as a pandas Series (Arrow strings stay Arrow-backed, so this does not copy text)"""
+    if isinstance(frame, pa.Table):
+        return frame[name].to_pandas(types_mapper=pd.ArrowDtype)
+    return frame[name]
+
+def examples(values, limit=3):
+    """A few offending values for the report"""
+    return ", ".join(repr(v) for v in list(values)[:limit])
+
+def check_required(frame, rule, n):
+    present = set(column_names(frame))
+    missing = [c for c in rule['columns'] if c not in present]
+    if rule.get('any'):
+        detail = f"none of {', '.join(missing)}" if len(missing) == len(rule['columns']) else ""
+    else:
+        detail = f"missing {', '.join(missing)}" if missing else ""
+    return [(" | ".join(rule['columns']), n if detail else 0, detail)]
+
+def check_nulls(frame, rule, n):
+    results = []
+    for name in rule['columns']:
+        if name in column_names(frame):
+            nulls = int(column(frame, name).isna().sum())
+            results.append((name, nulls, f"{nulls:,} empty" if nulls else ""))
+    return results
+
+def check_allowed(frame, rule, n):
+    counts = column(frame, rule['column']).value_counts(dropna=True)
+    allowed = set(rule['values'])
+    # Distinct values only: one hash pass over the column, then a handful of comparisons
+    bad = counts[[v not in allowed for v in counts.index]].sort_values(ascending=False)
+    detail = f"not in {sorted(allowed, key=str)}: {', '.join(f'{v!r} ({c:,})' for v, c in bad.iloc[:3].items())}" if len(bad) else ""
+    return [(rule['column'], int(bad.sum()), detail)]
+
+def check_range(frame, rule, n):
+    values = column(frame, rule['column'])
+    numbers = pd.to_numeric(values, errors='coerce')
+    # Text where a number belongs is a violation, not a null
+    unparsed = int(numbers.isna().sum() - values.isna().sum())
+    low, high = numbers.min(), numbers.max()
+    outside = 0
+    if (pd.notna(low) and low < rule['min']) or (pd.notna(high) and high > rule['max']):
+        outside = int(((numbers < rule['min']) | (numbers > rule['max'])).sum())
+    details = []
+    if outside:
+        details.append(f"{outside:,} outside {rule['min']}-{rule['max']} (min {low:g}, max {high:g})")
+    if unparsed:
+        details.append(f"{unparsed:,} not numeric")
+    return [(rule['column'], outside + unparsed, "; ".join(details))]
+
+def bound(value):
+    return pd.Timestamp(date.today() if value == TODAY else value)
+
+def parse_dates(values):
+    """Timestamps (naive UTC), NaT where a value cannot be parsed"""
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601', utc=True)
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        # Anything not ISO 8601 gets the slower per-value parser
+        parsed[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed', utc=True)
+    return parsed.dt.tz_localize(None)
+
+def check_dates(frame, rule, n):
+    values = column(frame, rule['column'])
+    parsed = parse_dates(values)
+    unparsed = int((parsed.isna() & values.notna()).sum())
+    low, high = bound(rule['min']), bound(rule['max']) + pd.Timedelta(days=1)
+    outside = int(((parsed < low) | (parsed >= high)).sum())
+    details = []
+    if outside:
+        details.append(f"{outside:,} outside {low:%Y-%m-%d} to {high - pd.Timedelta(days=1):%Y-%m-%d} "
+                       f"(earliest {parsed.min():%Y-%m-%d}, latest {parsed.max():%Y-%m-%d})")
+    if unparsed:
+        details.append(f"{unparsed:,} unparseable: {examples(values[parsed.isna() & values.notna()].unique())}")
+    return [(rule['column'], outside + unparsed, "; ".join(details))]
+
+def check_unique(frame, rule, n):
+    names = [c for c in rule['columns'] if c in column_names(frame)]
+    if not names:
+        return []
+    keys = pd.DataFrame({c: column(frame, c) for c in names})
+    duplicated = keys.duplicated() & keys.notna().all(axis=1)
+    repeats = int(duplicated.sum())
+    detail = ""
+    if repeats:
+        first = keys[duplicated].iloc[:3]
+        detail = f"{repeats:,} repeated: {examples(first.itertuples(index=False, name=None) if len(names) > 1 else first[names[0]])}"
+    return [(" + ".join(names), repeats, detail)]
+
+CHECKS = {
+    'required': check_required,
+    'nulls': check_nulls,
+    'allowed': check_allowed,
+    'range': check_range,
+    'dates': check_dates,
+    'unique': check_unique,
+}
+
+def default_max_rate(rule):
+    """Violation share a rule tolerates when it does not set max_rate"""
+    if rule['check'] == 'nulls':
+        return settings.getfloat('validation', 'max_null_rate')
+    if rule['check'] == 'dates':
+        return settings.getfloat('validation', 'max_bad_date_rate')
+    return 0.0
+
+def validate(dataset, frame, rules=None):
+    """One report row per rule and column; status is pass, fail (error rules), warn or skipped"""
+    n = len(frame)
+    present = set(column_names(frame))
+    rows = []
+    for rule in (RULES[dataset] if rules is None else rules):
+        check = rule['check']
+        severity = rule.get('severity', 'error')
+        max_rate = rule.get('max_rate', default_max_rate(rule))
+        if check not in ('required', 'nulls', 'unique') and rule['column'] not in present:
+            rows.append([dataset, check, rule['column'], severity, n, 0, 0.0, max_rate, 'skipped', "column not present"])
+            continue
+        for name, violations, detail in CHECKS[check](frame, rule, n):
+            rate = violations / n if n else 0.0
+            failed = violations > 0 and (rate > max_rate or check == 'required')
+            status = ('fail' if severity == 'error' else 'warn') if failed else 'pass'
+            rows.append([dataset, check, name, severity, n, violations, round(rate, 6), max_rate, status, detail])
+    return pd.DataFrame(rows, columns=REPORT_COLUMNS)
+
+def write_report(report, path=REPORT_PATH):
+    """Replace this dataset's rows in the shared report, keeping the other datasets' latest results"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    datasets = set(report['dataset'])
+    if path.exists():
+        previous = pd.read_csv(path, keep_default_na=False)
+        report = pd.concat([previous[~previous['dataset'].isin(datasets)], report], ignore_index=True)
+    report.to_csv(path, index=False)
+
+def print_report(report, seconds=None):
+    for dataset, rows in report.groupby('dataset', sort=False):
+        failed, warned = (rows['status'] == 'fail').sum(), (rows['status'] == 'warn').sum()
+        timing = f" in {seconds:.2f}s" if seconds is not None else ""
+        mark = "❌" if failed else "⚠" if warned else "✅"
+        print(f"{mark} Validated {dataset}: {len(rows)} checks over {int(rows['rows'].iloc[0]):,} rows{timing} "
+              f"({failed} failed, {warned} warnings)")
+        for row in rows[rows['status'].isin(['fail', 'warn'])].itertuples():
+            print(f"  {'❌' if row.status == 'fail' else '⚠'} {row.check} {row.column}: {row.detail or f'{row.violations:,} rows'}")
+
+def require_valid(dataset, frame):
+    """Validate a freshly loaded dataset and record the report; exit with status 1 on error-level
+    violations (unless [validation] enforce is off) so downstream stages never see the data"""
+    if not settings.getboolean('validation', 'enabled'):
+        return
+    start = time.perf_counter()
+    report = validate(dataset, frame)
+    seconds = time.perf_counter() - start
+    write_report(report)
+    print_report(report, seconds)
+    if (report['status'] == 'fail').any():
+        if settings.getboolean('validation', 'enforce'):
+            print(f"❌ {dataset} data failed validation; fix the input or the rules (report: {REPORT_PATH})")
+            raise SystemExit(1)
+        print("⚠ Continuing anyway ([validation] enforce = false)")
+
+def load_raw(dataset):
+    """A dataset's input files, loaded the way its stage loads them (None when there are none)"""
+    if dataset == 'nfhs':
+        from clean_data import read_nfhs
+        files = sorted((DATA_DIR/"nfhs").glob("*.csv"))
+        return read_nfhs(files) if files else None
+    if dataset == 'tweets':
+        from tweet_store import read_tweet_csvs
+        files = (sorted((DATA_DIR/"twitter").glob("*.csv"))
+                 + sorted(get_path('paths', 'tweets_collected').glob("tweets_*.csv")))
+        return read_tweet_csvs(files) if files else None
+    files = sorted((DATA_DIR/"trends").glob("*.csv"))
+    return pd.concat([pd.read_csv(f) for f in files], ignore_index=True) if files else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check input data against the validation rules without running any stage")
+    parser.add_argument("datasets", nargs="*", metavar="DATASET",
+                        help=f"Datasets to check (default: all of {', '.join(RULES)})")
+    args = parser.parse_args()
+    unknown = [d for d in args.datasets if d not in RULES]
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(unknown)} (choose from {', '.join(RULES)})")
+
+    reports = []
+    for dataset in args.datasets or list(RULES):
+        frame = load_raw(dataset)
+        if frame is None:
+            print(f"⚠ No {dataset} data files found")
+            continue
+        start = time.perf_counter()
+        report = validate(dataset, frame)
+        print_report(report, time.perf_counter() - start)
+        write_report(report)
+        reports.append(report)
+    print(f"📊 Report: {REPORT_PATH}")
+    sys.exit(1 if any((r['status'] == 'fail').any() for r in reports) else 0)
@@ -0,0 +1,173 @@
+"""
+Feature Importance for Vaccine Hesitancy Research
+One importance table for the hesitancy Logit, read by the reports, charts,
+dashboard and manuscript. Each design column gets its coefficient per SD of the
+column and its Wald z; each source feature (all dummies of a categorical
+together) gets a joint Wald chi-square and the deviance increase when it is left
+out of the model. Respondents are collapsed to distinct design rows with
+binomial counts, and the leave-one-group-out refits are Newton iterations on
+that small weighted design, warm-started from the base coefficients and run in
+parallel across feature groups
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS, get_workers
+from model_track import pattern_ids
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+stats = lazy_import("scipy.stats")
+
+OUTR = OUTPUTS/"reports"
+IMPORTANCE_PATH = OUTR/"feature_importance.csv"
+
+# Newton iterations per refit; warm-started refits usually converge in a handful
+MAX_ITER = 50
+TOL = 1e-10
+
+# Compressed design and base fit, set once per refit worker
+_SHARED = {}
+
+def expit(x):
+    return 1 / (1 + np.exp(-x))
+
+def feature_groups(X):
+    """Design columns per source feature (the dummies of a categorical form one group); the
+    constant is left out"""
+    features = X.attrs.get('features') or [c for c in X.columns if c != 'const']
+    groups = {}
+    for col in X.columns:
+        if col == 'const':
+            continue
+        owner = max((f for f in features if col == f or col.startswith(f + "_")), key=len, default=col)
+        groups.setdefault(owner, []).append(col)
+    return groups
+
+def compress_design(X, y):
+    """Distinct design rows with their respondent and hesitant counts"""
+    Xv = X.to_numpy(dtype=float)
+    key, first = pattern_ids(Xv)
+    trials = np.bincount(key, minlength=len(first)).astype(float)
+    successes = np.bincount(key, weights=np.asarray(y, dtype=float), minlength=len(first))
+    return Xv[first], trials, successes
+
+def deviance(eta, trials, successes):
+    """Binomial deviance (-2 log-likelihood) of the linear predictors"""
+    return 2 * float(np.sum(trials * np.logaddexp(0, eta) - successes * eta))
+
+def information(Xp, trials, p, penalty):
+    """Observed information of the (ridge-penalized) logistic likelihood"""
+    return (Xp * (trials * p * (1 - p))[:, None]).T @ Xp + np.diag(penalty)
+
+def newton(Xp, trials, successes, start, penalty):
+    """Newton-Raphson with step halving for the logistic model with a ridge penalty per column;
+    returns (coefficients, deviance, iterations)"""
+    beta = np.array(start, dtype=float)
+    eta = Xp @ beta
+    objective = deviance(eta, trials, successes) + penalty @ beta ** 2
+    for iteration in range(1, MAX_ITER + 1):
+        p = expit(eta)
+        gradient = Xp.T @ (successes - trials * p) - penalty * beta
+        try:
+            step = np.linalg.solve(information(Xp, trials, p, penalty), gradient)
+        except np.linalg.LinAlgError:
+            step = np.linalg.lstsq(information(Xp, trials, p, penalty), gradient, rcond=None)[0]
+        t = 1.0
+        while True:
+            candidate = beta + t * step
+            eta_c = Xp @ candidate
+            objective_c = deviance(eta_c, trials, successes) + penalty @ candidate ** 2
+            if objective_c <= objective or t < 1e-6:
+                break
+            t /= 2
+        beta, eta, change, objective = candidate, eta_c, objective - objective_c, objective_c
+        if change < TOL * (abs(objective) + 1):
+            break
+    return beta, deviance(eta, trials, successes), iteration
+
+def _init_worker(shared):
+    """Receive the compressed design and base fit once per worker"""
+    _SHARED.update(shared)
+
+def _refit_without(group, drop):
+    """Refit with one feature group's columns removed, starting from the base coefficients"""
+    Xp, trials, successes = _SHARED['Xp'], _SHARED['trials'], _SHARED['successes']
+    keep = np.ones(Xp.shape[1], dtype=bool)
+    keep[drop] = False
+    _, dev, iterations = newton(Xp[:, keep], trials, successes, _SHARED['params'][keep], _SHARED['penalty'][keep])
+    return group, dev, iterations
+
+def compute_importance(X, y, coefficients, alpha=0.0, workers=None):
+    """Importance table for a fitted Logit of y on design X: per-term standardized coefficients
+    and Wald tests, per-feature joint Wald and leave-one-group-out deviance changes. alpha is the
+    per-respondent ridge penalty of a penalized fit (0 for maximum likelihood)"""
+    X = X.astype(float)
+    columns = list(X.columns)
+    groups = feature_groups(X)
+    Xp, trials, successes = compress_design(X, y)
+    n = trials.sum()
+    penalty = np.where(np.array(columns) == 'const', 0.0, alpha * n)
+
+    # Polish the base fit on the compressed design so the base and the refits share one optimizer
+    start = pd.Series(coefficients).reindex(columns).fillna(0.0).to_numpy(dtype=float)
+    params, base_deviance, _ = newton(Xp, trials, successes, start, penalty)
+    cov = np.linalg.pinv(information(Xp, trials, expit(Xp @ params), penalty))
+    se = np.sqrt(np.diag(cov))
+    mean = trials @ Xp / n
+    sd = np.sqrt(trials @ (Xp - mean) ** 2 / n)
+
+    index = {c: i for i, c in enumerate(columns)}
+    drops = {g: [index[c] for c in cols] for g, cols in groups.items()}
+    shared = {'Xp': Xp, 'trials': trials, 'successes': successes, 'params': params, 'penalty': penalty}
+    workers = workers or get_workers('importance') or min(len(drops), os.cpu_count() or 1)
+    if workers == 1:
+        _init_worker(shared)
+        refits = [_refit_without(g, d) for g, d in drops.items()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as pool:
+            refits = list(pool.map(_refit_without, drops.keys(), drops.values()))
+
+    by_feature = {}
+    for group, dev, _ in refits:
+        idx = drops[group]
+        b = params[idx]
+        wald = float(b @ np.linalg.pinv(cov[np.ix_(idx, idx)]) @ b)
+        change = max(dev - base_deviance, 0.0)
+        by_feature[group] = {
+            'feature_df': len(idx),
+            'feature_wald_chi2': wald,
+            'feature_wald_p': stats.chi2.sf(wald, len(idx)),
+            'deviance_change': change,
+            'deviance_p': stats.chi2.sf(change, len(idx))
+        }
+    features = pd.DataFrame.from_dict(by_feature, orient='index')
+    features['rank'] = features['deviance_change'].rank(ascending=False, method='min').astype(int)
+
+    terms = [c for c in columns if c != 'const']
+    owner = {c: g for g, cols in groups.items() for c in cols}
+    pos = [index[c] for c in terms]
+    table = pd.DataFrame({
+        'feature': [owner[c] for c in terms],
+        'term': terms,
+        'coefficient': params[pos],
+        'std_coefficient': params[pos] * sd[pos],
+        'odds_ratio': np.exp(params[pos]),
+        'se': se[pos],
+        'wald_z': params[pos] / se[pos],
+        'p_value': 2 * stats.norm.sf(np.abs(params[pos] / se[pos]))
+    }).join(features, on='feature')
+    table['order'] = -table['std_coefficient'].abs()
+    table = table.sort_values(['rank', 'order']).drop(columns='order').reset_index(drop=True)
+    table.attrs['base_deviance'] = base_deviance
+    return table
+
+def write_importance(table, path=IMPORTANCE_PATH):
+    """Save the importance table and print the features in order"""
+    table.to_csv(path, index=False)
+    print(f"✅ Feature importance saved to reports/{path.name} (base deviance {table.attrs.get('base_deviance', float('nan')):.1f})")
+    for _, row in table.drop_duplicates('feature').iterrows():
+        print(f"  {row['rank']}. {row['feature']}: deviance +{row['deviance_change']:.2f} "
+              f"on {row['feature_df']} df (p={row['deviance_p']:.3g}), Wald χ² {row['feature_wald_chi2']:.2f}")
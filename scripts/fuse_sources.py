@@ -0,0 +1,290 @@
+"""
+Source Fusion for Vaccine Hesitancy Research
+Aligns NFHS hesitancy, tweet sentiment and Google Trends search interest on
+(state, period) keys as dense state x period arrays, computes lagged
+cross-correlations between the time series, correlates them with the NFHS
+cross-section across states, and writes a long panel table
+"""
+
+import argparse
+import re
+import time
+import warnings
+
+from lazy_imports import lazy_import
+from pipeline_config import DATA_DIR, OUTPUTS, settings, get_int
+from nfhs_store import NFHSStore, STORE_PATH as NFHS_STORE_PATH
+from tweet_store import TweetStore, STORE_PATH as TWEET_STORE_PATH
+from geo_resolver import GeoResolver, GAZETTEER_PATH, STATE_CODES
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+TABS = OUTPUTS/"tables"
+OUTR = OUTPUTS/"reports"
+PANEL_PATH = TABS/"fusion_panel.csv"
+CORRELATIONS_PATH = OUTR/"fusion_cross_correlations.csv"
+
+PERIODS = ['day', 'week', 'month']
+
+# Time series correlated at leads and lags; positive lags mean the second follows the first
+PAIRS = [('search_interest', 'sentiment')]
+# NFHS hesitancy is one cross-section with no time axis, so it is correlated once, across states,
+# with each state's mean of the other series
+STATE_PAIRS = [('search_interest', 'hesitancy_rate'), ('sentiment', 'hesitancy_rate')]
+
+def period_numbers(days, period):
+    """Period index for day numbers (days since 1970-01-01); weeks start on Monday"""
+    days = np.asarray(days, dtype=np.int64)
+    if period == 'day':
+        return days
+    if period == 'week':
+        # 1970-01-01 was a Thursday
+        return (days + 3) // 7
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+def period_starts(periods, period):
+    """First day of each period as YYYY-MM-DD strings"""
+    periods = np.asarray(periods, dtype=np.int64)
+    if period == 'day':
+        starts = periods.astype('datetime64[D]')
+    elif period == 'week':
+        starts = (periods * 7 - 3).astype('datetime64[D]')
+    else:
+        starts = periods.astype('datetime64[M]').astype('datetime64[D]')
+    return np.datetime_as_string(starts)
+
+def term_column(term):
+    """'COVID vaccine booking' -> 'search_covid_vaccine_booking'"""
+    return "search_" + re.sub(r'[^a-z0-9]+', '_', str(term).lower()).strip('_')
+
+def state_rows(names, state_index):
+    """Grid row of each state name (-1 for None), looked up once per distinct name"""
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+    return np.array([state_index[s] for s in uniques] + [-1], dtype=np.int64)[codes]
+
+def grid_mean(cells, values, shape):
+    """Mean of values per flattened (state, period) cell, NaN where a cell has none"""
+    size = shape[0] * shape[1]
+    count = np.bincount(cells, minlength=size)
+    total = np.bincount(cells, weights=values, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (total / count).reshape(shape), count.reshape(shape)
+
+def load_tweets():
+    """(state names, days, sentiment) for tweets resolved to a state, or None"""
+    if not TWEET_STORE_PATH.exists():
+        print("⚠ Tweet store not found; run: python vh.py sentiment")
+        return None
+    store = TweetStore.open()
+    if 'state' not in store.columns:
+        print("⚠ Tweets have not been resolved to states; sentiment is left out of the panel")
+        return None
+    codes, names = store.codes('state')
+    days = store.days()
+    keep = (codes >= 0) & (days >= 0)
+    return np.array(names, dtype=object)[codes[keep]], days[keep], store.scores()[keep]
+
+def load_trends(resolver):
+    """Trends rows as (state or None for national, days, term, value), or None"""
+    files = sorted((DATA_DIR/"trends").glob("*.csv"))
+    if not files:
+        print("⚠ No trends data found; run: python vh.py extract")
+        return None
+    trends = pd.concat([pd.read_csv(f, usecols=['date', 'search_term', 'trend_value', 'region'])
+                        for f in files], ignore_index=True)
+    days = pd.to_datetime(trends['date'], errors='coerce').to_numpy('datetime64[D]')
+    keep = ~np.isnat(days) & trends['trend_value'].notna().to_numpy()
+    trends = trends[keep]
+
+    # Regions are few and repeat on every row, so each is resolved once; 'India' stays national
+    if resolver is None:
+        states = np.full(len(trends), None, dtype=object)
+    else:
+        places = resolver.resolve(trends['region'].to_numpy(dtype=object))
+        states = np.where(places['match'].to_numpy(dtype=object) == 'country', None,
+                          places['state'].to_numpy(dtype=object))
+    return (states, days[keep].astype(np.int64), trends['search_term'].to_numpy(dtype=object),
+            trends['trend_value'].to_numpy(dtype=np.float64))
+
+def load_survey():
+    """Respondents and hesitancy rate per NFHS state, or None"""
+    if not (NFHS_STORE_PATH/"meta.json").exists():
+        print("⚠ NFHS store not found; run: python vh.py clean")
+        return None
+    store = NFHSStore.open()
+    if 'state' not in store:
+        return None
+    codes = store.column('state')
+    valid = codes >= 0
+    n_states = len(store.categories['state'])
+    respondents = np.bincount(codes[valid], minlength=n_states)
+    hesitant = np.bincount(codes[valid], weights=store.outcome[valid], minlength=n_states)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = hesitant / respondents
+    return pd.DataFrame({'state': store.categories['state'], 'respondents': respondents,
+                         'hesitancy_rate': rate})
+
+def build_panel(tweets, trends, survey, period):
+    """Dense state x period arrays for every measure, keyed by the union of states and periods seen"""
+    states = set()
+    if tweets is not None:
+        states.update(tweets[0])
+    if trends is not None:
+        states.update(s for s in pd.unique(trends[0]) if s is not None)
+    if survey is not None:
+        states.update(survey['state'])
+    states = sorted(states)
+    state_index = {s: i for i, s in enumerate(states)}
+
+    periods = [period_numbers(src[1], period) for src in (tweets, trends) if src is not None]
+    if not states or not periods or not any(len(p) for p in periods):
+        return None
+    first = min(p.min() for p in periods if len(p))
+    last = max(p.max() for p in periods if len(p))
+    shape = (len(states), int(last - first + 1))
+    grids = {}
+
+    if tweets is not None:
+        rows = state_rows(tweets[0], state_index)
+        cells = rows * shape[1] + (period_numbers(tweets[1], period) - first)
+        grids['sentiment'], grids['tweets'] = grid_mean(cells, tweets[2], shape)
+
+    if trends is not None:
+        region, days, terms, values = trends
+        cols = period_numbers(days, period) - first
+        rows = state_rows(region, state_index)
+        national = rows < 0
+        term_codes, term_names = pd.factorize(terms)
+        search = []
+        for t, term in enumerate(term_names):
+            is_term = term_codes == t
+            # National series fill in for every state without its own series for the term
+            nat = is_term & national
+            nat_mean, _ = grid_mean(cols[nat], values[nat], (1, shape[1]))
+            grid = np.broadcast_to(nat_mean, shape).copy()
+            local = is_term & ~national
+            if local.any():
+                local_mean, local_count = grid_mean(rows[local] * shape[1] + cols[local], values[local], shape)
+                has_local = local_count.sum(axis=1) > 0
+                grid[has_local] = local_mean[has_local]
+            grids[term_column(term)] = grid
+            search.append(grid)
+        with np.errstate(invalid='ignore'):
+            stacked = np.stack(search)
+            observed = np.isfinite(stacked).sum(axis=0)
+            grids['search_interest'] = np.where(observed > 0, np.nansum(stacked, axis=0) / np.maximum(observed, 1),
+                                                np.nan)
+
+    if survey is not None:
+        # NFHS is one cross-section, so each state's rate holds for every period
+        by_state = survey.set_index('state').reindex(states)
+        grids['respondents'] = np.broadcast_to(by_state['respondents'].fillna(0).to_numpy()[:, None], shape)
+        grids['hesitancy_rate'] = np.broadcast_to(by_state['hesitancy_rate'].to_numpy(dtype=np.float64)[:, None], shape)
+
+    return states, np.arange(first, last + 1), grids
+
+def lagged_correlations(x, y, max_lag):
+    """Pearson r of x[s, t] with y[s, t + lag], pooled over states, for lag in -max_lag..max_lag"""
+    n_periods = x.shape[1]
+    rows = []
+    for lag in range(-max_lag, max_lag + 1):
+        if abs(lag) >= n_periods:
+            continue
+        a = x[:, max(0, -lag):n_periods - max(0, lag)]
+        b = y[:, max(0, lag):n_periods - max(0, -lag)]
+        both = np.isfinite(a) & np.isfinite(b)
+        a, b = a[both], b[both]
+        if len(a):
+            a, b = a - a.mean(), b - b.mean()
+        denom = np.sqrt((a * a).sum() * (b * b).sum())
+        rows.append({'lag': lag, 'r': (a * b).sum() / denom if denom > 0 else np.nan, 'n': int(both.sum())})
+    return rows
+
+def state_correlation(x, y):
+    """Pearson r across states of each state's mean of x over periods with the state's y (lag-free)"""
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        # States with no observed period have an all-NaN row
+        warnings.simplefilter("ignore", RuntimeWarning)
+        a, b = np.nanmean(x, axis=1), np.nanmean(y, axis=1)
+    both = np.isfinite(a) & np.isfinite(b)
+    a, b = a[both], b[both]
+    # A series with the same mean in every state (e.g. national-only trends) has no r
+    flat = any(np.ptp(v) <= 1e-9 * np.abs(v).max() for v in (a, b)) if both.sum() > 1 else True
+    a, b = a - a.mean(), b - b.mean()
+    r = np.nan if flat else (a * b).sum() / np.sqrt((a * a).sum() * (b * b).sum())
+    return {'lag': np.nan, 'r': r, 'n': int(both.sum())}
+
+def panel_frame(states, periods, grids, period):
+    """Long (state, period) table of the grids, keeping cells where any measure was observed"""
+    n_states, n_periods = len(states), len(periods)
+    frame = pd.DataFrame({
+        'state': np.repeat(np.array(states, dtype=object), n_periods),
+        'state_code': np.repeat(np.array([STATE_CODES.get(s) for s in states], dtype=object), n_periods),
+        'period': np.tile(period_starts(periods, period), n_states),
+    })
+    for name, grid in grids.items():
+        frame[name] = np.asarray(grid).ravel()
+    if 'tweets' in frame:
+        frame['tweets'] = frame['tweets'].astype(np.int64)
+    if 'respondents' in frame:
+        frame['respondents'] = frame['respondents'].astype(np.int64)
+    measures = [c for c in ('sentiment', 'search_interest') if c in frame]
+    frame = frame[frame[measures].notna().any(axis=1)] if measures else frame
+    return frame.round(4)
+
+def fuse(period, max_lag):
+    start = time.perf_counter()
+    resolver = GeoResolver.load() if GAZETTEER_PATH.exists() else None
+    if resolver is None:
+        print(f"⚠ Gazetteer not found at {GAZETTEER_PATH}; trends are treated as national")
+    tweets = load_tweets()
+    trends = load_trends(resolver)
+    survey = load_survey()
+
+    built = build_panel(tweets, trends, survey, period)
+    if built is None:
+        print("⚠ No dated tweets or trends to align; nothing to fuse")
+        return
+    states, periods, grids = built
+
+    panel = panel_frame(states, periods, grids, period)
+    TABS.mkdir(parents=True, exist_ok=True)
+    panel.to_csv(PANEL_PATH, index=False)
+
+    correlations = []
+    for x, y in PAIRS:
+        if x in grids and y in grids:
+            for row in lagged_correlations(np.asarray(grids[x]), np.asarray(grids[y]), max_lag):
+                correlations.append({'x': x, 'y': y, **row})
+    for x, y in STATE_PAIRS:
+        if x in grids and y in grids:
+            correlations.append({'x': x, 'y': y, **state_correlation(np.asarray(grids[x]), np.asarray(grids[y]))})
+    correlations = pd.DataFrame(correlations, columns=['x', 'y', 'lag', 'r', 'n'])
+    OUTR.mkdir(parents=True, exist_ok=True)
+    # Adding 0.0 turns the -0.0 left by rounding tiny negative r into 0.0
+    correlations['r'] = correlations['r'].round(4) + 0.0
+    correlations['lag'] = correlations['lag'].astype('Int64')
+    correlations.to_csv(CORRELATIONS_PATH, index=False)
+
+    print(f"✅ Fusion panel saved: {len(panel):,} rows ({len(states)} states x {len(periods)} {period}s) "
+          f"in {time.perf_counter() - start:.2f}s")
+    for (x, y), group in correlations.groupby(['x', 'y'], sort=False):
+        if group['lag'].isna().all():
+            row = group.iloc[0]
+            if pd.isna(row['r']):
+                print(f"⚠ {x} vs {y}: no correlation across states (one series does not vary between states)")
+            else:
+                print(f"📊 {x} vs {y}: r = {row['r']:.3f} across states (n = {int(row['n'])} states)")
+        elif group['r'].notna().any():
+            best = group.loc[group['r'].abs().idxmax()]
+            print(f"📊 {x} vs {y}: strongest r = {best['r']:.3f} at lag {int(best['lag']):+d} (n = {int(best['n']):,})")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Align survey, tweet and trends data on (state, period) keys")
+    ap.add_argument("--period", choices=PERIODS, default=settings.get('fusion', 'period'),
+                    help="Panel period (default from vh.ini [fusion])")
+    ap.add_argument("--max-lag", type=int, default=get_int('fusion', 'max_lag'),
+                    help="Largest lag, in periods, for the cross-correlations")
+    args = ap.parse_args()
+    fuse(args.period, args.max_lag)
@@ -3,27 +3,58 @@ Vaccine Hesitancy Research Manuscript Generator
 Creates a comprehensive research manuscript from analysis results
 """
 
-import pandas as pd
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import argparse
+import hashlib
 import json
+import os
+import re
+import shutil
+import subprocess
+import time
 from datetime import datetime
 
-BASE = Path("projects/vaccine_hesitancy")
-OUTPUTS = BASE/"outputs"
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS, get_path, get_workers
+from manuscript_render import (load_template, markdown_table, fmt_count, fmt_percent,
+                               fmt_float, fmt_text, significance_stars)
+from analyze_factors import build_design_matrix, fit_logit_or_penalized, hesitancy_stats
+from feature_importance import IMPORTANCE_PATH, compute_importance
+from nfhs_store import NFHSStore, STORE_PATH, attach
+from search_trends import LATEST_PATH as TRENDS_LATEST_PATH, SPIKES_PATH as TRENDS_SPIKES_PATH, WINDOW, SPIKE_Z
+from sentiment_backends import BACKENDS
+from small_area import ESTIMATES_PATH as SMALL_AREA_PATH, INTERVAL, estimate_frame, wilson_interval
+from tweet_store import TweetStore, STORE_PATH as TWEET_STORE_PATH
+
+pd = lazy_import("pandas")
+
 REPORTS = OUTPUTS/"reports"
 TABLES = OUTPUTS/"tables"
+SUBGROUP_REPORTS = REPORTS/"subgroups"
+EXPORT_MANIFEST = get_path('cache', 'export_manifest')
+
+# Extra pandoc arguments per export format
+EXPORT_FORMATS = {
+    'docx': [],
+    'html': ['--standalone'],
+    'pdf': [],
+}
+
+# Batch settings for workers: column, store location and national results, all small
+_BATCH = {}
 
 def load_analysis_results():
     """Load all analysis results for manuscript generation"""
     results = {}
 
     try:
-        # Load NFHS data
-        nfhs_df = pd.read_csv(TABLES/"nfhs_clean.csv")
+        # NFHS headline figures come straight from the store's columns
+        store = attach()
         results['nfhs_data'] = {
-            'sample_size': len(nfhs_df),
-            'hesitancy_rate': nfhs_df['vaccine_hesitant'].mean(),
-            'states': nfhs_df['state'].nunique() if 'state' in nfhs_df.columns else 0
+            'sample_size': store.n_rows,
+            'hesitancy_rate': store.outcome.mean(),
+            'states': len(store.categories['state']) if 'state' in store.categories else 0
         }
 
         # Load summary statistics
@@ -38,9 +69,22 @@ def load_analysis_results():
 
         # Load odds ratios
         if (REPORTS/"logit_odds_ratios.csv").exists():
-            odds_df = pd.read_csv(REPORTS/"logit_odds_ratios.csv")
+            odds_df = pd.read_csv(REPORTS/"logit_odds_ratios.csv", index_col=0)
             results['odds_ratios'] = odds_df
 
+        # Per-feature importance from the same fit
+        if IMPORTANCE_PATH.exists():
+            results['importance'] = pd.read_csv(IMPORTANCE_PATH)
+
+        # Shrunken national, state and district estimates with model-based intervals
+        if SMALL_AREA_PATH.exists():
+            results['small_area'] = pd.read_csv(SMALL_AREA_PATH)
+
+        # Load group-wise statistics for the detailed tables
+
+        if (REPORTS/"hesitancy_by_education.csv").exists():
+            results['education_stats'] = pd.read_csv(REPORTS/"hesitancy_by_education.csv")
+
         # Load Twitter sentiment
         if (TABLES/"twitter_sentiment_timeseries.csv").exists():
             sentiment_df = pd.read_csv(TABLES/"twitter_sentiment_timeseries.csv")
@@ -49,6 +93,27 @@ def load_analysis_results():
                 'total_tweets': sentiment_df['sentiment_count'].sum() if 'sentiment_count' in sentiment_df.columns else 0
             }
 
+        # The backend and thresholds that scored the tweets, for the methods section
+        if TWEET_STORE_PATH.exists():
+            tweets = TweetStore.open(TWEET_STORE_PATH)
+            label_counts = tweets.label_counts()
+            results['sentiment_scoring'] = {'backend': tweets.backend, 'thresholds': tweets.thresholds,
+                                            'label_shares': (label_counts / max(label_counts.sum(), 1)).to_dict()}
+
+        if (TABLES/"twitter_sentiment_by_language.csv").exists():
+            results['languages'] = pd.read_csv(TABLES/"twitter_sentiment_by_language.csv")
+
+        if (TABLES/"twitter_sentiment_by_state.csv").exists():
+            results['state_sentiment'] = pd.read_csv(TABLES/"twitter_sentiment_by_state.csv")
+
+        # Load search trend statistics
+        if TRENDS_LATEST_PATH.exists():
+            spikes = pd.read_csv(TRENDS_SPIKES_PATH) if TRENDS_SPIKES_PATH.exists() else pd.DataFrame(columns=['term'])
+            results['search_trends'] = {
+                'latest': pd.read_csv(TRENDS_LATEST_PATH),
+                'spike_days': spikes['term'].value_counts()
+            }
+
     except Exception as e:
         print(f"Warning: Could not load some analysis results: {e}")
 
@@ -63,409 +128,376 @@ def generate_manuscript(results):
     hesitancy_rate = nfhs_data.get('hesitancy_rate', 0)
     states = nfhs_data.get('states', 0)
 
+    # Intervals come from the small-area model when it was fitted, else a Wilson interval
+    small_area = results.get('small_area')
+    if small_area is not None and (small_area['level'] == 'national').any():
+        national = small_area[small_area['level'] == 'national'].iloc[0]
+        hesitancy_ci = (national['ci_lower'], national['ci_upper'])
+        state_rates = small_area.loc[small_area['level'] == 'state', 'estimate']
+    else:
+        hesitancy_ci = wilson_interval(hesitancy_rate, max(sample_size, 1))
+        state_rates = pd.Series([hesitancy_rate])
+
     twitter_data = results.get('twitter_sentiment', {})
     total_tweets = twitter_data.get('total_tweets', 0)
     avg_sentiment = twitter_data.get('avg_sentiment', 0)
 
-    # Get sentiment distribution safely
-    positive_pct = 28.0  # Default values based on sample data
-    neutral_pct = 49.8
-    negative_pct = 22.2
-
-    # Generate regression results text
-    regression_text = ""
-    odds_results = results.get('odds_ratios')
-    if odds_results is not None and len(odds_results) > 0:
-        significant_factors = odds_results[odds_results['p_value'] < 0.05].sort_values('odds_ratio', ascending=False)
-        for idx, row in significant_factors.iterrows():
-            regression_text += f"**{idx}:** OR = {row['odds_ratio']:.3f} (95% CI: {row['conf_int_lower']:.3f}-{row['conf_int_upper']:.3f})\n"
+    # Shares of posts per label (fractions), from the same store that set the thresholds
+    scoring = results.get('sentiment_scoring', {})
+    label_shares = scoring.get('label_shares', {})
+    positive_pct, neutral_pct, negative_pct = (label_shares.get(label, 0.0) for label in ('positive', 'neutral', 'negative'))
+    backend = BACKENDS.get(scoring.get('backend'), BACKENDS['textblob'])
+    negative_threshold, positive_threshold = scoring.get('thresholds', backend.default_thresholds)
+
+    languages = results.get('languages')
+    if languages is not None and len(languages):
+        shares = ', '.join(f"{name} {share:.1%}" for name, share in zip(languages['name'], languages['share']))
+        language_routing = (f"Each post was assigned a language from its script and, for Latin script, Hindi marker words; "
+                            f"Hindi in Devanagari and Romanized Hindi (transliterated to Devanagari) were scored with a "
+                            f"Hindi valence lexicon, other posts as described above ({shares})")
     else:
-        regression_text = "Regression analysis results will be presented in the detailed results section."
+        language_routing = "All posts were scored as English text"
+
+    search_trends = results.get('search_trends', {})
+    trend_terms = len(search_trends['latest']) if search_trends else 0
+    trend_spikes = int(search_trends['spike_days'].sum()) if search_trends else 0
 
     # Generate detailed tables
     tables_text = generate_detailed_tables(results)
 
-    manuscript = f"""
-# Socio-Demographic Determinants and Digital Sentiments Behind Vaccine Hesitancy in India (2015–2025)
-
-**Authors:** Dr. Siddalingaiah H S, MD, MPH
-**Affiliation:** Professor and Head, Department of Community Medicine, Shridevi Institute of Medical Sciences and Research Hospital (SIMSRH), Tumkur, Karnataka, India
-**Email:** hssling@yahoo.com
-**Phone:** +91-8941087719
-
-**Date:** {datetime.now().strftime('%B %Y')}
-
----
-
-## Abstract
-
-**Background:** Vaccine hesitancy represents a complex public health challenge in India, influenced by socio-demographic factors and digital media narratives. This study examines the interplay between traditional survey data and social media sentiment to understand vaccine acceptance patterns.
-
-**Methods:** A mixed-methods approach was employed using the National Family Health Survey (NFHS-5) data from {sample_size:,} respondents across {states} Indian states, complemented by sentiment analysis of {total_tweets:,} social media posts. Logistic regression models identified socio-demographic predictors, while TextBlob analysis quantified digital sentiment patterns.
-
-**Results:** The analysis revealed a vaccine hesitancy rate of {hesitancy_rate:.1%} (95% CI: {hesitancy_rate-.02:.1%}-{hesitancy_rate+.02:.1%}). Significant predictors included education level (OR = 0.45 for higher education), rural residence (OR = 1.67), and wealth index. Digital sentiment analysis showed predominantly neutral-to-positive narratives (average score: {avg_sentiment:.3f}).
-
-**Conclusions:** Vaccine hesitancy in India demonstrates significant socio-demographic gradients and digital media influence. Multi-level interventions targeting education, rural outreach, and digital literacy are recommended to improve vaccination coverage and public health outcomes.
-
-**Keywords:** Vaccine hesitancy, India, NFHS-5, sentiment analysis, logistic regression, public health, digital media
-
----
-
-## Introduction
-
-### Background
-
-Vaccine hesitancy has been identified by the World Health Organization as one of the top ten threats to global health [1]. In India, with its diverse population of over 1.4 billion and complex healthcare delivery system, understanding vaccine acceptance patterns is crucial for maintaining immunization coverage and preventing disease outbreaks [2].
-
-The COVID-19 pandemic amplified the importance of vaccine confidence, revealing significant variations in acceptance across different population segments [3]. Despite India's success in achieving high childhood immunization rates through the Universal Immunization Programme, adult vaccination coverage, particularly for newer vaccines, remains suboptimal [4].
-
-### Literature Review
-
-Previous studies have identified several determinants of vaccine hesitancy globally:
-
-1. **Socio-demographic Factors:** Education, income, and urban/rural residence consistently emerge as significant predictors [5-7]
-2. **Information Sources:** Trust in healthcare providers and government sources positively influences acceptance [8]
-3. **Digital Media Influence:** Social media platforms both facilitate information dissemination and spread misinformation [9]
-4. **Cultural and Religious Factors:** Traditional beliefs and practices can impact vaccine acceptance [10]
-
-In the Indian context, studies have shown hesitancy rates ranging from 10-40% depending on the vaccine type and population studied [11-13]. The NFHS-5 provides an unprecedented opportunity to examine these patterns at a national scale.
-
-### Study Rationale and Objectives
-
-This study addresses critical gaps in understanding vaccine hesitancy in India by:
-
-1. **Integrating Multiple Data Sources:** Combining traditional survey data with digital sentiment analysis
-2. **Advanced Statistical Modeling:** Employing logistic regression to identify significant predictors
-3. **Digital Media Analysis:** Quantifying social media narratives and their potential influence
-4. **Evidence-Based Recommendations:** Providing actionable insights for public health interventions
-
-**Primary Objective:** To quantify socio-demographic correlates of vaccine hesitancy using large-scale survey data and digital sentiment analysis.
-
-**Secondary Objectives:**
-- Analyze spatial variations in hesitancy across Indian states
-- Examine temporal patterns in digital sentiment toward vaccines
-- Identify key predictors through multivariate statistical modeling
-- Develop targeted intervention strategies based on findings
-
----
-
-## Methods
-
-### Study Design
-
-This cross-sectional study employed a mixed-methods approach, integrating quantitative survey data analysis with qualitative digital sentiment assessment. The study period spanned from 2015 to 2025, capturing both pre- and post-COVID-19 vaccination dynamics.
-
-### Data Sources
-
-#### National Family Health Survey (NFHS-5)
-The NFHS-5, conducted between 2019-2021, represents the fifth round of India's flagship demographic and health survey program. This study utilized individual-level data from {states} states, providing a nationally representative sample of {sample_size:,} adults aged 18-65 years.
-
-**Key Variables:**
-- **Outcome Variable:** Vaccine hesitancy (binary: hesitant/not hesitant)
-- **Predictor Variables:** Age, gender, education, rural/urban residence, wealth index, religion, caste
-- **Health Indicators:** General health status, healthcare access, previous vaccination history
-
-#### Social Media Sentiment Data
-Twitter/X posts containing vaccine-related keywords were collected and analyzed.
-The dataset comprised {total_tweets:,} posts from verified Indian users, covering the period from 2021-2025.
-
-**Sentiment Analysis Methodology:**
-- **Text Preprocessing:** Removal of URLs, mentions, hashtags, and special characters
-- **Sentiment Scoring:** TextBlob polarity analysis (-1 to +1 scale)
-- **Categorization:** Positive (>0.1), Neutral (-0.1 to 0.1), Negative (<-0.1)
-- **Temporal Aggregation:** Monthly sentiment trends and state-wise variations
-
-### Statistical Analysis
-
-#### Descriptive Statistics
-Frequency distributions and summary statistics were calculated for all variables. Vaccine hesitancy rates were computed by socio-demographic characteristics and geographic regions.
-
-#### Bivariate Analysis
-Chi-square tests and t-tests were used to examine associations between predictor variables and vaccine hesitancy. Effect sizes were calculated using Cramer's V for categorical variables and Cohen's d for continuous variables.
-
-#### Multivariate Analysis
-Logistic regression models were constructed to identify independent predictors of vaccine hesitancy:
-
-**Model Specification:**
-- **Dependent Variable:** Vaccine hesitancy (1 = hesitant, 0 = not hesitant)
-- **Independent Variables:** Age, gender, education, rural/urban, wealth index, religion
-- **Model Building:** Stepwise backward elimination with p < 0.05 retention criterion
-- **Diagnostics:** Hosmer-Lemeshow goodness-of-fit test, multicollinearity assessment (VIF < 5)
-
-**Odds Ratios and Confidence Intervals:**
-All odds ratios were calculated with 95% confidence intervals. Statistical significance was set at p < 0.05.
-
-#### Digital Sentiment Analysis
-Time-series analysis of sentiment scores was conducted using moving averages and seasonal decomposition. State-wise sentiment variations were analyzed using ANOVA with post-hoc comparisons.
-
-### Ethical Considerations
-
-This study utilized publicly available, de-identified data from NFHS-5 and social media platforms. All analyses were conducted in accordance with data protection regulations and ethical guidelines for public health research.
-
----
-
-## Results
-
-### Sample Characteristics
-
-The final analytical sample consisted of {sample_size:,} individuals from {states} Indian states, representing approximately 70% of India's population. The demographic composition reflected national distributions with adequate representation across age groups, genders, and socio-economic strata.
-
-**Table 1: Socio-Demographic Characteristics of Study Sample**
-
-| Characteristic | Category | n | % | Hesitancy Rate |
-|---------------|----------|---|---|---------------|
-| **Gender** | Male | {sample_size//2:,} | 50.0 | {hesitancy_rate-.05:.1%} |
-| | Female | {sample_size//2:,} | 50.0 | {hesitancy_rate+.05:.1%} |
-| **Age Group** | 18-29 | {sample_size//4:,} | 25.0 | {hesitancy_rate+.1:.1%} |
-| | 30-44 | {sample_size//2:,} | 50.0 | {hesitancy_rate:.1%} |
-| | 45-65 | {sample_size//4:,} | 25.0 | {hesitancy_rate-.1:.1%} |
-| **Education** | No Education | {sample_size//5:,} | 20.0 | {hesitancy_rate+.15:.1%} |
-| | Primary | {sample_size//5:,} | 20.0 | {hesitancy_rate+.1:.1%} |
-| | Secondary | {sample_size//2:,} | 40.0 | {hesitancy_rate-.05:.1%} |
-| | Higher | {sample_size//5:,} | 20.0 | {hesitancy_rate-.15:.1%} |
-| **Residence** | Urban | {sample_size//2:,} | 50.0 | {hesitancy_rate-.1:.1%} |
-| | Rural | {sample_size//2:,} | 50.0 | {hesitancy_rate+.1:.1%} |
-
-### Vaccine Hesitancy Prevalence
-
-The overall vaccine hesitancy rate was {hesitancy_rate:.1%} (95% CI: {hesitancy_rate-.02:.1%}-{hesitancy_rate+.02:.1%}), indicating that approximately 3 in 10 Indian adults expressed some degree of vaccine hesitancy.
-
-#### State-wise Variation
-Significant variation was observed across states, with hesitancy rates ranging from {hesitancy_rate-.15:.1%} in progressive states to {hesitancy_rate+.15:.1%} in more conservative regions. This variation highlights the importance of localized public health strategies.
-
-#### Socio-Demographic Correlates
-**Education:** A clear inverse relationship was observed between education level and hesitancy, with university-educated individuals showing {hesitancy_rate-.15:.1%} hesitancy compared to {hesitancy_rate+.15:.1%} among those with no formal education.
-
-**Rural-Urban Divide:** Rural residents exhibited {hesitancy_rate+.1:.1%} hesitancy compared to {hesitancy_rate-.1:.1%} in urban areas, suggesting differential access to information and healthcare services.
-
-**Wealth Index:** Lower wealth quintiles showed progressively higher hesitancy rates, ranging from {hesitancy_rate-.1:.1%} in the highest quintile to {hesitancy_rate+.1:.1%} in the lowest quintile.
-
-### Digital Sentiment Analysis
-
-#### Overall Sentiment Patterns
-The social media analysis revealed a predominantly neutral-to-positive sentiment toward vaccines, with an average polarity score of {avg_sentiment:.3f}. The distribution showed:
-
-- **Positive Sentiment:** {positive_pct:.1%} of posts
-- **Neutral Sentiment:** {neutral_pct:.1%} of posts
-- **Negative Sentiment:** {negative_pct:.1%} of posts
-
-#### Temporal Trends
-Sentiment analysis revealed significant temporal variations corresponding to major vaccination campaigns and policy announcements. Peaks in positive sentiment coincided with government vaccination drives, while negative sentiment spikes were associated with reports of adverse events.
-
-#### Geographic Variations
-State-wise sentiment analysis showed regional differences, with southern and western states exhibiting more positive sentiment compared to northern and eastern regions.
-
-### Multivariate Analysis
-
-#### Logistic Regression Results
-The final multivariate model identified several significant predictors of vaccine hesitancy:
-
-{tables_text}
-
-**Model Performance:**
-- **Nagelkerke R²:** 0.23 (indicating moderate explanatory power)
-- **Hosmer-Lemeshow Test:** p = 0.45 (good model fit)
-- **Classification Accuracy:** 78.5%
-
-#### Key Predictors
-1. **Education Level:** Higher education was protective against hesitancy (OR = 0.45, 95% CI: 0.32-0.64)
-2. **Rural Residence:** Rural dwellers were more likely to be hesitant (OR = 1.67, 95% CI: 1.23-2.27)
-3. **Wealth Index:** Lower wealth quintiles showed increased hesitancy (OR = 1.34, 95% CI: 1.12-1.61)
-4. **Age:** Older adults were less likely to be hesitant (OR = 0.87 per decade, 95% CI: 0.79-0.96)
-
----
-
-## Discussion
-
-### Interpretation of Findings
-
-The vaccine hesitancy rate of {hesitancy_rate:.1%} observed in this study is consistent with previous estimates from India and falls within the global range of 20-40% reported in systematic reviews [14]. The socio-demographic gradients identified align with the social determinants of health framework, where education, economic status, and geographic location significantly influence health behaviors [15].
-
-#### Education as a Protective Factor
-The strong inverse relationship between education and hesitancy (OR = 0.45) underscores the critical role of health literacy in vaccine decision-making. This finding supports the implementation of educational interventions as a primary strategy for addressing hesitancy.
-
-#### Rural-Urban Disparities
-The elevated hesitancy in rural areas (OR = 1.67) may reflect differential access to healthcare information, lower health literacy, and stronger influence of traditional beliefs. This highlights the need for targeted rural outreach programs.
-
-#### Digital Media Influence
-The predominantly neutral-to-positive digital sentiment (average score: {avg_sentiment:.3f}) suggests that social media platforms serve as both information sources and potential vectors for misinformation. The temporal correlation with vaccination campaigns indicates that digital media can be leveraged for positive messaging.
-
-### Strengths and Limitations
-
-#### Strengths
-1. **Large Sample Size:** Nationally representative data from {sample_size:,} respondents
-2. **Mixed Methods:** Integration of quantitative survey data with qualitative digital analysis
-3. **Advanced Analytics:** Sophisticated statistical modeling with appropriate diagnostics
-4. **Policy Relevance:** Findings directly applicable to Indian public health policy
-
-#### Limitations
-1. **Cross-sectional Design:** Cannot establish causality or temporal relationships
-2. **Self-reported Data:** Potential social desirability bias in survey responses
-3. **Digital Sample:** Social media users may not represent the general population
-4. **Regional Focus:** Limited to {states} states, though nationally representative
-
-### Implications for Public Health Practice
-
-#### Targeted Interventions
-Based on the regression results, the following interventions are recommended:
-
-1. **Educational Programs:** Implement school and community-based health education focusing on vaccine science and benefits
-2. **Rural Outreach:** Develop mobile health units and community health worker programs for rural areas
-3. **Digital Literacy:** Launch campaigns to improve digital health literacy and combat misinformation
-4. **Economic Support:** Consider financial incentives or subsidies for low-income groups
-
-#### Policy Recommendations
-1. **Strengthen Health Communication:** Develop evidence-based messaging strategies
-2. **Enhance Surveillance:** Implement real-time monitoring of vaccine sentiment and hesitancy
-3. **Community Engagement:** Partner with local leaders and influencers for vaccine promotion
-4. **Research Investment:** Support longitudinal studies to track hesitancy trends
-
----
-
-## Conclusion
-
-This comprehensive analysis reveals that vaccine hesitancy in India is influenced by a complex interplay of socio-demographic factors and digital media narratives. The hesitancy rate of {hesitancy_rate:.1%} among adults indicates a significant public health challenge that requires multifaceted interventions.
-
-### Key Contributions
-1. **Quantified Socio-demographic Gradients:** Clear evidence of education, rural residence, and wealth as key determinants
-2. **Digital Media Insights:** Demonstrated the role of social media in shaping vaccine perceptions
-3. **Statistical Rigor:** Robust multivariate analysis identifying independent predictors
-4. **Policy-Relevant Findings:** Actionable recommendations for public health interventions
-
-### Future Directions
-1. **Longitudinal Studies:** Track changes in hesitancy over time
-2. **Intervention Evaluation:** Assess effectiveness of targeted programs
-3. **Qualitative Research:** Explore cultural and contextual factors in depth
-4. **Technology Integration:** Develop AI-powered tools for real-time sentiment monitoring
-
-The findings underscore the importance of addressing vaccine hesitancy through comprehensive, evidence-based strategies that consider both individual-level factors and broader social determinants of health.
-
----
-
-## References
-
-1. World Health Organization. (2019). Ten threats to global health in 2019. Geneva: WHO.
-2. Larson, H. J., et al. (2016). The state of vaccine confidence 2016: global insights through a 67-country survey. *The Lancet Infectious Diseases*, 16(6), 295-301.
-3. Sallam, M. (2021). COVID-19 vaccine hesitancy worldwide: a concise systematic review of vaccine acceptance rates. *Vaccines*, 9(2), 160.
-4. National Family Health Survey (NFHS-5). (2021). India Fact Sheet. Mumbai: International Institute for Population Sciences.
-5. Dubé, E., et al. (2013). Vaccine hesitancy: an overview. *Human Vaccines & Immunotherapeutics*, 9(8), 1763-1773.
-6. Kumar, D., et al. (2021). Vaccine hesitancy: understanding better to address better. *Israel Journal of Health Policy Research*, 10(1), 1-8.
-7. Razai, M. S., et al. (2021). Covid-19 vaccine hesitancy among ethnic minority groups. *BMJ*, 372, n513.
-8. Edwards, K. M., et al. (2016). Countering vaccine hesitancy. *Pediatrics*, 138(3), e20162146.
-9. Puri, N., et al. (2020). Social media and vaccine hesitancy: new updates for the era of COVID-19 and globalized infectious diseases. *Human Vaccines & Immunotherapeutics*, 16(11), 2586-2593.
-10. Cooper, S., et al. (2021). Vaccine hesitancy: a potential threat to the achievements of vaccination programmes in Africa. *Human Vaccines & Immunotherapeutics*, 17(3), 658-669.
-11. Dasgupta, P., et al. (2022). Vaccine hesitancy in India: a systematic review. *Journal of Public Health*, 1-12.
-12. Singh, A., et al. (2021). Vaccine hesitancy in India: lessons from the COVID-19 pandemic. *Indian Journal of Community Medicine*, 46(4), 596.
-13. Sharma, S., et al. (2022). Digital misinformation and vaccine hesitancy: A review of the current landscape in India. *Journal of Education and Health Promotion*, 11(1), 87.
-14. Troiano, G., & Nardi, A. (2021). Vaccine hesitancy in the era of COVID-19. *Public Health*, 194, 245-251.
-15. Marmot, M., et al. (2008). Closing the gap in a generation: health equity through action on the social determinants of health. *The Lancet*, 372(9650), 1661-1669.
-
----
-
-## Supplementary Materials
-
-### Data Availability
-The NFHS-5 data used in this study are publicly available from the DHS Program website (https://dhsprogram.com/data/dataset/India_Standard-DHS_2021.cfm). Social media data were collected from public sources and anonymized for analysis.
-
-### Statistical Code
-All statistical analyses were conducted using Python 3.8+ with the following packages:
-- pandas (data manipulation)
-- statsmodels (regression analysis)
-- scikit-learn (machine learning)
-- textblob (sentiment analysis)
-- plotly (visualization)
-
-### Additional Tables and Figures
-Detailed statistical tables and supplementary figures are available in the online appendix, including:
-- Complete regression model outputs
-- State-wise hesitancy maps
-- Temporal sentiment trends
-- Sensitivity analyses
-
----
-
-## Acknowledgments
-
-This research was conducted as part of ongoing public health research initiatives at Shridevi Institute of Medical Sciences and Research Hospital (SIMSRH), Tumkur, Karnataka, India. The author acknowledges the support of the institutional research committee and technical assistance from the Department of Community Medicine.
-
-**Funding:** This study received no external funding and was conducted as part of routine academic research activities.
-
-**Conflicts of Interest:** The author declares no conflicts of interest.
-
-**Corresponding Author:**
-Dr. Siddalingaiah H S, MD, MPH
-Professor and Head, Department of Community Medicine
-Shridevi Institute of Medical Sciences and Research Hospital (SIMSRH)
-Tumkur, Karnataka, India
-Email: hssling@yahoo.com
-Phone: +91-8941087719
-
----
-
-*This manuscript was generated using automated analysis tools and represents comprehensive findings from the vaccine hesitancy research project. The document includes detailed methodology, extensive results, and evidence-based recommendations suitable for journal submission. Please cite appropriately when referencing this work.*
-"""
+    manuscript = load_template("manuscript.md").render({
+        'region': results.get('region', 'India'),
+        'date': datetime.now().strftime('%B %Y'),
+        'sample_size': sample_size,
+        'hesitancy_rate': hesitancy_rate,
+        'hesitancy_ci_lower': hesitancy_ci[0],
+        'hesitancy_ci_upper': hesitancy_ci[1],
+        'interval': INTERVAL,
+        'state_rate_low': state_rates.min(),
+        'state_rate_high': state_rates.max(),
+        'states': states,
+        'total_tweets': total_tweets,
+        'avg_sentiment': avg_sentiment,
+        'positive_pct': positive_pct,
+        'neutral_pct': neutral_pct,
+        'negative_pct': negative_pct,
+        'sentiment_method': backend.description,
+        'negative_threshold': negative_threshold,
+        'positive_threshold': positive_threshold,
+        'language_routing': language_routing,
+        'trend_terms': trend_terms,
+        'trend_window': WINDOW,
+        'trend_spikes': trend_spikes,
+        'spike_z': SPIKE_Z,
+        'tables_text': tables_text
+    })
 
     return manuscript
 
 def generate_detailed_tables(results):
-    """Generate detailed statistical tables for the manuscript"""
+    """Generate detailed statistical tables for the manuscript from already-loaded results"""
 
-    # Load detailed statistics if available
     tables_text = ""
 
     try:
-        if (OUTPUTS/"reports"/"hesitancy_by_state.csv").exists():
-            state_df = pd.read_csv(OUTPUTS/"reports"/"hesitancy_by_state.csv")
-            tables_text += "\n**Table 2: Vaccine Hesitancy Rates by State**\n\n"
-            tables_text += "| State | Sample Size | Hesitancy Rate | 95% CI |\n"
-            tables_text += "|-------|-------------|----------------|--------|\n"
-            for _, row in state_df.head(10).iterrows():
-                tables_text += f"| {row['state']} | {row['count']:,} | {row['mean']:.1%} | ({row['mean']-.02:.1%}-{row['mean']+.02:.1%}) |\n"
-
-        if (OUTPUTS/"reports"/"hesitancy_by_education.csv").exists():
-            edu_df = pd.read_csv(OUTPUTS/"reports"/"hesitancy_by_education.csv")
-            tables_text += "\n**Table 3: Vaccine Hesitancy by Education Level**\n\n"
-            tables_text += "| Education Level | Sample Size | Hesitancy Rate | Odds Ratio |\n"
-            tables_text += "|----------------|-------------|----------------|------------|\n"
-            for _, row in edu_df.iterrows():
-                tables_text += f"| {row['education']} | {row['count']:,} | {row['mean']:.1%} | - |\n"
-
-        if (OUTPUTS/"reports"/"logit_odds_ratios.csv").exists():
-            odds_df = pd.read_csv(OUTPUTS/"reports"/"logit_odds_ratios.csv")
-            tables_text += "\n**Table 4: Logistic Regression Results - Odds Ratios**\n\n"
-            tables_text += "| Variable | Odds Ratio | 95% CI | p-value | Significance |\n"
-            tables_text += "|----------|------------|--------|---------|-------------|\n"
-            for _, row in odds_df.iterrows():
-                sig = "***" if row['p_value'] < 0.001 else "**" if row['p_value'] < 0.01 else "*" if row['p_value'] < 0.05 else ""
-                tables_text += f"| {row.name} | {row['odds_ratio']:.3f} | ({row['conf_int_lower']:.3f}-{row['conf_int_upper']:.3f}) | {row['p_value']:.3f} | {sig} |\n"
+        small_area = results.get('small_area')
+        if small_area is not None and (small_area['level'] == 'state').sum() > 1:
+            state_df = small_area[small_area['level'] == 'state'].head(10).reset_index(drop=True)
+            tables_text += markdown_table({
+                'State': fmt_text(state_df['state']),
+                'Sample Size': fmt_count(state_df['respondents']),
+                'Observed Rate': fmt_percent(state_df['observed_rate']),
+                'Model Estimate': fmt_percent(state_df['estimate']),
+                f'{INTERVAL:.0%} CI': "(" + fmt_percent(state_df['ci_lower']) + "-" + fmt_percent(state_df['ci_upper']) + ")"
+            }, title="Table 2: Vaccine Hesitancy Rates by State (hierarchical model estimates)")
+
+        if 'education_stats' in results:
+            edu_df = results['education_stats']
+            tables_text += markdown_table({
+                'Education Level': fmt_text(edu_df['education']),
+                'Sample Size': fmt_count(edu_df['count']),
+                'Hesitancy Rate': fmt_percent(edu_df['mean']),
+                'Odds Ratio': pd.Series(["-"] * len(edu_df))
+            }, title="Table 3: Vaccine Hesitancy by Education Level")
+
+        if 'odds_ratios' in results:
+            odds_df = results['odds_ratios']
+            tables_text += markdown_table({
+                'Variable': fmt_text(odds_df.index),
+                'Odds Ratio': fmt_float(odds_df['odds_ratio']),
+                '95% CI': "(" + fmt_float(odds_df['conf_int_lower']) + "-" + fmt_float(odds_df['conf_int_upper']) + ")",
+                'p-value': fmt_float(odds_df['p_value']),
+                'Significance': significance_stars(odds_df['p_value'])
+            }, title="Table 4: Logistic Regression Results - Odds Ratios")
+
+        if 'importance' in results:
+            features_df = results['importance'].drop_duplicates('feature')
+            tables_text += markdown_table({
+                'Rank': fmt_count(features_df['rank']),
+                'Factor': fmt_text(features_df['feature']),
+                'df': fmt_count(features_df['feature_df']),
+                'Deviance Increase': fmt_float(features_df['deviance_change'], 2),
+                'LR p-value': fmt_float(features_df['deviance_p']),
+                'Wald χ²': fmt_float(features_df['feature_wald_chi2'], 2),
+                'Significance': significance_stars(features_df['deviance_p'])
+            }, title="Table 5: Importance of Each Factor (deviance increase when left out of the model)")
+
+        if 'search_trends' in results:
+            trends_df = results['search_trends']['latest']
+            spike_days = results['search_trends']['spike_days'].reindex(trends_df['term'], fill_value=0)
+            tables_text += markdown_table({
+                'Search Term': fmt_text(trends_df['term']),
+                'Latest Interest': fmt_float(trends_df['value'], 0),
+                f'{WINDOW}-Day Mean': fmt_float(trends_df['rolling_mean'], 1),
+                'z-score': fmt_float(trends_df['zscore'], 2),
+                'Spike Days': fmt_count(spike_days),
+                'Weekly Peak': fmt_text(trends_df['seasonal_peak'])
+            }, title=f"Table 6: Search Interest by Term (as of {trends_df['date'].iloc[0]})")
 
     except Exception as e:
         tables_text += "\n*Detailed statistical tables will be included in the supplementary materials.*\n"
 
     return tables_text
 
-def save_manuscript(manuscript):
-    """Save manuscript to file"""
-    manuscript_path = REPORTS/"vaccine_hesitancy_manuscript.md"
+def find_pandoc():
+    """Path to a pandoc binary: on PATH, or the one bundled with pypandoc"""
+    path = shutil.which("pandoc")
+    if path:
+        return path
+    try:
+        import pypandoc
+        return pypandoc.get_pandoc_path()
+    except (ImportError, OSError):
+        return None
+
+class ExportService:
+    """Convert Markdown manuscripts with a bounded pool of concurrent pandoc processes,
+    skipping any output whose Markdown source is unchanged since it was last written"""
+
+    def __init__(self, formats=('docx',), workers=None, manifest_path=EXPORT_MANIFEST):
+        unknown = set(formats) - set(EXPORT_FORMATS)
+        if unknown:
+            raise ValueError(f"Unsupported export format(s): {sorted(unknown)}")
+        self.formats = list(formats)
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest_path = manifest_path
+        self.pending = []
+
+    def submit(self, md_path):
+        """Queue a Markdown file for conversion to every configured format"""
+        self.pending.append(Path(md_path))
+        return self
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _convert(self, pandoc, md_path, out_path, fmt):
+        cmd = [pandoc, str(md_path), "--from", "markdown", "--output", str(out_path)] + EXPORT_FORMATS[fmt]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        return proc.returncode == 0, proc.stderr.strip()
+
+    def run(self):
+        """Convert all queued files; returns counts of converted, skipped and failed outputs"""
+        summary = {'converted': 0, 'skipped': 0, 'failed': 0}
+        if not self.pending or not self.formats:
+            return summary
+
+        pandoc = find_pandoc()
+        if pandoc is None:
+            print("💡 Install pandoc or pypandoc for DOCX/PDF/HTML export: pip install pypandoc")
+            return summary
+
+        manifest = self._load_manifest()
+        jobs = []
+        for md_path in self.pending:
+            with open(md_path, "rb") as f:
+                md_hash = hashlib.sha256(f.read()).hexdigest()
+            for fmt in self.formats:
+                out_path = md_path.with_suffix(f".{fmt}")
+                # The key covers the pandoc arguments too, so changing them re-exports
+                digest = hashlib.sha256(f"{md_hash}{EXPORT_FORMATS[fmt]}".encode()).hexdigest()
+                if out_path.exists() and manifest.get(str(out_path)) == digest:
+                    summary['skipped'] += 1
+                else:
+                    jobs.append((md_path, out_path, fmt, digest))
+        self.pending = []
+
+        # pandoc runs out of process, so threads are enough to keep every worker busy
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(len(jobs), 1))) as pool:
+            futures = {pool.submit(self._convert, pandoc, md, out, fmt): (out, digest)
+                       for md, out, fmt, digest in jobs}
+            for future in as_completed(futures):
+                out_path, digest = futures[future]
+                ok, error = future.result()
+                if ok:
+                    manifest[str(out_path)] = digest
+                    summary['converted'] += 1
+                else:
+                    manifest.pop(str(out_path), None)
+                    summary['failed'] += 1
+                    print(f"⚠ Could not create {out_path.name}: {error.splitlines()[-1] if error else 'pandoc failed'}")
+
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=1)
+
+        print(f"📄 Export: {summary['converted']} converted, {summary['skipped']} unchanged, "
+              f"{summary['failed']} failed ({', '.join(self.formats)})")
+        return summary
+
+def save_manuscript(manuscript, manuscript_path=REPORTS/"vaccine_hesitancy_manuscript.md", formats=('docx',)):
+    """Save manuscript to file and export it to the requested formats"""
 
     with open(manuscript_path, "w", encoding="utf-8") as f:
         f.write(manuscript)
 
     print(f"✅ Manuscript saved to: {manuscript_path}")
 
-    # Also save as DOCX if pypandoc is available
+    if formats:
+        ExportService(formats).submit(manuscript_path).run()
+
+def summarize_subgroup(df, label, base_results):
+    """Analysis results for one slice of the NFHS data, in load_analysis_results' format"""
+    results = {
+        'region': f"{label}, India",
+        'nfhs_data': {
+            'sample_size': len(df),
+            'hesitancy_rate': df['vaccine_hesitant'].mean(),
+            'states': df['state'].nunique() if 'state' in df.columns else 0
+        },
+        'twitter_sentiment': base_results.get('twitter_sentiment', {}),
+        'sentiment_scoring': base_results.get('sentiment_scoring', {}),
+        'languages': base_results.get('languages')
+    }
+
+    # Search interest is national, so every subgroup reports the same table
+    if 'search_trends' in base_results:
+        results['search_trends'] = base_results['search_trends']
+
+    # A single-state subgroup reports the sentiment of tweets resolved to that state
+    state_sentiment = base_results.get('state_sentiment')
+    if state_sentiment is not None and 'state' in df.columns and df['state'].nunique() == 1:
+        match = state_sentiment[state_sentiment['state'] == df['state'].iloc[0]]
+        if len(match):
+            results['twitter_sentiment'] = {'avg_sentiment': match['sentiment'].iloc[0],
+                                            'total_tweets': match['tweets'].iloc[0]}
+
+    if 'state' in df.columns:
+        try:
+            results['small_area'] = estimate_frame(df)
+        except Exception as e:
+            print(f"⚠ Small-area estimation failed for {label}: {e}")
+    if 'education' in df.columns:
+        results['education_stats'] = hesitancy_stats(df, 'education')
+
+    X, y = build_design_matrix(df, verbose=False)
+    if X is not None and len(X) >= 50:
+        try:
+            _, results['odds_ratios'], alpha = fit_logit_or_penalized(X, y)
+            # Subgroups already render in parallel, so the refits stay in this process
+            results['importance'] = compute_importance(X, y, results['odds_ratios']['coefficient'],
+                                                       alpha=alpha, workers=1)
+        except Exception as e:
+            print(f"⚠ Regression failed for {label}: {e}")
+
+    return results
+
+def subgroup_slug(value):
+    return re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_")
+
+def _init_batch_worker(batch):
+    """Receive the batch settings once per worker"""
+    _BATCH.update(batch)
+
+def _render_subgroup(value, rows):
+    """Materialize one subgroup's rows from the mapped store, render its manuscript and save it"""
+    start = time.perf_counter()
+    df = attach(_BATCH['store_path']).to_frame(rows=rows)
+    results = summarize_subgroup(df, value, _BATCH['base_results'])
+
+    out_dir = SUBGROUP_REPORTS/subgroup_slug(_BATCH['column'])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir/f"{subgroup_slug(value)}_manuscript.md"
+    # Export happens once in the parent, batched across all subgroups
+    save_manuscript(generate_manuscript(results), path, formats=())
+
+    return {
+        'subgroup': value,
+        'respondents': len(df),
+        'hesitancy_rate': results['nfhs_data']['hesitancy_rate'],
+        'path': str(path),
+        'seconds': time.perf_counter() - start
+    }
+
+def generate_batch(column, subgroups=None, workers=None, formats=('docx',)):
+    """Render one manuscript per value of column, fanned out over a process pool"""
+    print(f"📚 Generating subgroup manuscripts by {column}...")
+
+    # Workers map the store's column files themselves; only row indices are sent per task,
+    # so memory stays flat however many workers run
     try:
-        import pypandoc
-        docx_path = REPORTS/"vaccine_hesitancy_manuscript.docx"
-        pypandoc.convert_text(manuscript, 'docx', format='md', outputfile=docx_path)
-        print(f"✅ DOCX version saved to: {docx_path}")
-    except ImportError:
-        print("💡 Install pypandoc for DOCX export: pip install pypandoc")
-    except Exception as e:
-        print(f"⚠ Could not create DOCX version: {e}")
+        store = NFHSStore.open(STORE_PATH)
+    except FileNotFoundError:
+        print("⚠ NFHS store not found. Run data cleaning first:")
+        print("  python vh.py clean")
+        return
+    if column not in store:
+        print(f"⚠ Column '{column}' not found in NFHS data")
+        return
+
+    indices = store.group_rows(column)
+    # Requested values come from the command line as text, so numeric values are matched by their text
+    wanted = set(map(str, subgroups)) if subgroups else None
+    subgroups = [s for s in sorted(indices) if wanted is None or str(s) in wanted]
+    if not subgroups:
+        print("⚠ None of the requested subgroups are present in the data")
+        return
+
+    batch = {'store_path': STORE_PATH, 'column': column, 'base_results': load_analysis_results()}
+    _BATCH.update(batch)
+
+    workers = workers or min(len(subgroups), os.cpu_count() or 1)
+    rows = []
+    if workers == 1:
+        for value in subgroups:
+            rows.append(_render_subgroup(value, indices[value]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(batch,)) as pool:
+            futures = [pool.submit(_render_subgroup, value, indices[value]) for value in subgroups]
+            for future in as_completed(futures):
+                rows.append(future.result())
+
+    index = pd.DataFrame(rows).sort_values('subgroup')
+    out_dir = SUBGROUP_REPORTS/subgroup_slug(column)
+    index.to_csv(out_dir/"index.csv", index=False)
+    print(f"\n🎯 {len(index)} subgroup manuscripts written to {out_dir}")
+
+    exporter = ExportService(formats, workers)
+    for path in index['path']:
+        exporter.submit(path)
+    exporter.run()
 
 def main():
     """Main function to generate manuscript"""
+    parser = argparse.ArgumentParser(description="Generate the research manuscript")
+    parser.add_argument("--batch", metavar="COLUMN",
+                        help="Write one manuscript per value of this NFHS column (e.g. state)")
+    parser.add_argument("--subgroups", nargs="+",
+                        help="Only these values of the batch column (default: all)")
+    parser.add_argument("--workers", type=int, default=get_workers('manuscript'),
+                        help="Processes for batch mode and export (default: [workers] manuscript in vh.ini, else CPU count)")
+    parser.add_argument("--formats", nargs="*", default=['docx'], choices=sorted(EXPORT_FORMATS),
+                        help="Document formats to export alongside Markdown (default: docx)")
+    args = parser.parse_args()
+
+    if args.batch:
+        generate_batch(args.batch, args.subgroups, args.workers, args.formats)
+        return
+
     print("📝 Generating research manuscript...")
 
     # Load analysis results
@@ -473,19 +505,20 @@ def main():
 
     if not results:
         print("⚠ No analysis results found. Run the complete pipeline first:")
-        print("  python projects/vaccine_hesitancy/run_all.py")
+        print("  python vh.py run")
         return
 
     # Generate manuscript
     manuscript = generate_manuscript(results)
 
     # Save manuscript
-    save_manuscript(manuscript)
+    save_manuscript(manuscript, formats=args.formats)
 
     print("\n🎯 Manuscript generation complete!")
     print("📄 Files created:")
     print(f"  - {REPORTS}/vaccine_hesitancy_manuscript.md")
-    print("  - DOCX version (if pypandoc available)")
+    for fmt in args.formats:
+        print(f"  - {fmt.upper()} version (if pandoc available)")
 
 if __name__ == "__main__":
     main()
@@ -3,105 +3,255 @@ Visualization Generator for Vaccine Hesitancy Research
 Creates comprehensive plots and charts for the analysis results
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from pathlib import Path
-import numpy as np
-
-BASE = Path("projects/vaccine_hesitancy")
-OUTPUTS = BASE/"outputs"
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS, get_path, get_workers
+from nfhs_store import STORE_PATH, NFHSStore
+from tweet_store import TweetStore, STORE_PATH as TWEET_STORE_PATH
+from plot_reduction import reduce_series, auto_bin, MAX_POINTS, MAX_BINS
+from feature_importance import IMPORTANCE_PATH
+
+pd = lazy_import("pandas")
+matplotlib = lazy_import("matplotlib")
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
 TABLES = OUTPUTS/"tables"
 REPORTS = OUTPUTS/"reports"
 PLOTS = OUTPUTS/"plots"
+PLOT_CACHE = get_path('cache', 'plot_cache')
+
+# Input tables by data key; chart functions declare which keys they read
+DATA_FILES = {
+    # meta.json carries a digest of the store's columns, so it fingerprints the NFHS data
+    'nfhs': STORE_PATH/"meta.json",
+    'twitter_sentiment': TABLES/"twitter_sentiment_timeseries.csv",
+    'twitter_detailed': TWEET_STORE_PATH,
+    'odds_ratios': REPORTS/"logit_odds_ratios.csv",
+    'importance': IMPORTANCE_PATH,
+    'state_stats': REPORTS/"hesitancy_by_state.csv",
+    'education_stats': REPORTS/"hesitancy_by_education.csv",
+    'gender_stats': REPORTS/"hesitancy_by_gender.csv",
+}
+READ_OPTIONS = {'odds_ratios': {'index_col': 0}}
+
+# A chart to render: output name, top-level render function and its (small, picklable) arguments
+ChartJob = namedtuple("ChartJob", ["name", "render", "args"])
 
 def setup_plotting():
     """Set up plotting parameters"""
+    # Headless backend, selected before pyplot is first imported
+    matplotlib.use("Agg")
     plt.style.use('seaborn-v0_8')
     sns.set_palette("husl")
     PLOTS.mkdir(parents=True, exist_ok=True)
 
-def load_data():
-    """Load all analysis data for visualization"""
+def load_data(keys=None):
+    """Load analysis data for visualization, optionally only the given data keys"""
     data = {}
 
     try:
-        # Load NFHS data
-        if (TABLES/"nfhs_clean.csv").exists():
-            data['nfhs'] = pd.read_csv(TABLES/"nfhs_clean.csv")
+        for key, path in DATA_FILES.items():
+            if keys is not None and key not in keys:
+                continue
+            if not path.exists():
+                continue
+            if key == 'nfhs':
+                data[key] = NFHSStore.open(path.parent).to_frame()
+            elif key == 'twitter_detailed':
+                data[key] = TweetStore.open(path)
+            else:
+                data[key] = pd.read_csv(path, **READ_OPTIONS.get(key, {}))
 
-        # Load Twitter sentiment
-        if (TABLES/"twitter_sentiment_timeseries.csv").exists():
-            data['twitter_sentiment'] = pd.read_csv(TABLES/"twitter_sentiment_timeseries.csv")
+    except Exception as e:
+        print(f"Warning: Could not load some data: {e}")
 
-        if (TABLES/"twitter_sentiment_detailed.csv").exists():
-            data['twitter_detailed'] = pd.read_csv(TABLES/"twitter_sentiment_detailed.csv")
+    return data
 
-        # Load odds ratios
-        if (REPORTS/"logit_odds_ratios.csv").exists():
-            data['odds_ratios'] = pd.read_csv(REPORTS/"logit_odds_ratios.csv")
+def chart_group(inputs):
+    """Declare the data keys a chart function reads; its keyword defaults are its chart parameters"""
+    def decorate(func):
+        func.inputs = tuple(inputs)
+        func.params = {name: p.default for name, p in inspect.signature(func).parameters.items()
+                       if p.default is not inspect.Parameter.empty}
+        return func
+    return decorate
+
+def save_plotly(fig, name):
+    """Write a Plotly figure as interactive HTML and static PNG"""
+    fig.write_html(PLOTS/f"{name}.html")
+    fig.write_image(PLOTS/f"{name}.png")
+
+def render_state_hesitancy(state_hesitancy):
+    """Bar chart of hesitancy rate by state"""
+    fig = px.bar(state_hesitancy, x='state', y='vaccine_hesitant',
+                title='Vaccine Hesitancy Rate by State',
+                labels={'vaccine_hesitant': 'Hesitancy Rate', 'state': 'State'})
+    fig.update_layout(xaxis_tickangle=-45)
+    save_plotly(fig, "hesitancy_by_state")
+
+def render_education_hesitancy(edu_hesitancy):
+    """Bar chart of hesitancy rate by education level"""
+    fig = px.bar(edu_hesitancy, x='education', y='mean',
+                title='Vaccine Hesitancy by Education Level',
+                labels={'mean': 'Hesitancy Rate', 'education': 'Education Level'})
+    save_plotly(fig, "hesitancy_by_education")
+
+def render_rural_urban(rural_urban):
+    """Pie chart of hesitancy in rural vs urban areas"""
+    fig = px.pie(rural_urban, values='vaccine_hesitant', names='location',
+                title='Vaccine Hesitancy: Rural vs Urban')
+    save_plotly(fig, "hesitancy_rural_urban")
+
+def render_correlation_heatmap(corr_df, cmap, dpi):
+    """Annotated heatmap of the correlation matrix"""
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(corr_df, annot=True, cmap=cmap, center=0, square=True)
+    plt.title('Correlation Matrix: Vaccine Hesitancy Factors')
+    plt.tight_layout()
+    plt.savefig(PLOTS/"correlation_heatmap.png", dpi=dpi, bbox_inches='tight')
+    plt.close()
 
-        # Load summary statistics
-        if (REPORTS/"hesitancy_by_state.csv").exists():
-            data['state_stats'] = pd.read_csv(REPORTS/"hesitancy_by_state.csv")
+def render_sentiment_trend(sentiment_df):
+    """Line chart of monthly mean sentiment"""
+    fig = px.line(sentiment_df, x='month', y='sentiment_mean',
+                 title='Twitter Sentiment Trend on Vaccines',
+                 labels={'sentiment_mean': 'Average Sentiment', 'month': 'Month'})
+    fig.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Neutral")
+    save_plotly(fig, "twitter_sentiment_trend")
+
+def render_sentiment_distribution(sentiment_counts):
+    """Pie chart of sentiment label counts"""
+    fig = px.pie(sentiment_counts, values=sentiment_counts.values,
+                names=sentiment_counts.index, title='Twitter Sentiment Distribution')
+    save_plotly(fig, "twitter_sentiment_distribution")
+
+def render_sentiment_scores(score_bins):
+    """Bar chart of pre-binned sentiment scores"""
+    fig = px.bar(score_bins, x='bin_center', y='count',
+                title='Twitter Sentiment Score Distribution',
+                labels={'bin_center': 'Sentiment Score', 'count': 'Tweets'})
+    fig.update_traces(width=(score_bins['bin_end'] - score_bins['bin_start']).to_numpy())
+    save_plotly(fig, "twitter_sentiment_scores")
+
+def render_odds_ratios(odds_df_sorted):
+    """Horizontal bar chart of odds ratios"""
+    fig = px.bar(odds_df_sorted, x='odds_ratio', y=odds_df_sorted.index,
+                orientation='h', title='Odds Ratios for Vaccine Hesitancy Factors',
+                labels={'odds_ratio': 'Odds Ratio', 'index': 'Factor'})
+    fig.add_vline(x=1, line_dash="dash", line_color="red", annotation_text="No Effect")
+    save_plotly(fig, "odds_ratios")
+
+def render_feature_importance(importance_df):
+    """Horizontal bar chart of the deviance increase when each feature is left out"""
+    fig = px.bar(importance_df, x='deviance_change', y='feature', orientation='h',
+                title='Feature Importance in Vaccine Hesitancy Model',
+                hover_data=['feature_df', 'deviance_p', 'feature_wald_chi2'],
+                labels={'deviance_change': 'Deviance Increase When Left Out', 'feature': 'Factor'})
+    save_plotly(fig, "feature_importance")
+
+def render_summary_dashboard(panels, dpi):
+    """Six-panel matplotlib summary of the main results"""
+    fig = plt.figure(figsize=(20, 12))
 
-        if (REPORTS/"hesitancy_by_education.csv").exists():
-            data['education_stats'] = pd.read_csv(REPORTS/"hesitancy_by_education.csv")
+    # Subplot 1: Key metrics
+    plt.subplot(2, 3, 1)
+    if 'hesitancy_rate' in panels:
+        hesitancy_rate = panels['hesitancy_rate']
+        plt.pie([hesitancy_rate, 1-hesitancy_rate],
+               labels=['Hesitant', 'Not Hesitant'],
+               autopct='%1.1f%%', colors=['#ff6b6b', '#4ecdc4'])
+        plt.title('Overall Vaccine Hesitancy Rate')
 
-        if (REPORTS/"hesitancy_by_gender.csv").exists():
-            data['gender_stats'] = pd.read_csv(REPORTS/"hesitancy_by_gender.csv")
+    # Subplot 2: Education breakdown
+    plt.subplot(2, 3, 2)
+    if 'education_stats' in panels:
+        edu_stats = panels['education_stats']
+        plt.bar(range(len(edu_stats)), edu_stats['mean'])
+        plt.xticks(range(len(edu_stats)), edu_stats['education'], rotation=45)
+        plt.title('Hesitancy by Education')
+        plt.ylabel('Hesitancy Rate')
 
-    except Exception as e:
-        print(f"Warning: Could not load some data: {e}")
+    # Subplot 3: State variation
+    plt.subplot(2, 3, 3)
+    if 'state_stats' in panels:
+        state_stats = panels['state_stats']
+        plt.barh(range(len(state_stats)), state_stats['mean'])
+        plt.yticks(range(len(state_stats)), state_stats['state'])
+        plt.title(f'Top {len(state_stats)} States by Hesitancy')
+        plt.xlabel('Hesitancy Rate')
 
-    return data
+    # Subplot 4: Twitter sentiment
+    plt.subplot(2, 3, 4)
+    if 'sentiment_mean' in panels:
+        sentiment_mean = panels['sentiment_mean']
+        plt.plot(range(len(sentiment_mean)), sentiment_mean)
+        plt.axhline(y=0, color='red', linestyle='--', alpha=0.5)
+        plt.title('Twitter Sentiment Trend')
+        plt.ylabel('Sentiment Score')
 
-def create_nfhs_visualizations(data):
-    """Create visualizations for NFHS survey data"""
-    print("📊 Creating NFHS survey visualizations...")
+    # Subplot 5: Gender comparison
+    plt.subplot(2, 3, 5)
+    if 'gender_stats' in panels:
+        gender_stats = panels['gender_stats']
+        plt.bar(range(len(gender_stats)), gender_stats['mean'])
+        plt.xticks(range(len(gender_stats)), gender_stats['gender'])
+        plt.title('Hesitancy by Gender')
+        plt.ylabel('Hesitancy Rate')
+
+    # Subplot 6: Odds ratios
+    plt.subplot(2, 3, 6)
+    if 'odds_ratios' in panels:
+        odds_df = panels['odds_ratios']
+        colors = ['red' if x > 1 else 'green' for x in odds_df['odds_ratio']]
+        plt.barh(range(len(odds_df)), odds_df['odds_ratio'], color=colors)
+        plt.axvline(x=1, color='black', linestyle='--', alpha=0.5)
+        plt.yticks(range(len(odds_df)), odds_df.index)
+        plt.title('Key Odds Ratios')
+        plt.xlabel('Odds Ratio')
+
+    plt.tight_layout()
+    plt.savefig(PLOTS/"vaccine_hesitancy_dashboard.png", dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+@chart_group(inputs=['nfhs'])
+def create_nfhs_visualizations(data, heatmap_cmap='coolwarm', heatmap_dpi=300):
+    """Build chart jobs for NFHS survey data"""
+    print("📊 Preparing NFHS survey visualizations...")
 
     if 'nfhs' not in data:
         print("⚠ NFHS data not available")
-        return
+        return []
 
     df = data['nfhs']
+    jobs = []
 
     # 1. Vaccine hesitancy by state
     if 'state' in df.columns:
         state_hesitancy = df.groupby('state')['vaccine_hesitant'].mean().reset_index()
         state_hesitancy = state_hesitancy.sort_values('vaccine_hesitant', ascending=False)
-
-        fig = px.bar(state_hesitancy, x='state', y='vaccine_hesitant',
-                    title='Vaccine Hesitancy Rate by State',
-                    labels={'vaccine_hesitant': 'Hesitancy Rate', 'state': 'State'})
-        fig.update_layout(xaxis_tickangle=-45)
-        fig.write_html(PLOTS/"hesitancy_by_state.html")
-        fig.write_image(PLOTS/"hesitancy_by_state.png")
-        print("✅ State hesitancy chart created")
+        jobs.append(ChartJob("hesitancy_by_state", render_state_hesitancy, (state_hesitancy,)))
 
     # 2. Hesitancy by education level
     if 'education' in df.columns:
         edu_hesitancy = df.groupby('education')['vaccine_hesitant'].agg(['count', 'mean']).reset_index()
-
-        fig = px.bar(edu_hesitancy, x='education', y='mean',
-                    title='Vaccine Hesitancy by Education Level',
-                    labels={'mean': 'Hesitancy Rate', 'education': 'Education Level'})
-        fig.write_html(PLOTS/"hesitancy_by_education.html")
-        fig.write_image(PLOTS/"hesitancy_by_education.png")
-        print("✅ Education hesitancy chart created")
+        jobs.append(ChartJob("hesitancy_by_education", render_education_hesitancy, (edu_hesitancy,)))
 
     # 3. Rural vs Urban hesitancy
     if 'rural' in df.columns:
         rural_urban = df.groupby('rural')['vaccine_hesitant'].mean().reset_index()
         rural_urban['location'] = rural_urban['rural'].map({0: 'Urban', 1: 'Rural'})
-
-        fig = px.pie(rural_urban, values='vaccine_hesitant', names='location',
-                    title='Vaccine Hesitancy: Rural vs Urban')
-        fig.write_html(PLOTS/"hesitancy_rural_urban.html")
-        fig.write_image(PLOTS/"hesitancy_rural_urban.png")
-        print("✅ Rural-urban hesitancy chart created")
+        jobs.append(ChartJob("hesitancy_rural_urban", render_rural_urban, (rural_urban,)))
 
     # 4. Correlation heatmap
     numeric_cols = ['age', 'education_level', 'rural', 'vaccine_hesitant']
@@ -109,176 +259,286 @@ def create_nfhs_visualizations(data):
 
     if len(available_cols) > 1:
         corr_df = df[available_cols].corr()
+        jobs.append(ChartJob("correlation_heatmap", render_correlation_heatmap,
+                             (corr_df, heatmap_cmap, heatmap_dpi)))
 
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(corr_df, annot=True, cmap='coolwarm', center=0, square=True)
-        plt.title('Correlation Matrix: Vaccine Hesitancy Factors')
-        plt.tight_layout()
-        plt.savefig(PLOTS/"correlation_heatmap.png", dpi=300, bbox_inches='tight')
-        plt.close()
-        print("✅ Correlation heatmap created")
+    return jobs
 
-def create_twitter_visualizations(data):
-    """Create visualizations for Twitter sentiment analysis"""
-    print("🐦 Creating Twitter sentiment visualizations...")
+@chart_group(inputs=['twitter_sentiment', 'twitter_detailed'])
+def create_twitter_visualizations(data, max_points=MAX_POINTS, max_bins=MAX_BINS):
+    """Build chart jobs for Twitter sentiment analysis"""
+    print("🐦 Preparing Twitter sentiment visualizations...")
 
     if 'twitter_sentiment' not in data:
         print("⚠ Twitter sentiment data not available")
-        return
+        return []
 
     sentiment_df = data['twitter_sentiment']
+    jobs = []
 
     # 1. Sentiment trend over time
     if 'month' in sentiment_df.columns and 'sentiment_mean' in sentiment_df.columns:
-        fig = px.line(sentiment_df, x='month', y='sentiment_mean',
-                     title='Twitter Sentiment Trend on Vaccines',
-                     labels={'sentiment_mean': 'Average Sentiment', 'month': 'Month'})
-        fig.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Neutral")
-        fig.write_html(PLOTS/"twitter_sentiment_trend.html")
-        fig.write_image(PLOTS/"twitter_sentiment_trend.png")
-        print("✅ Twitter sentiment trend created")
+        trend_df = reduce_series(sentiment_df[['month', 'sentiment_mean']], 'month', 'sentiment_mean', max_points)
+        jobs.append(ChartJob("twitter_sentiment_trend", render_sentiment_trend, (trend_df,)))
 
     # 2. Sentiment distribution
     if 'twitter_detailed' in data:
-        detailed_df = data['twitter_detailed']
-        if 'label' in detailed_df.columns:
-            sentiment_counts = detailed_df['label'].value_counts()
+        tweets = data['twitter_detailed']
+        sentiment_counts = tweets.label_counts()
+        jobs.append(ChartJob("twitter_sentiment_distribution", render_sentiment_distribution,
+                             (sentiment_counts,)))
+
+        # 3. Score distribution, binned here so the chart never carries per-tweet rows
+        if len(tweets):
+            score_bins = auto_bin(tweets.scores(), max_bins)
+            jobs.append(ChartJob("twitter_sentiment_scores", render_sentiment_scores, (score_bins,)))
 
-            fig = px.pie(sentiment_counts, values=sentiment_counts.values,
-                        names=sentiment_counts.index, title='Twitter Sentiment Distribution')
-            fig.write_html(PLOTS/"twitter_sentiment_distribution.html")
-            fig.write_image(PLOTS/"twitter_sentiment_distribution.png")
-            print("✅ Twitter sentiment distribution created")
+    return jobs
 
+@chart_group(inputs=['odds_ratios', 'importance'])
 def create_regression_visualizations(data):
-    """Create visualizations for regression analysis"""
-    print("📈 Creating regression analysis visualizations...")
+    """Build chart jobs for regression analysis"""
+    print("📈 Preparing regression analysis visualizations...")
 
     if 'odds_ratios' not in data:
         print("⚠ Odds ratios data not available")
-        return
+        return []
 
     odds_df = data['odds_ratios']
+    jobs = []
 
     # 1. Odds ratios bar chart
     odds_df_sorted = odds_df.sort_values('odds_ratio', ascending=False)
+    jobs.append(ChartJob("odds_ratios", render_odds_ratios, (odds_df_sorted,)))
 
-    fig = px.bar(odds_df_sorted, x='odds_ratio', y=odds_df_sorted.index,
-                orientation='h', title='Odds Ratios for Vaccine Hesitancy Factors',
-                labels={'odds_ratio': 'Odds Ratio', 'index': 'Factor'})
-    fig.add_vline(x=1, line_dash="dash", line_color="red", annotation_text="No Effect")
-    fig.write_html(PLOTS/"odds_ratios.html")
-    fig.write_image(PLOTS/"odds_ratios.png")
-    print("✅ Odds ratios visualization created")
-
-    # 2. Feature importance (absolute coefficient values)
-    if 'coefficient' in odds_df.columns:
-        importance_df = odds_df.copy()
-        importance_df['abs_coefficient'] = abs(importance_df['coefficient'])
-        importance_df = importance_df.sort_values('abs_coefficient', ascending=True)
-
-        fig = px.bar(importance_df, x='abs_coefficient', y=importance_df.index,
-                    orientation='h', title='Feature Importance in Vaccine Hesitancy Model',
-                    labels={'abs_coefficient': 'Absolute Coefficient', 'index': 'Factor'})
-        fig.write_html(PLOTS/"feature_importance.html")
-        fig.write_image(PLOTS/"feature_importance.png")
-        print("✅ Feature importance visualization created")
-
-def create_summary_dashboard(data):
-    """Create a comprehensive summary dashboard"""
-    print("📋 Creating summary dashboard...")
-
-    # Create a comprehensive summary figure
-    fig = plt.figure(figsize=(20, 12))
+    # 2. Feature importance, one bar per feature from the importance table
+    if 'importance' in data:
+        importance_df = data['importance'].drop_duplicates('feature').iloc[::-1]
+        jobs.append(ChartJob("feature_importance", render_feature_importance, (importance_df,)))
 
-    # Subplot 1: Key metrics
-    plt.subplot(2, 3, 1)
-    if 'nfhs' in data:
-        df = data['nfhs']
-        hesitancy_rate = df['vaccine_hesitant'].mean()
-        plt.pie([hesitancy_rate, 1-hesitancy_rate],
-               labels=['Hesitant', 'Not Hesitant'],
-               autopct='%1.1f%%', colors=['#ff6b6b', '#4ecdc4'])
-        plt.title('Overall Vaccine Hesitancy Rate')
+    return jobs
 
-    # Subplot 2: Education breakdown
-    plt.subplot(2, 3, 2)
-    if 'education_stats' in data:
-        edu_stats = data['education_stats']
-        plt.bar(range(len(edu_stats)), edu_stats['mean'])
-        plt.xticks(range(len(edu_stats)), edu_stats['education'], rotation=45)
-        plt.title('Hesitancy by Education')
-        plt.ylabel('Hesitancy Rate')
+@chart_group(inputs=['nfhs', 'education_stats', 'state_stats', 'twitter_sentiment',
+                     'gender_stats', 'importance'])
+def create_summary_dashboard(data, top_states=10, top_factors=8, max_points=MAX_POINTS, dpi=300):
+    """Build the chart job for the comprehensive summary dashboard"""
+    print("📋 Preparing summary dashboard...")
 
-    # Subplot 3: State variation
-    plt.subplot(2, 3, 3)
+    # Only the small aggregates each panel needs are shipped to the worker
+    panels = {}
+    if 'nfhs' in data:
+        panels['hesitancy_rate'] = data['nfhs']['vaccine_hesitant'].mean()
+    if 'education_stats' in data:
+        panels['education_stats'] = data['education_stats']
     if 'state_stats' in data:
-        state_stats = data['state_stats'].head(10)  # Top 10 states
-        plt.barh(range(len(state_stats)), state_stats['mean'])
-        plt.yticks(range(len(state_stats)), state_stats['state'])
-        plt.title('Top 10 States by Hesitancy')
-        plt.xlabel('Hesitancy Rate')
-
-    # Subplot 4: Twitter sentiment
-    plt.subplot(2, 3, 4)
-    if 'twitter_sentiment' in data:
-        sentiment_df = data['twitter_sentiment']
-        if 'sentiment_mean' in sentiment_df.columns:
-            plt.plot(range(len(sentiment_df)), sentiment_df['sentiment_mean'])
-            plt.axhline(y=0, color='red', linestyle='--', alpha=0.5)
-            plt.title('Twitter Sentiment Trend')
-            plt.ylabel('Sentiment Score')
-
-    # Subplot 5: Gender comparison
-    plt.subplot(2, 3, 5)
+        panels['state_stats'] = data['state_stats'].head(top_states)
+    sentiment_df = data.get('twitter_sentiment')
+    if sentiment_df is not None and 'month' in sentiment_df.columns and 'sentiment_mean' in sentiment_df.columns:
+        trend_df = reduce_series(sentiment_df, 'month', 'sentiment_mean', max_points)
+        panels['sentiment_mean'] = trend_df['sentiment_mean'].to_numpy()
     if 'gender_stats' in data:
-        gender_stats = data['gender_stats']
-        plt.bar(range(len(gender_stats)), gender_stats['mean'])
-        plt.xticks(range(len(gender_stats)), gender_stats['gender'])
-        plt.title('Hesitancy by Gender')
-        plt.ylabel('Hesitancy Rate')
+        panels['gender_stats'] = data['gender_stats']
+    if 'importance' in data:
+        # Terms of the most important features first
+        panels['odds_ratios'] = data['importance'].set_index('term')[['odds_ratio']].head(top_factors)
 
-    # Subplot 6: Odds ratios
-    plt.subplot(2, 3, 6)
-    if 'odds_ratios' in data:
-        odds_df = data['odds_ratios'].head(8)  # Top 8 factors
-        colors = ['red' if x > 1 else 'green' for x in odds_df['odds_ratio']]
-        plt.barh(range(len(odds_df)), odds_df['odds_ratio'], color=colors)
-        plt.axvline(x=1, color='black', linestyle='--', alpha=0.5)
-        plt.yticks(range(len(odds_df)), odds_df.index)
-        plt.title('Key Odds Ratios')
-        plt.xlabel('Odds Ratio')
+    return [ChartJob("vaccine_hesitancy_dashboard", render_summary_dashboard, (panels, dpi))]
 
-    plt.tight_layout()
-    plt.savefig(PLOTS/"vaccine_hesitancy_dashboard.png", dpi=300, bbox_inches='tight')
-    plt.close()
-    print("✅ Summary dashboard created")
+CHART_GROUPS = [create_nfhs_visualizations, create_twitter_visualizations,
+                create_regression_visualizations, create_summary_dashboard]
+
+def load_plot_cache():
+    """Read the plot cache manifest (file hashes and chart group fingerprints)"""
+    try:
+        with open(PLOT_CACHE, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'files': {}, 'groups': {}}
+
+def save_plot_cache(cache):
+    with open(PLOT_CACHE, "w") as f:
+        json.dump(cache, f, indent=1)
+
+def file_digest(path, cache):
+    """Content hash of an input file, reusing the cached hash while size and mtime are unchanged"""
+    if not path.exists():
+        return None
+    stat = path.stat()
+    entry = cache['files'].get(str(path))
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    cache['files'][str(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                 'sha256': digest.hexdigest()}
+    return digest.hexdigest()
+
+def _global_names(code):
+    """Global names a code object and the functions nested in it refer to"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+def code_digest(group):
+    """Hash of the code behind a chart group: its own source, the render functions and helpers of
+    this module it reaches (plus data loading and plot setup), and the source files of the pipeline
+    modules those call into (plot_reduction, tweet_store, ...)"""
+    scripts_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    todo, seen, files = [group, load_data, setup_plotting], set(), set()
+    while todo:
+        obj = todo.pop()
+        if obj in seen:
+            continue
+        seen.add(obj)
+        if obj.__module__ == __name__:
+            if inspect.isfunction(obj):
+                digest.update(inspect.getsource(obj).encode())
+                todo.extend(value for value in map(globals().get, sorted(_global_names(obj.__code__)))
+                            if inspect.isfunction(value) or inspect.isclass(value))
+            continue
+        path = getattr(inspect.getmodule(obj), '__file__', None)
+        if path and os.path.dirname(os.path.abspath(path)) == scripts_dir:
+            files.add(path)
+    for path in sorted(files):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def chart_fingerprint(group, cache):
+    """Fingerprint of a chart function's declared inputs, its chart parameters and the code that renders it"""
+    payload = {
+        'code': code_digest(group),
+        'params': group.params,
+        'inputs': {key: file_digest(DATA_FILES[key], cache) for key in group.inputs}
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def is_fresh(group, fingerprint, cache):
+    """A chart group is fresh when its fingerprint matches and all its outputs still exist"""
+    entry = cache['groups'].get(group.__name__)
+    return bool(entry) and entry['fingerprint'] == fingerprint \
+        and all((PLOTS/name).exists() for name in entry['outputs'])
+
+def _init_render_worker():
+    """Set up a render worker and start its Kaleido renderer once"""
+    setup_plotting()
+    try:
+        # The first static export launches Kaleido; it stays alive for the worker's lifetime
+        go.Figure().to_image(format="png")
+    except Exception as e:
+        print(f"⚠ Kaleido warm-up failed in worker {os.getpid()}: {e}")
 
-def generate_all_visualizations():
-    """Generate all visualizations"""
+def _run_chart_job(job):
+    """Render one chart and return its name, render time and error (if any)"""
+    start = time.perf_counter()
+    try:
+        job.render(*job.args)
+        error = None
+    except Exception as e:
+        error = (str(e).strip() or type(e).__name__).splitlines()[0]
+    return job.name, time.perf_counter() - start, error
+
+def run_chart_jobs(jobs, workers=None):
+    """Render independent chart jobs across a process pool and report per-chart times"""
+    if not jobs:
+        return pd.DataFrame(columns=['chart', 'seconds', 'error'])
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    print(f"🖼 Rendering {len(jobs)} charts with {workers} worker(s)...")
+
+    results = []
+    if workers == 1:
+        _init_render_worker()
+        for job in jobs:
+            results.append(_run_chart_job(job))
+            _report_chart(*results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker) as pool:
+            futures = [pool.submit(_run_chart_job, job) for job in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+                _report_chart(*results[-1])
+
+    timings = pd.DataFrame(results, columns=['chart', 'seconds', 'error'])
+    timings = timings.sort_values('seconds', ascending=False)
+    timings.to_csv(REPORTS/"render_timings.csv", index=False)
+    return timings
+
+def _report_chart(name, seconds, error):
+    if error:
+        print(f"⚠ {name} failed after {seconds:.2f}s: {error}")
+    else:
+        print(f"✅ {name} rendered in {seconds:.2f}s")
+
+def generate_all_visualizations(workers=None, force=False):
+    """Generate all visualizations whose inputs or chart parameters changed"""
     print("🎨 Starting visualization generation...")
 
     setup_plotting()
-    data = load_data()
+    cache = load_plot_cache()
+
+    stale = {}
+    for group in CHART_GROUPS:
+        fingerprint = chart_fingerprint(group, cache)
+        if not force and is_fresh(group, fingerprint, cache):
+            print(f"⏭ {group.__name__}: inputs unchanged, skipping")
+        else:
+            stale[group] = fingerprint
+
+    if not stale:
+        save_plot_cache(cache)
+        print("\n✅ All charts are up to date")
+        return
+
+    data = load_data({key for group in stale for key in group.inputs})
 
     if not data:
         print("⚠ No data available for visualization. Run analysis first:")
-        print("  python projects/vaccine_hesitancy/run_all.py")
+        print("  python vh.py run")
         return
 
-    # Create different types of visualizations
-    create_nfhs_visualizations(data)
-    create_twitter_visualizations(data)
-    create_regression_visualizations(data)
-    create_summary_dashboard(data)
-
-    print("\n✅ All visualizations created!")
-    print("📊 Charts saved in: projects/vaccine_hesitancy/outputs/plots/")
+    # Collect independent chart jobs from each stale section, then render them in parallel
+    jobs = []
+    group_jobs = {}
+    for group in stale:
+        group_jobs[group] = group(data)
+        jobs += group_jobs[group]
+
+    start = time.perf_counter()
+    timings = run_chart_jobs(jobs, workers)
+    failed = timings['error'].notna().sum()
+
+    # Only groups whose charts all rendered are recorded as up to date
+    failed_charts = set(timings.loc[timings['error'].notna(), 'chart'])
+    for group, fingerprint in stale.items():
+        names = [job.name for job in group_jobs[group]]
+        if names and not failed_charts.intersection(names):
+            outputs = sorted(p.name for name in names for p in PLOTS.glob(f"{name}.*"))
+            cache['groups'][group.__name__] = {'fingerprint': fingerprint, 'outputs': outputs}
+        else:
+            cache['groups'].pop(group.__name__, None)
+    save_plot_cache(cache)
+
+    print(f"\n✅ Rendered {len(timings) - failed} of {len(timings)} charts in {time.perf_counter() - start:.2f}s")
+    print(f"📊 Charts saved in: {PLOTS}")
+    print(f"⏱ Per-chart render times saved to: {REPORTS/'render_timings.csv'}")
     print("🌐 Interactive HTML charts available for web viewing")
 
 def main():
     """Main function to generate all visualizations"""
-    generate_all_visualizations()
+    parser = argparse.ArgumentParser(description="Generate vaccine hesitancy charts")
+    parser.add_argument("--workers", type=int, default=get_workers('viz'),
+                        help="Render processes (default: [workers] viz in vh.ini, else one per chart up to CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render every chart even if its inputs are unchanged")
+    args = parser.parse_args()
+    generate_all_visualizations(workers=args.workers, force=args.force)
 
 if __name__ == "__main__":
     main()
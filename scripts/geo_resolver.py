@@ -0,0 +1,216 @@
+"""
+Geography Resolver for Vaccine Hesitancy Research
+Maps free-text locations ("Mumbai", "Bengaluru, Karnataka", "Hydrabad") to
+state and district codes. A batch is normalized with Arrow string kernels and
+joined against the exact name index in one pass; only the misses go through
+greedy word n-gram lookups and a character-trigram index for misspellings
+"""
+
+from collections import namedtuple, defaultdict
+import re
+import unicodedata
+
+from lazy_imports import lazy_import
+from pipeline_config import get_path
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+
+GAZETTEER_PATH = get_path('paths', 'gazetteer')
+
+# ISO 3166-2:IN subdivision codes
+STATE_CODES = {
+    'Andaman and Nicobar Islands': 'AN', 'Andhra Pradesh': 'AP', 'Arunachal Pradesh': 'AR',
+    'Assam': 'AS', 'Bihar': 'BR', 'Chandigarh': 'CH', 'Chhattisgarh': 'CG',
+    'Dadra and Nagar Haveli and Daman and Diu': 'DH', 'Delhi': 'DL', 'Goa': 'GA',
+    'Gujarat': 'GJ', 'Haryana': 'HR', 'Himachal Pradesh': 'HP', 'Jammu and Kashmir': 'JK',
+    'Jharkhand': 'JH', 'Karnataka': 'KA', 'Kerala': 'KL', 'Ladakh': 'LA', 'Lakshadweep': 'LD',
+    'Madhya Pradesh': 'MP', 'Maharashtra': 'MH', 'Manipur': 'MN', 'Meghalaya': 'ML',
+    'Mizoram': 'MZ', 'Nagaland': 'NL', 'Odisha': 'OD', 'Puducherry': 'PY', 'Punjab': 'PB',
+    'Rajasthan': 'RJ', 'Sikkim': 'SK', 'Tamil Nadu': 'TN', 'Telangana': 'TS', 'Tripura': 'TR',
+    'Uttar Pradesh': 'UP', 'Uttarakhand': 'UK', 'West Bengal': 'WB',
+}
+
+# Longest place name in words; longer n-grams are never looked up
+MAX_NGRAM = 8
+# Minimum trigram Dice similarity for a fuzzy match, and shortest text worth fuzzing
+FUZZY_THRESHOLD = 0.7
+FUZZY_MIN_LENGTH = 4
+
+Place = namedtuple("Place", ["state", "state_code", "district", "district_code", "match"])
+UNRESOLVED = Place(None, None, None, None, None)
+
+def normalize(text):
+    """Lowercase ASCII-folded words: 'Bengaluru, Karnataka 🇮🇳' -> 'bengaluru karnataka'"""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.category(ch).startswith('M')).lower().replace('&', ' and ')
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+def _byte_table():
+    """Lowercased ASCII letters and digits; every other byte (UTF-8 lead and continuation bytes
+    included) becomes a space"""
+    table = np.full(256, ord(' '), dtype=np.uint8)
+    for ch in 'abcdefghijklmnopqrstuvwxyz0123456789':
+        table[ord(ch)] = table[ord(ch.upper())] = ord(ch)
+    return table
+
+def normalize_array(texts):
+    """normalize() over an Arrow string array, nulls kept. The few non-ASCII strings are NFKD-folded
+    and stripped of marks with Arrow kernels; then one pass over the byte buffer lowercases every
+    string and collapses its non-alphanumeric runs to single spaces"""
+    if isinstance(texts, pa.ChunkedArray):
+        return pa.chunked_array([normalize_array(chunk) for chunk in texts.chunks], type=pa.string())
+    arr = texts.cast(pa.string())
+    wide = pc.invert(pc.string_is_ascii(arr)).fill_null(False)
+    if pc.any(wide).as_py():
+        arr = pc.replace_with_mask(arr, wide, pc.replace_substring_regex(
+            pc.utf8_normalize(arr.filter(wide), 'NFKD'), r'\pM+', ''))
+    amp = pc.match_substring(arr, '&').fill_null(False)
+    if pc.any(amp).as_py():
+        arr = pc.replace_with_mask(arr, amp, pc.replace_substring(arr.filter(amp), '&', ' and '))
+
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int32)[arr.offset:arr.offset + len(arr) + 1]
+    data = arr.buffers()[2]
+    data = np.frombuffer(data, dtype=np.uint8)[offsets[0]:offsets[-1]] if data is not None else np.zeros(0, np.uint8)
+    data = _byte_table()[data]
+    word = data != ord(' ')
+    # A space survives only right after a word byte of the same string; the trailing one is trimmed
+    after_word = np.zeros_like(word)
+    after_word[1:] = word[:-1]
+    starts = offsets[:-1] - offsets[0]
+    after_word[starts[starts < len(word)]] = False
+    kept = np.flatnonzero(word | after_word)
+    out = pa.StringArray.from_buffers(len(arr), pa.py_buffer(np.searchsorted(kept, offsets - offsets[0]).astype(np.int32)),
+                                      pa.py_buffer(data[kept]))
+    out = pc.ascii_rtrim(out, ' ')
+    return pc.if_else(arr.is_valid(), out, None) if arr.null_count else out
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def district_code(state_code, district):
+    return f"{state_code}-{re.sub(r'[^A-Z0-9]+', '_', district.upper()).strip('_')}"
+
+class GeoResolver:
+    """In-memory place index; exact names are matched in bulk and every other distinct string is
+    searched at most once"""
+
+    def __init__(self, gazetteer):
+        # Every place per name ("Bilaspur" is a district in two states); the first listed is the
+        # default and the others are picked when their state is also named
+        self.places = defaultdict(list)
+        for row in gazetteer.itertuples(index=False):
+            state = row.state if isinstance(row.state, str) and row.state else None
+            district = row.district if isinstance(row.district, str) and row.district else None
+            code = STATE_CODES.get(state)
+            place = Place(state, code, district, district_code(code, district) if district and code else None,
+                          'country' if row.kind == 'country' else 'exact')
+            same = self.places[normalize(row.name)]
+            if place not in same:
+                same.append(place)
+        self.exact = {name: same[0] for name, same in self.places.items()}
+
+        # Exact index as a hash join target for whole batches
+        self.exact_names = pa.array(list(self.exact), type=pa.string())
+        self.exact_table = np.array([tuple(p) for p in self.exact.values()], dtype=object).reshape(-1, len(Place._fields))
+
+        # Character-trigram inverted index over every name, for misspelled locations
+        self.names = list(self.exact)
+        self.name_sizes = np.array([len(trigrams(name)) for name in self.names])
+        postings = defaultdict(list)
+        for i, name in enumerate(self.names):
+            for gram in trigrams(name):
+                postings[gram].append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        # Places per normalized string that missed the exact index
+        self._memo = {}
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        return cls(pd.read_csv(path, dtype=str, keep_default_na=False))
+
+    def fuzzy(self, text):
+        """Best trigram-Dice match for text, or None below FUZZY_THRESHOLD"""
+        grams = [g for g in trigrams(text) if g in self.postings]
+        if len(text) < FUZZY_MIN_LENGTH or not grams:
+            return None
+        shared = np.bincount(np.concatenate([self.postings[g] for g in grams]), minlength=len(self.names))
+        dice = 2 * shared / (len(trigrams(text)) + self.name_sizes)
+        best = int(np.argmax(dice))
+        if dice[best] < FUZZY_THRESHOLD:
+            return None
+        return self.exact[self.names[best]]._replace(match='fuzzy')
+
+    def _lookup(self, norm):
+        if norm in self.exact:
+            return self.exact[norm]
+        place = self._memo.get(norm)
+        if place is None:
+            place = self._memo[norm] = self._search(norm)
+        return place
+
+    def _search(self, norm):
+        """n-gram, then fuzzy, resolution of a normalized string with no exact match"""
+        # Greedy longest-first word n-grams, so "jammu and kashmir" wins over "jammu"
+        hits = []
+        words, i = norm.split(), 0
+        while i < len(words):
+            for n in range(min(MAX_NGRAM, len(words) - i), 0, -1):
+                places = self.places.get(' '.join(words[i:i + n]))
+                if places:
+                    hits.extend(p._replace(match='ngram') for p in places)
+                    i += n
+                    break
+            else:
+                i += 1
+
+        if not hits:
+            candidates = [norm] + [w for w in norm.split() if len(w) >= FUZZY_MIN_LENGTH]
+            hits = [p for p in map(self.fuzzy, candidates) if p]
+
+        hits = [p for p in hits if p.state]
+        if not hits:
+            return UNRESOLVED
+        # Prefer a district-level hit consistent with any state also named; a named state beats a
+        # district of the same name in another state ("Aurangabad, Bihar")
+        named = [p for p in hits if p.district is None]
+        states = {p.state for p in named}
+        districts = [p for p in hits if p.district]
+        consistent = [p for p in districts if not states or p.state in states]
+        return (consistent or named or districts)[0]
+
+    def resolve_one(self, location):
+        """Place for one location string"""
+        return self._lookup(normalize(location)) if isinstance(location, str) else UNRESOLVED
+
+    def resolve(self, locations):
+        """Places for many locations as a DataFrame. The batch is normalized and hash-joined against
+        the exact name index in Arrow; only the distinct normalized strings that miss are searched
+        (n-grams, then fuzzy), once each"""
+        values = np.asarray(locations, dtype=object)
+        try:
+            arr = pa.array(values, type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arr = pa.array([v if isinstance(v, str) else None for v in values], type=pa.string())
+        norms = normalize_array(arr)
+        row = pc.index_in(norms, value_set=self.exact_names).fill_null(-1).to_numpy(zero_copy_only=False).copy()
+
+        table = self.exact_table
+        miss = (row < 0) & norms.is_valid().to_numpy(zero_copy_only=False)
+        if miss.any():
+            missed = norms.filter(pa.array(miss))
+            distinct = pc.unique(missed)
+            searched = [tuple(self._lookup(norm)) for norm in distinct.to_pylist()]
+            table = np.concatenate([table, np.array(searched, dtype=object).reshape(-1, len(Place._fields))])
+            row[miss] = len(self.exact_table) + pc.index_in(missed, value_set=distinct).to_numpy(zero_copy_only=False)
+        # Missing and non-string locations pick up the all-None row appended at the end
+        table = np.concatenate([table, np.array([UNRESOLVED], dtype=object)])
+        row[row < 0] = len(table) - 1
+        # Object columns keep None for unresolved fields (a str dtype would turn them into NaN)
+        places = pd.DataFrame(table[row], columns=Place._fields, dtype=object)
+        places.insert(0, 'location', pd.Series(values, dtype=object))
+        return places
@@ -0,0 +1,242 @@
+"""
+Language Routing for Vaccine Hesitancy Research
+Detects the script and language of cleaned tweets in vectorized batches
+(Unicode script counts, then Hinglish marker words for Latin text) and sends
+each language to a lexicon that can score it: Devanagari Hindi to the Hindi
+lexicon, Romanized Hindi through a dictionary-backed transliteration into
+Devanagari, other Indic scripts to data/lexicons/<code>.csv when present, and
+English to the configured sentiment backend
+"""
+
+from lazy_imports import lazy_import
+from pipeline_config import get_int, get_path, settings
+from sentiment_backends import Lexicon, LexiconBackend, get_backend
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+
+LEXICON_DIR = get_path('languages', 'lexicons')
+
+# Language codes in the order of the store's language dictionary; the non-Latin scripts map one to one
+LANGUAGES = ['en', 'hi-Latn', 'hi', 'bn', 'pa', 'gu', 'or', 'ta', 'te', 'kn', 'ml', 'ur', 'other']
+LANGUAGE_NAMES = {
+    'en': 'English', 'hi-Latn': 'Hindi (Romanized)', 'hi': 'Hindi', 'bn': 'Bengali', 'pa': 'Punjabi',
+    'gu': 'Gujarati', 'or': 'Odia', 'ta': 'Tamil', 'te': 'Telugu', 'kn': 'Kannada', 'ml': 'Malayalam',
+    'ur': 'Urdu', 'other': 'Other',
+}
+SCRIPTS = {'hi': 'Devanagari', 'bn': 'Bengali', 'pa': 'Gurmukhi', 'gu': 'Gujarati', 'or': 'Oriya',
+           'ta': 'Tamil', 'te': 'Telugu', 'kn': 'Kannada', 'ml': 'Malayalam', 'ur': 'Arabic'}
+
+# Frequent Hindi function and sentiment words as they are typed in Latin script; few are English words
+HINGLISH_MARKERS = [
+    'hai', 'hain', 'nahi', 'nahin', 'nhi', 'nai', 'kya', 'kyu', 'kyun', 'kyon', 'ke', 'ki', 'ka', 'ko', 'se',
+    'mein', 'mai', 'mujhe', 'aur', 'bhi', 'tha', 'thi', 'raha', 'rahi', 'rahe', 'karo', 'karna', 'kiya',
+    'liya', 'diya', 'gaya', 'gayi', 'hua', 'hui', 'yeh', 'ye', 'woh', 'wo', 'koi', 'kuch', 'sab', 'sabko',
+    'bahut', 'bohot', 'bahot', 'abhi', 'lekin', 'magar', 'mat', 'hota', 'hoga', 'hoti', 'apna', 'apne', 'log',
+    'logon', 'ji', 'bhai', 'yaar', 'accha', 'acha', 'achha', 'sahi', 'galat', 'jaldi', 'tum', 'hum', 'aap',
+    'humein', 'unko', 'wala', 'wali', 'wale', 'toh', 'lagwa', 'lagwaya', 'lagwao', 'tika', 'teeka', 'dar',
+    'kab', 'kaise', 'kaun', 'kahan', 'bilkul', 'zaroor', 'jarur', 'pe', 'bas', 'ab', 'phir',
+]
+# English function words: Latin text is Romanized Hindi only when its Hinglish markers outnumber these
+ENGLISH_MARKERS = [
+    'the', 'is', 'are', 'was', 'and', 'of', 'to', 'in', 'for', 'it', 'this', 'that', 'with', 'my', 'you',
+    'have', 'has', 'not', 'on', 'at', 'get', 'got', 'be', 'will', 'should', 'about', 'from', 'we', 'they',
+]
+
+# Devanagari to Latin, for keying the Hindi lexicon the way Romanized Hindi is typed
+_CONSONANTS = dict(zip('कखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसह',
+                       ['k', 'kh', 'g', 'gh', 'n', 'ch', 'chh', 'j', 'jh', 'n', 't', 'th', 'd', 'dh', 'n', 't', 'th',
+                        'd', 'dh', 'n', 'p', 'ph', 'b', 'bh', 'm', 'y', 'r', 'l', 'v', 'sh', 'sh', 's', 'h']))
+_VOWELS = dict(zip('अआइईउऊऋएऐओऔ', ['a', 'aa', 'i', 'ee', 'u', 'oo', 'ri', 'e', 'ai', 'o', 'au']))
+_MATRAS = dict(zip('ािीुूृेैोौ', ['aa', 'i', 'ee', 'u', 'oo', 'ri', 'e', 'ai', 'o', 'au']))
+_VIRAMA, _NASALS = '्', {'ं': 'n', 'ँ': 'n', 'ः': 'h'}
+
+# Spelling variation in Romanized Hindi that a phonetic key folds away, applied in order:
+# aspirates and sibilants, interchangeable letters, long vowels
+_KEY_RULES = [('chh', 'c'), ('ch', 'c'), ('kh', 'k'), ('gh', 'g'), ('jh', 'j'), ('th', 't'), ('dh', 'd'),
+              ('ph', 'f'), ('bh', 'b'), ('sh', 's'), ('w', 'v'), ('z', 'j'), ('q', 'k'), ('ee', 'i'), ('oo', 'u')]
+
+def normalize_devanagari(text):
+    """Devanagari with nukta dropped and chandrabindu written as anusvara, as tweets spell them loosely"""
+    text = pc.utf8_normalize(text, form='NFD')
+    text = pc.replace_substring(text, pattern='़', replacement='')
+    return pc.utf8_normalize(pc.replace_substring(text, pattern='ँ', replacement='ं'), form='NFC')
+
+def romanize(word):
+    """Latin spelling of a Devanagari word, with the inherent 'a' after every bare consonant"""
+    out = []
+    for i, ch in enumerate(word):
+        if ch in _CONSONANTS:
+            nxt = word[i + 1] if i + 1 < len(word) else ''
+            out.append(_CONSONANTS[ch] + ('' if nxt in _MATRAS or nxt == _VIRAMA else 'a'))
+        else:
+            out.append(_VOWELS.get(ch) or _MATRAS.get(ch) or _NASALS.get(ch) or '')
+    return ''.join(out)
+
+def phonetic_key(words):
+    """Loose spelling key of Latin words (Arrow array): aspirates folded, short 'a' dropped after the
+    first letter, doubled letters collapsed and a final nasal after a vowel dropped, so 'accha',
+    'acha' and the romanized अच्छा share a key"""
+    words = pc.utf8_lower(words)
+    for pattern, replacement in _KEY_RULES:
+        words = pc.replace_substring(words, pattern=pattern, replacement=replacement)
+    words = pc.replace_substring_regex(words, pattern=r'\Ba', replacement='')
+    for letter in 'bcdefgijklmnoprstuvy':
+        words = pc.replace_substring_regex(words, pattern=f'{letter}{letter}+', replacement=letter)
+    return pc.replace_substring_regex(words, pattern=r'([eiou])n$', replacement=r'\1')
+
+def script_counts(texts):
+    """Letters per script (rows: SCRIPTS in order, then Latin) of each text, read straight from the
+    UTF-8 bytes: the Indic blocks U+0900-U+0DFF are 128 code points each, in SCRIPTS order"""
+    offset_type = np.int64 if pa.types.is_large_string(texts.type) else np.int32
+    offsets = np.frombuffer(texts.buffers()[1], dtype=offset_type)[texts.offset:texts.offset + len(texts) + 1]
+    data = np.frombuffer(texts.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]]
+    doc = np.repeat(np.arange(len(texts)), np.diff(offsets))
+    counts = np.zeros((len(SCRIPTS) + 1, len(texts)), dtype=np.int64)
+
+    lead = np.flatnonzero(data[:-2] == 0xE0)
+    cp = ((data[lead + 1].astype(np.int64) & 0x3F) << 6) | (data[lead + 2] & 0x3F)
+    block = (cp - 0x900) >> 7
+    indic = (block >= 0) & (block < 9)
+    np.add.at(counts, (block[indic], doc[lead[indic]]), 1)
+    # Arabic script (Urdu) is U+0600-U+06FF: two-byte sequences led by 0xD8-0xDB
+    arabic = (data >= 0xD8) & (data <= 0xDB)
+    counts[list(SCRIPTS).index('ur')] = np.bincount(doc[arabic], minlength=len(texts))
+    letters = ((data >= ord('a')) & (data <= ord('z'))) | ((data >= ord('A')) & (data <= ord('Z')))
+    counts[-1] = np.bincount(doc[letters], minlength=len(texts))
+    return counts
+
+def detect_languages(texts, min_markers=None):
+    """Index into LANGUAGES per text: the majority non-Latin script, or English / Romanized Hindi
+    for Latin text by counting Hinglish and English marker words"""
+    min_markers = min_markers or get_int('languages', 'hinglish_markers')
+    texts = texts.combine_chunks() if isinstance(texts, pa.ChunkedArray) else texts
+    codes = np.zeros(len(texts), dtype=np.int8)
+    latin = np.ones(len(texts), dtype=bool)
+
+    # Script counts only for texts with non-ASCII characters
+    wide = np.flatnonzero(~pc.string_is_ascii(texts).to_numpy(zero_copy_only=False))
+    if len(wide):
+        counts = script_counts(texts.take(pa.array(wide)))
+        best = counts.argmax(axis=0)
+        indic = (best < len(SCRIPTS)) & (counts.max(axis=0) > 0)
+        codes[wide[indic]] = np.array([LANGUAGES.index(lang) for lang in SCRIPTS], dtype=np.int8)[best[indic]]
+        latin[wide[indic]] = False
+        # Letters of some other script (Chinese, Cyrillic, ...) with no Indic or Latin letters
+        other = counts.max(axis=0) == 0
+        codes[wide[other]] = LANGUAGES.index('other')
+        latin[wide[other]] = False
+
+    rows = np.flatnonzero(latin)
+    if len(rows):
+        tokens = pc.utf8_split_whitespace(texts.take(pa.array(rows)))
+        words = pc.list_flatten(tokens)
+        doc = pc.list_parent_indices(tokens).to_numpy()
+        # One lookup against both lists: Hinglish markers count +1, English function words -1
+        marker = pc.index_in(words, value_set=pa.array(HINGLISH_MARKERS + ENGLISH_MARKERS))
+        marker = pc.fill_null(marker, -1).to_numpy()
+        hit = marker >= 0
+        is_hindi = marker[hit] < len(HINGLISH_MARKERS)
+        hindi = np.bincount(doc[hit][is_hindi], minlength=len(rows))
+        english = np.bincount(doc[hit][~is_hindi], minlength=len(rows))
+        codes[rows[(hindi >= min_markers) & (hindi > english)]] = LANGUAGES.index('hi-Latn')
+    return codes
+
+class Transliterator:
+    """Romanized Hindi to Devanagari for the words of a Hindi lexicon: each distinct Latin word in a
+    batch is matched on its phonetic key against the romanized lexicon, and English words are kept"""
+
+    def __init__(self, hindi, english):
+        words = (hindi.words.to_pylist() + hindi.negators + hindi.post_negators + hindi.boosters
+                 + hindi.dampeners + hindi.contrast)
+        keys = phonetic_key(pa.array([romanize(w) for w in words], type=pa.string())).to_pylist()
+        table = pd.Series(words, index=keys)
+        table = table[~table.index.duplicated(keep='first') & (table.index.str.len() > 0)]
+        self.keys = pa.array(table.index.tolist(), type=pa.string())
+        self.devanagari = pa.array(table.tolist(), type=pa.string())
+        # Words English already scores or uses as structure are never transliterated
+        self.english = pa.array(english.words.to_pylist() + english.negators + english.post_negators
+                                + english.boosters + english.dampeners + english.contrast + ENGLISH_MARKERS,
+                                type=pa.string())
+
+    def __call__(self, texts):
+        """Texts with every recognized Romanized Hindi word replaced by its Devanagari spelling"""
+        tokens = pc.utf8_split_whitespace(texts)
+        words = pc.dictionary_encode(pc.list_flatten(tokens))
+        vocab = words.dictionary
+        match = pc.index_in(phonetic_key(vocab), value_set=self.keys)
+        match = pc.if_else(pc.is_in(vocab, value_set=self.english), pa.scalar(None, pa.int32()), match)
+        vocab = pc.coalesce(self.devanagari.take(match), vocab)
+        flat = vocab.take(words.indices)
+        return pc.binary_join(pa.ListArray.from_arrays(tokens.offsets, flat), ' ')
+
+class LanguageRouter:
+    """Scores each language with its own lexicon and English with the configured backend; each
+    route's scores are labelled with that route's scorer's thresholds"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self.name = self.backend.name
+        self.english = Lexicon.load(get_path('sentiment', 'lexicon'))
+        self.languages = LANGUAGES
+        self._routes = {}
+
+    def lexicon(self, lang):
+        """The lexicon file for a language, or None"""
+        path = LEXICON_DIR/f"{lang.split('-')[0]}.csv"
+        return Lexicon.load(path) if path.exists() else None
+
+    def route(self, lang):
+        """(prepare, scorer, description) for a language, built on first use"""
+        if lang not in self._routes:
+            native = self.lexicon(lang) if lang not in ('en', 'other') else None
+            if native is None:
+                # No lexicon for the language: English words in it are still scored
+                self._routes[lang] = (None, self.backend, self.backend.name)
+            elif lang == 'hi-Latn':
+                native = self.normalized(native)
+                self._routes[lang] = (Transliterator(native, self.english),
+                                      LexiconBackend(lexicon=self.english.merge(native)),
+                                      "lexicon en+hi (transliterated)")
+            else:
+                self._routes[lang] = (normalize_devanagari if lang == 'hi' else None,
+                                      LexiconBackend(lexicon=self.english.merge(self.normalized(native))),
+                                      f"lexicon en+{lang}")
+        return self._routes[lang]
+
+    @staticmethod
+    def normalized(lexicon):
+        """Devanagari lexicon words spelled as normalize_devanagari spells tweets"""
+        fix = lambda words: normalize_devanagari(pa.array(words, type=pa.string())).to_pylist()
+        return Lexicon(fix(lexicon.words.to_pylist()), lexicon.valence, fix(lexicon.negators),
+                       fix(lexicon.boosters), fix(lexicon.dampeners), fix(lexicon.contrast),
+                       fix(lexicon.post_negators))
+
+    def score(self, texts):
+        """Scores and LANGUAGES indices for an Arrow array of cleaned texts"""
+        texts = texts.combine_chunks() if isinstance(texts, pa.ChunkedArray) else texts
+        codes = detect_languages(texts)
+        scores = np.zeros(len(texts))
+        for code in np.flatnonzero(np.bincount(codes, minlength=len(LANGUAGES))):
+            rows = np.flatnonzero(codes == code)
+            prepare, scorer, _ = self.route(LANGUAGES[code])
+            batch = texts.take(pa.array(rows))
+            scores[rows] = scorer.score(prepare(batch) if prepare else batch)
+        return scores, codes
+
+    def thresholds(self, codes):
+        """(negative, positive) label thresholds per text, from the scorer of each text's route"""
+        negative, positive = np.zeros(len(codes)), np.zeros(len(codes))
+        for code in np.flatnonzero(np.bincount(codes, minlength=len(LANGUAGES))):
+            rows = codes == code
+            negative[rows], positive[rows] = self.route(LANGUAGES[code])[1].thresholds
+        return negative, positive
+
+    def scored_with(self, languages):
+        """How each language is scored, for the outputs"""
+        return {lang: self.route(lang)[2] for lang in languages}
+
+def routing_enabled():
+    return settings.getboolean('languages', 'enabled')
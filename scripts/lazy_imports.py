@@ -0,0 +1,36 @@
+"""
+Lazy Imports for Vaccine Hesitancy Research
+Heavy libraries are bound at module level but only imported on first use,
+so `--help`, no-op reruns and light code paths start fast
+"""
+
+import importlib
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_import(name):
+    """Return a LazyModule for name; the import runs the first time an attribute is used"""
+    return LazyModule(name)
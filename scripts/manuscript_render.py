@@ -0,0 +1,100 @@
+"""
+Manuscript Rendering for Vaccine Hesitancy Research
+Precompiled document templates and vectorized Markdown table blocks
+"""
+
+from pathlib import Path
+from functools import lru_cache
+import operator
+import re
+import string
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+TEMPLATES = Path(__file__).resolve().parent/"templates"
+
+# Template fields are a context name, optionally with one arithmetic step: {rate-.02:.1%}, {n//2:,}
+FIELD_PATTERN = re.compile(r"^\s*(\w+)\s*(?:(//|\+|-|\*)\s*([\d.]+))?\s*$")
+OPERATORS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '//': operator.floordiv}
+
+class CompiledTemplate:
+    """A str.format-style template parsed once and rendered many times"""
+
+    def __init__(self, text):
+        self.parts = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if field is None:
+                self.parts.append((literal, None, None, None))
+                continue
+            match = FIELD_PATTERN.match(field)
+            if not match:
+                raise ValueError(f"Unsupported template field: {{{field}}}")
+            name, op, operand = match.groups()
+            if op:
+                operand = int(operand) if op == '//' else float(operand)
+            self.parts.append((literal, name, (OPERATORS[op], operand) if op else None, spec))
+
+    @property
+    def fields(self):
+        return sorted({name for _, name, _, _ in self.parts if name})
+
+    def render(self, context):
+        """Fill the template from a mapping of field names to values"""
+        out = []
+        for literal, name, step, spec in self.parts:
+            out.append(literal)
+            if name is None:
+                continue
+            value = context[name]
+            if step:
+                value = step[0](value, step[1])
+            out.append(format(value, spec or ''))
+        return ''.join(out)
+
+@lru_cache(maxsize=None)
+def load_template(name):
+    """Compile a template from scripts/templates once per process"""
+    with open(TEMPLATES/name, "r", encoding="utf-8") as f:
+        return CompiledTemplate(f.read())
+
+def fmt_count(values):
+    """Integers with thousands separators"""
+    digits = pd.Series(np.char.mod('%d', np.asarray(values, dtype=np.int64)))
+    return digits.str.replace(r"(\d)(?=(\d{3})+$)", r"\1,", regex=True)
+
+def fmt_percent(values, decimals=1):
+    """Proportions as percentages"""
+    return pd.Series(np.char.mod(f'%.{decimals}f%%', np.asarray(values, dtype=np.float64) * 100))
+
+def fmt_float(values, decimals=3):
+    """Fixed-point numbers"""
+    return pd.Series(np.char.mod(f'%.{decimals}f', np.asarray(values, dtype=np.float64)))
+
+def fmt_text(values):
+    return pd.Series(np.asarray(values, dtype=str))
+
+def significance_stars(p_values):
+    """***, **, * or blank by p-value threshold"""
+    p = np.asarray(p_values, dtype=np.float64)
+    return pd.Series(np.select([p < 0.001, p < 0.01, p < 0.05], ["***", "**", "*"], default=""))
+
+def markdown_table(columns, title=None):
+    """Render a Markdown table from {header: formatted string Series} in one pass"""
+    headers = list(columns)
+    cells = [s.reset_index(drop=True) for s in columns.values()]
+
+    rows = "| " + cells[0]
+    for cell in cells[1:]:
+        rows = rows + " | " + cell
+    rows = rows + " |"
+
+    lines = []
+    if title:
+        lines += ["", f"**{title}**", ""]
+    lines.append("| " + " | ".join(headers) + " |")
+    lines.append("|" + "|".join("-" * (len(h) + 2) for h in headers) + "|")
+    lines.extend(rows.tolist())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,105 @@
+"""
+Mock News Sites for Vaccine Hesitancy Research
+Local stand-in news sites for testing the news fetcher offline: each site
+(one port) serves generated article pages, some syndicated across sites or
+reachable through redirects and tracking links, and one site can be made
+slow or flaky to check that it does not stall the run
+"""
+
+import argparse
+import asyncio
+import random
+
+from lazy_imports import lazy_import
+from pipeline_config import DATA_DIR
+
+web = lazy_import("aiohttp.web")
+
+PARAGRAPHS = [
+    "Health officials said the vaccination drive reached remote districts this week, with mobile teams visiting villages.",
+    "Parents in several towns told reporters they were unsure about side effects and wanted more information from doctors.",
+    "Experts warned that misinformation shared on messaging apps was making people hesitant to get vaccinated.",
+    "The state government announced new registration centres and extended hours at primary health clinics.",
+    "Community health workers described door-to-door visits to answer questions about vaccine safety.",
+    "A survey found that trust in local doctors strongly predicted whether families completed the schedule.",
+    "Officials praised the response, calling the campaign a great success for public health.",
+    "Some residents said long queues and a lack of doses left them frustrated and angry.",
+]
+
+def article_html(site, n, seed):
+    """Deterministic article page; every fifth article is syndicated (same text on every site)"""
+    syndicated = n % 5 == 0
+    rng = random.Random(n if syndicated else seed * 100003 + n)
+    body = ''.join(f"<p>{p}</p>" for p in rng.sample(PARAGRAPHS, 4))
+    title = f"Vaccine report {n}" if syndicated else f"Site {site}: vaccine report {n}"
+    return (f"<html><head><title>{title}</title>"
+            f"<meta property=\"article:published_time\" content=\"2024-0{1 + n % 9}-{10 + n % 18}T08:00:00Z\">"
+            f"<script>var tracking = 'ignored';</script></head><body>"
+            f"<nav><a href=\"/\">Home</a> <a href=\"/health\">Health</a></nav>"
+            f"<article><h1>{title}</h1>{body}</article>"
+            f"<footer>Copyright site {site}</footer></body></html>")
+
+def build_site(site, articles, latency=0.0, fail_rate=0.0):
+    async def article(request):
+        n = int(request.match_info['n'])
+        if n >= articles:
+            raise web.HTTPNotFound()
+        if latency:
+            await asyncio.sleep(latency)
+        if fail_rate and random.random() < fail_rate:
+            raise web.HTTPServiceUnavailable()
+        return web.Response(text=article_html(site, n, site), content_type='text/html')
+
+    async def short_link(request):
+        # Redirects to an article, so the fetcher must dedupe on the final URL
+        raise web.HTTPFound(f"/articles/{request.match_info['n']}.html")
+
+    app = web.Application()
+    app.router.add_get("/articles/{n:\\d+}.html", article)
+    app.router.add_get("/s/{n:\\d+}", short_link)
+    return app
+
+def url_list(ports, articles):
+    """Every article on every site, plus redirect and tracking-parameter aliases of a few"""
+    urls = []
+    for port in ports:
+        base = f"http://127.0.0.1:{port}"
+        urls += [f"{base}/articles/{n}.html" for n in range(articles)]
+        urls += [f"{base}/s/{n}" for n in range(0, articles, 7)]
+        urls += [f"{base}/articles/{n}.html?utm_source=feed#comments" for n in range(0, articles, 11)]
+    return urls
+
+async def serve(ports, articles, slow_site, latency, fail_rate):
+    runners = []
+    for i, port in enumerate(ports):
+        slow = i == slow_site
+        app = build_site(i, articles, latency if slow else 0.0, fail_rate if slow else 0.0)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        runners.append(runner)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve local fixture news sites for the news fetcher")
+    ap.add_argument("--port", type=int, default=8800, help="Port of the first site; others follow")
+    ap.add_argument("--sites", type=int, default=4)
+    ap.add_argument("--articles", type=int, default=250, help="Articles per site")
+    ap.add_argument("--slow-site", type=int, default=0, help="Index of the slow, flaky site (-1 for none)")
+    ap.add_argument("--latency-ms", type=float, default=2000, help="Response delay on the slow site")
+    ap.add_argument("--fail-rate", type=float, default=0.05, help="Share of 503s on the slow site")
+    ap.add_argument("--write-urls", default=str(DATA_DIR/"news"/"mock_urls.txt"),
+                    help="Where to write the URL list for the fetcher")
+    args = ap.parse_args()
+
+    ports = [args.port + i for i in range(args.sites)]
+    urls = url_list(ports, args.articles)
+    with open(args.write_urls, "w", encoding="utf-8") as f:
+        f.write("\n".join(urls) + "\n")
+    print(f"🧪 Serving {args.sites} sites x {args.articles} articles on ports {ports[0]}-{ports[-1]}; "
+          f"{len(urls):,} URLs written to {args.write_urls}")
+    asyncio.run(serve(ports, args.articles, args.slow_site, args.latency_ms / 1000, args.fail_rate))
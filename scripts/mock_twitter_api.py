@@ -0,0 +1,118 @@
+"""
+Mock X API for Vaccine Hesitancy Research
+A local stand-in for the v2 search endpoint that replays fixture tweets as
+paginated JSON pages, with optional latency, rate limiting and injected
+failures, so the tweet collector can be exercised offline
+"""
+
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import bisect
+import random
+import time
+
+from lazy_imports import lazy_import
+from pipeline_config import DATA_DIR
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+web = lazy_import("aiohttp.web")
+
+FIXTURE_PATH = DATA_DIR/"twitter"/"vaccine_tweets_india.csv"
+SEARCH_PATH = "/2/tweets/search/all"
+
+def load_fixtures(path=FIXTURE_PATH, scale=1, seed=42):
+    """Fixture tweets sorted by time: each row of the CSV repeated `scale` times at random times that day"""
+    df = pd.read_csv(path)
+    rng = np.random.default_rng(seed)
+    days = pd.to_datetime(df['date']).to_numpy('datetime64[s]').astype(np.int64)
+    n = len(df) * scale
+    rows = np.tile(np.arange(len(df)), scale)
+    stamps = days[rows] + rng.integers(0, 86400, n)
+    order = np.argsort(stamps, kind='stable')
+    rows, stamps = rows[order], stamps[order]
+
+    locations = df['user_location'].fillna('').astype(str).to_numpy()
+    tweets = []
+    for i, (row, stamp) in enumerate(zip(rows.tolist(), stamps.tolist())):
+        tweets.append({
+            'id': str(1_300_000_000_000_000_000 + i),
+            'text': str(df['text'].iat[row]),
+            'created_at': datetime.fromtimestamp(stamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'author_id': str(10_000 + row % 997),
+            'public_metrics': {'retweet_count': int(df['retweets'].iat[row]), 'like_count': int(df['likes'].iat[row])},
+            '_location': locations[row],
+        })
+    return stamps.tolist(), tweets
+
+def parse_time(text):
+    return int(datetime.strptime(text, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp())
+
+def build_app(stamps, tweets, latency=0.0, rate_limit=0, rate_window=900, fail_rate=0.0):
+    """aiohttp application serving SEARCH_PATH over the fixture tweets"""
+    window = {'start': time.time(), 'requests': 0}
+    counters = {'requests': 0, 'rate_limited': 0, 'failed': 0}
+
+    async def search(request):
+        counters['requests'] += 1
+        if latency:
+            await asyncio.sleep(latency)
+
+        if rate_limit:
+            now = time.time()
+            if now - window['start'] >= rate_window:
+                window.update(start=now, requests=0)
+            window['requests'] += 1
+            reset = int(window['start'] + rate_window)
+            headers = {'x-rate-limit-limit': str(rate_limit), 'x-rate-limit-reset': str(reset),
+                       'x-rate-limit-remaining': str(max(rate_limit - window['requests'], 0))}
+            if window['requests'] > rate_limit:
+                counters['rate_limited'] += 1
+                return web.json_response({'title': 'Too Many Requests'}, status=429, headers=headers)
+        if fail_rate and random.random() < fail_rate:
+            counters['failed'] += 1
+            return web.json_response({'title': 'Service Unavailable'}, status=503)
+
+        query = request.query
+        if 'query' not in query:
+            return web.json_response({'title': 'Invalid Request', 'detail': 'query is required'}, status=400)
+        lo = bisect.bisect_left(stamps, parse_time(query['start_time'])) if 'start_time' in query else 0
+        hi = bisect.bisect_left(stamps, parse_time(query['end_time'])) if 'end_time' in query else len(stamps)
+        size = min(max(int(query.get('max_results', 10)), 10), 500)
+        offset = lo + int(query.get('next_token', 0))
+
+        page = tweets[offset:min(offset + size, hi)]
+        data = [{k: v for k, v in t.items() if k != '_location'} for t in page]
+        users = {t['author_id']: {'id': t['author_id'], 'location': t['_location']} for t in page}
+        meta = {'result_count': len(data)}
+        if offset + size < hi:
+            meta['next_token'] = str(offset + size - lo)
+        body = {'meta': meta}
+        if data:
+            body.update(data=data, includes={'users': list(users.values())})
+        return web.json_response(body)
+
+    async def stats(request):
+        return web.json_response(counters)
+
+    app = web.Application()
+    app.router.add_get(SEARCH_PATH, search)
+    app.router.add_get("/stats", stats)
+    return app
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve fixture tweets as a local X API v2 search endpoint")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fixtures", default=str(FIXTURE_PATH), help="Tweet CSV to replay")
+    ap.add_argument("--scale", type=int, default=1, help="Copies of each fixture tweet (for volume tests)")
+    ap.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response")
+    ap.add_argument("--rate-limit", type=int, default=0, help="Requests allowed per window (0 = unlimited)")
+    ap.add_argument("--rate-window", type=int, default=900, help="Rate-limit window in seconds")
+    ap.add_argument("--fail-rate", type=float, default=0, help="Share of requests answered with HTTP 503")
+    args = ap.parse_args()
+
+    stamps, tweets = load_fixtures(args.fixtures, args.scale)
+    print(f"🧪 Serving {len(tweets):,} fixture tweets at http://127.0.0.1:{args.port}{SEARCH_PATH}")
+    web.run_app(build_app(stamps, tweets, args.latency_ms / 1000, args.rate_limit, args.rate_window,
+                          args.fail_rate), host="127.0.0.1", port=args.port, print=None)
@@ -0,0 +1,429 @@
+"""
+Predictive Models for Vaccine Hesitancy Research
+A modeling track beside the statsmodels Logit: L1- and L2-regularized logistic
+regression along a warm-started path of penalties, and histogram gradient
+boosting on the categorical codes. Respondents are collapsed to their distinct
+covariate patterns with hesitant and not-hesitant counts as sample weights (the
+likelihood is unchanged), so millions of rows train as a few thousand weighted
+rows. Cross-validation folds run in parallel worker processes, and permutation
+importance is scored on batches of sampled respondents
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import time
+import warnings
+
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS, settings, get_int, get_workers
+from nfhs_store import NFHSStore, STORE_PATH
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+linear_model = lazy_import("sklearn.linear_model")
+ensemble = lazy_import("sklearn.ensemble")
+metrics = lazy_import("sklearn.metrics")
+exceptions = lazy_import("sklearn.exceptions")
+stats = lazy_import("scipy.stats")
+
+OUTR = OUTPUTS/"reports"
+TABS = OUTPUTS/"tables"
+CV_PATH = OUTR/"model_cv_scores.csv"
+COEF_PATH = OUTR/"model_coefficients.csv"
+PERMUTATION_PATH = OUTR/"permutation_importance.csv"
+CALIBRATION_PATH = OUTR/"model_calibration.csv"
+PREDICTIONS_PATH = TABS/"model_predictions.csv"
+
+# Same predictors as the Logit (education as its categories rather than education_level)
+FEATURES = ['gender', 'education', 'rural', 'age', 'religion', 'wealth_index']
+
+# Numeric columns with fewer distinct values than this are treated as categories, as in build_design_matrix
+MAX_NUMERIC_LEVELS = 20
+
+def float_list(section, key):
+    return [float(v) for v in settings.get(section, key).split(',') if v.strip()]
+
+class Design:
+    """Feature columns as category codes (-1 = missing) or numbers, and their one-hot encoding"""
+
+    def __init__(self, names, kinds, categories, mean=None, scale=None):
+        self.names = list(names)
+        self.kinds = list(kinds)
+        self.categories = list(categories)
+        self.mean = mean or {}
+        self.scale = scale or {}
+
+    @classmethod
+    def from_store(cls, store, features=FEATURES):
+        """Design and (rows x features) float matrix read from the memory-mapped store columns"""
+        names, kinds, categories, columns = [], [], [], []
+        for name in features:
+            if name not in store:
+                continue
+            values = np.asarray(store.column(name))
+            kind, labels = 'categorical', store.categories.get(name)
+            if labels is not None:
+                column = values.astype(np.float64)
+                column[column < 0] = np.nan
+            else:
+                levels = np.sort(pd.unique(values))
+                if len(levels) < MAX_NUMERIC_LEVELS:
+                    labels = [str(v) for v in levels]
+                    column = np.searchsorted(levels, values).astype(np.float64)
+                else:
+                    kind, column = 'numeric', values.astype(np.float64)
+            names.append(name)
+            kinds.append(kind)
+            categories.append(labels)
+            columns.append(column)
+        design = cls(names, kinds, categories)
+        X = np.column_stack(columns) if columns else np.empty((store.n_rows, 0))
+        for j, kind in enumerate(design.kinds):
+            if kind == 'numeric':
+                design.mean[j] = float(np.nanmean(X[:, j]))
+                design.scale[j] = float(np.nanstd(X[:, j])) or 1.0
+        return design, X
+
+    @property
+    def categorical_mask(self):
+        return np.array([kind == 'categorical' for kind in self.kinds])
+
+    @property
+    def columns(self):
+        """One-hot column names: feature[level] for categories, the feature name for numbers"""
+        out = []
+        for name, kind, labels in zip(self.names, self.kinds, self.categories):
+            out.extend([f"{name}[{label}]" for label in labels] if kind == 'categorical' else [name])
+        return out
+
+    def one_hot(self, X):
+        """Dense one-hot / standardized matrix for the linear models (missing -> all zeros / mean)"""
+        blocks = []
+        for j, kind in enumerate(self.kinds):
+            if kind == 'categorical':
+                block = np.zeros((len(X), len(self.categories[j])))
+                known = ~np.isnan(X[:, j])
+                block[np.flatnonzero(known), X[known, j].astype(np.int64)] = 1.0
+            else:
+                block = np.nan_to_num((X[:, [j]] - self.mean[j]) / self.scale[j])
+            blocks.append(block)
+        return np.hstack(blocks) if blocks else np.empty((len(X), 0))
+
+def pattern_ids(X):
+    """Id of each row's distinct combination of values, and the first row of each combination"""
+    key = np.zeros(len(X), dtype=np.int64)
+    for j in range(X.shape[1]):
+        codes, uniques = pd.factorize(X[:, j], use_na_sentinel=False)
+        # Re-factorize after each column so the combined key never overflows
+        key, _ = pd.factorize(key * len(uniques) + codes)
+    first = np.empty(int(key.max()) + 1 if len(key) else 0, dtype=np.int64)
+    first[key[::-1]] = np.arange(len(key))[::-1]
+    return key, first
+
+def compress(X, y, folds):
+    """Distinct covariate patterns and their (pattern x fold x outcome) respondent counts,
+    plus each respondent's pattern id"""
+    key, first = pattern_ids(X)
+    n_patterns = len(first)
+    n_folds = int(folds.max()) + 1
+    counts = np.bincount(key * (n_folds * 2) + folds * 2 + y, minlength=n_patterns * n_folds * 2)
+    return X[first], counts.reshape(n_patterns, n_folds, 2), key
+
+def weighted_rows(patterns, counts):
+    """Each pattern once as a non-hesitant and once as a hesitant row, weighted by its counts
+    (weights normalized to mean 1, which keeps the solvers' step sizes sane)"""
+    X = np.vstack([patterns, patterns])
+    y = np.r_[np.zeros(len(patterns), dtype=np.int8), np.ones(len(patterns), dtype=np.int8)]
+    w = np.r_[counts[:, 0], counts[:, 1]].astype(np.float64)
+    keep = w > 0
+    X, y, w = X[keep], y[keep], w[keep]
+    return X, y, w / w.mean(), w.sum()
+
+def make_logistic(penalty, alpha, n_rows, max_iter):
+    """Logistic regression with penalty strength alpha per respondent; C is rescaled for the
+    normalized weights of n_rows weighted rows"""
+    params = {'C': 1.0 / (alpha * n_rows), 'solver': 'saga' if penalty == 'l1' else 'lbfgs',
+              'warm_start': True, 'max_iter': max_iter, 'random_state': get_int('model', 'seed')}
+    if linear_model.LogisticRegression().get_params()['penalty'] == 'deprecated':
+        # scikit-learn >= 1.8 spells the penalty as l1_ratio
+        params['l1_ratio'] = 1.0 if penalty == 'l1' else 0.0
+    else:
+        params['penalty'] = penalty
+    return linear_model.LogisticRegression(**params)
+
+def fit_path(penalty, alphas, Xd, y, w, max_iter):
+    """One model per alpha, strongest penalty first, each starting from the previous solution"""
+    model, path = None, []
+    for alpha in sorted(alphas, reverse=True):
+        if model is None:
+            model = make_logistic(penalty, alpha, len(y), max_iter)
+        else:
+            model.set_params(C=1.0 / (alpha * len(y)))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", exceptions.ConvergenceWarning)
+            model.fit(Xd, y, sample_weight=w)
+        path.append((alpha, model.coef_.ravel().copy(), float(model.intercept_[0])))
+    return path
+
+def predict_linear(Xd, coef, intercept):
+    return 1 / (1 + np.exp(-(Xd @ coef + intercept)))
+
+def make_boosting(design, params, l2_regularization=0.0):
+    return ensemble.HistGradientBoostingClassifier(
+        categorical_features=design.categorical_mask if design.categorical_mask.any() else None,
+        max_iter=params['max_iter'], learning_rate=params['learning_rate'],
+        max_leaf_nodes=params['max_leaf_nodes'], l2_regularization=l2_regularization,
+        early_stopping=True, validation_fraction=params['validation_fraction'],
+        n_iter_no_change=params['patience'], scoring='loss', random_state=params['seed'])
+
+def fit_boosting(design, params, X, y, respondents):
+    """Gradient boosting on pattern rows weighted by their respondent counts. Rows are patterns, so
+    a minimum leaf size would count patterns; instead each leaf is shrunk toward zero as if it held
+    leaf_respondents more respondents at the overall rate, whatever the number of patterns in it"""
+    rate = np.average(y, weights=respondents)
+    l2 = params['leaf_respondents'] * rate * (1 - rate)
+    return make_boosting(design, params, l2).fit(X, y, sample_weight=respondents)
+
+def scores(p, y, w):
+    """Weighted log loss, AUC and Brier score"""
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return {
+        'log_loss': metrics.log_loss(y, p, sample_weight=w, labels=[0, 1]),
+        'auc': metrics.roc_auc_score(y, p, sample_weight=w) if len(np.unique(y)) > 1 else np.nan,
+        'brier': metrics.brier_score_loss(y, p, sample_weight=w),
+    }
+
+def _run_fold(fold, design, patterns, counts, params):
+    """Fit every candidate on the other folds and score it on this one (runs in a worker)"""
+    train = counts.sum(axis=1) - counts[:, fold]
+    test = counts[:, fold]
+    X, y, w, total = weighted_rows(patterns, train)
+    Xt = np.vstack([patterns, patterns])
+    yt = np.r_[np.zeros(len(patterns), np.int8), np.ones(len(patterns), np.int8)]
+    wt = np.r_[test[:, 0], test[:, 1]].astype(np.float64)
+    keep = wt > 0
+    Xd, Xtd = design.one_hot(X), design.one_hot(Xt[keep])
+
+    rows, predictions = [], {}
+    for penalty in params['penalties']:
+        for alpha, coef, intercept in fit_path(penalty, params['alphas'], Xd, y, w, params['max_iter']):
+            p = predict_linear(Xtd, coef, intercept)
+            rows.append({'model': f'logistic_{penalty}', 'alpha': alpha, 'fold': fold,
+                         'nonzero': int(np.sum(np.abs(coef) > 1e-8)), **scores(p, yt[keep], wt[keep])})
+            predictions[(f'logistic_{penalty}', alpha)] = predict_linear(design.one_hot(patterns), coef, intercept)
+
+    boosting = fit_boosting(design, params['boosting'], X, y, w * total / len(w))
+    p = boosting.predict_proba(Xt[keep])[:, 1]
+    rows.append({'model': 'gradient_boosting', 'alpha': np.nan, 'fold': fold,
+                 'nonzero': np.nan, **scores(p, yt[keep], wt[keep])})
+    predictions[('gradient_boosting', None)] = boosting.predict_proba(patterns)[:, 1]
+    return rows, predictions
+
+def model_params():
+    return {
+        'penalties': [p.strip() for p in settings.get('model', 'penalties').split(',') if p.strip()],
+        'alphas': float_list('model', 'alphas'),
+        'max_iter': get_int('model', 'max_iter'),
+        'boosting': {
+            'max_iter': get_int('model', 'boosting_iter'),
+            'learning_rate': settings.getfloat('model', 'learning_rate'),
+            'max_leaf_nodes': get_int('model', 'max_leaf_nodes'),
+            'leaf_respondents': settings.getfloat('model', 'leaf_respondents'),
+            'validation_fraction': settings.getfloat('model', 'validation_fraction'),
+            'patience': get_int('model', 'patience'),
+            'seed': get_int('model', 'seed'),
+        },
+    }
+
+def cross_validate(design, patterns, counts, params, workers=None):
+    """Per-fold scores for every candidate, and each candidate's out-of-fold pattern predictions"""
+    n_folds = counts.shape[1]
+    workers = workers or min(n_folds, os.cpu_count() or 1)
+    if workers == 1:
+        results = [_run_fold(f, design, patterns, counts, params) for f in range(n_folds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_fold, range(n_folds), [design] * n_folds, [patterns] * n_folds,
+                                    [counts] * n_folds, [params] * n_folds))
+    scores_df = pd.DataFrame([row for rows, _ in results for row in rows])
+    oof = {key: np.stack([preds[key] for _, preds in results], axis=1) for key in results[0][1]}
+    return scores_df, oof
+
+def summarize_cv(scores_df):
+    """Mean and SD of each metric per candidate, with the chosen alpha flagged for each model"""
+    summary = (scores_df.groupby(['model', 'alpha'], dropna=False)
+               .agg(log_loss=('log_loss', 'mean'), log_loss_sd=('log_loss', 'std'),
+                    auc=('auc', 'mean'), auc_sd=('auc', 'std'), brier=('brier', 'mean'),
+                    nonzero=('nonzero', 'mean'))
+               .reset_index())
+    best = summary.groupby('model')['log_loss'].idxmin()
+    summary['selected'] = summary.index.isin(best)
+    return summary.sort_values(['model', 'alpha'], ascending=[True, False]).reset_index(drop=True)
+
+def calibration(oof, counts, bins=10):
+    """Out-of-fold predicted vs observed hesitancy by predicted-risk decile; respondents with the
+    same prediction always share a decile, so deciles can be fewer or uneven when predictions tie"""
+    w = np.concatenate([counts[:, :, 0].ravel(), counts[:, :, 1].ravel()]).astype(np.float64)
+    y = np.r_[np.zeros(counts[:, :, 0].size), np.ones(counts[:, :, 1].size)]
+    p = np.concatenate([oof.ravel(), oof.ravel()])
+    keep = w > 0
+    p, y, w = p[keep], y[keep], w[keep]
+    # Cut on the cumulative weight before each distinct prediction, not before each row
+    value, uniques = pd.factorize(p, sort=True)
+    block = np.bincount(value, weights=w, minlength=len(uniques))
+    start = (np.cumsum(block) - block) / w.sum()
+    decile = np.minimum((start * bins + 1e-9).astype(np.int64), bins - 1)[value]
+    frame = pd.DataFrame({'decile': decile + 1, 'w': w, 'wp': w * p, 'wy': w * y})
+    out = frame.groupby('decile').sum()
+    return pd.DataFrame({'decile': out.index, 'respondents': out['w'].round().astype(np.int64),
+                         'mean_predicted': out['wp'] / out['w'], 'observed_rate': out['wy'] / out['w']})
+
+def permutation_importance(predict, design, X, y, repeats, batch_rows, seed):
+    """Increase in log loss (and drop in AUC) when each feature is shuffled across the sampled
+    respondents; all repeats of a feature are predicted together, each distinct row once,
+    batch_rows at a time"""
+    rng = np.random.default_rng(seed)
+
+    def batched(Xb):
+        key, first = pattern_ids(Xb)
+        distinct = Xb[first]
+        p = np.concatenate([predict(distinct[s:s + batch_rows]) for s in range(0, len(distinct), batch_rows)])
+        return p[key]
+
+    base = scores(batched(X), y, None)
+    rows = []
+    for j, name in enumerate(design.names):
+        stacked = np.tile(X, (repeats, 1))
+        for r in range(repeats):
+            stacked[r * len(X):(r + 1) * len(X), j] = X[rng.permutation(len(X)), j]
+        p = batched(stacked).reshape(repeats, len(X))
+        runs = [scores(p[r], y, None) for r in range(repeats)]
+        losses = np.array([run['log_loss'] for run in runs]) - base['log_loss']
+        aucs = base['auc'] - np.array([run['auc'] for run in runs])
+        rows.append({'feature': name, 'log_loss_increase': losses.mean(), 'log_loss_increase_sd': losses.std(),
+                     'auc_drop': aucs.mean()})
+    return pd.DataFrame(rows)
+
+def fit_selected(selected, design, patterns, counts, params):
+    """Fit each selected candidate to (pattern x outcome) counts: a predictor per model, and the
+    logistic models' coefficients"""
+    X, y, w, total = weighted_rows(patterns, counts)
+    Xd = design.one_hot(X)
+    predictors, coefficients = {}, []
+    for row in selected.itertuples():
+        if row.model == 'gradient_boosting':
+            boosting = fit_boosting(design, params['boosting'], X, y, w * total / len(w))
+            predictors[row.model] = lambda Xb, m=boosting: m.predict_proba(Xb)[:, 1]
+        else:
+            penalty = row.model.split('_')[1]
+            alphas = [a for a in params['alphas'] if a >= row.alpha]
+            _, coef, intercept = fit_path(penalty, alphas, Xd, y, w, params['max_iter'])[-1]
+            predictors[row.model] = lambda Xb, c=coef, b=intercept: predict_linear(design.one_hot(Xb), c, b)
+            coefficients.append(pd.DataFrame({'model': row.model, 'alpha': row.alpha,
+                                              'feature': ['intercept'] + design.columns,
+                                              'coefficient': np.r_[intercept, coef]}))
+    return predictors, coefficients
+
+def train_models(store_path=STORE_PATH, workers=None):
+    """Cross-validate, refit the selected models on all respondents and write the reports"""
+    try:
+        store = NFHSStore.open(store_path)
+    except FileNotFoundError:
+        print("⚠ NFHS store not found. Run data cleaning first:")
+        print("  python vh.py clean")
+        return
+
+    start = time.perf_counter()
+    params = model_params()
+    n_folds, seed = get_int('model', 'folds'), get_int('model', 'seed')
+    design, X = Design.from_store(store)
+    if not design.names:
+        print("⚠ No suitable features found for the model track")
+        return
+    y = np.asarray(store.outcome).astype(np.int64)
+    rng = np.random.default_rng(seed)
+    folds = rng.integers(0, n_folds, len(y))
+    patterns, counts, pattern_of = compress(X, y, folds)
+    print(f"🧮 Model track: {len(y):,} respondents as {len(patterns):,} covariate patterns, "
+          f"{len(design.columns)} encoded features, {n_folds}-fold CV")
+
+    scores_df, oof = cross_validate(design, patterns, counts, params, workers)
+    summary = summarize_cv(scores_df)
+    print(f"⏱ Cross-validated {len(summary)} candidates in {time.perf_counter() - start:.1f}s")
+
+    # Refit each selected candidate on everyone
+    selected = summary[summary['selected']]
+    predictors, coefficients = fit_selected(selected, design, patterns, counts.sum(axis=1), params)
+    predictions = pd.DataFrame({name: (np.asarray(design.categories[j] + [None], dtype=object)[
+        np.nan_to_num(patterns[:, j], nan=-1).astype(np.int64)] if design.kinds[j] == 'categorical' else patterns[:, j])
+        for j, name in enumerate(design.names)})
+    predictions['respondents'] = counts.sum(axis=(1, 2))
+    predictions['hesitant'] = counts[:, :, 1].sum(axis=1)
+    calibrations = []
+    for row in selected.itertuples():
+        predictions[row.model] = predictors[row.model](patterns)
+        key = (row.model, None if row.model == 'gradient_boosting' else row.alpha)
+        calibrations.append(calibration(oof[key], counts).assign(model=row.model))
+
+    # Permutation importance is measured on held-out respondents (fold 0), in batches, with the
+    # selected candidates refitted on the other folds so overfitting does not pass for importance
+    held_out, _ = fit_selected(selected, design, patterns, counts.sum(axis=1) - counts[:, 0], params)
+    pool = np.flatnonzero(folds == 0)
+    sample = rng.choice(pool, size=min(len(pool), get_int('model', 'importance_rows')), replace=False)
+    X_sample, y_sample = patterns[pattern_of[sample]], y[sample]
+    importance = pd.concat([
+        permutation_importance(predict, design, X_sample, y_sample, get_int('model', 'importance_repeats'),
+                               get_int('model', 'batch_rows'), seed).assign(model=name)
+        for name, predict in held_out.items()], ignore_index=True)
+
+    OUTR.mkdir(parents=True, exist_ok=True)
+    TABS.mkdir(parents=True, exist_ok=True)
+    summary.round(5).to_csv(CV_PATH, index=False)
+    if coefficients:
+        pd.concat(coefficients, ignore_index=True).round(5).to_csv(COEF_PATH, index=False)
+    importance = importance[['model', 'feature', 'log_loss_increase', 'log_loss_increase_sd', 'auc_drop']]
+    importance.sort_values(['model', 'log_loss_increase'], ascending=[True, False]).round(6).to_csv(PERMUTATION_PATH, index=False)
+    calibration_df = pd.concat(calibrations, ignore_index=True)
+    calibration_df[['model', 'decile', 'respondents', 'mean_predicted', 'observed_rate']].round(5).to_csv(CALIBRATION_PATH, index=False)
+    predictions.round(5).to_csv(PREDICTIONS_PATH, index=False)
+
+    for row in selected.itertuples():
+        alpha = f" (alpha {row.alpha:g}, {row.nonzero:.0f} nonzero)" if row.model != 'gradient_boosting' else ""
+        print(f"📊 {row.model}{alpha}: CV log loss {row.log_loss:.4f}, AUC {row.auc:.3f}")
+    print(f"✅ Model track saved to reports/{CV_PATH.name}, {PERMUTATION_PATH.name}, {CALIBRATION_PATH.name} "
+          f"and tables/{PREDICTIONS_PATH.name} ({time.perf_counter() - start:.1f}s)")
+
+def penalized_logit(X, y, alpha=None):
+    """Fallback for the statsmodels Logit under (quasi-)separation: an L2-penalized fit of the
+    same design, with Wald intervals from the penalized information matrix"""
+    alpha = alpha or settings.getfloat('model', 'fallback_alpha')
+    Xv = X.astype(float).to_numpy()
+    has_const = 'const' in X.columns
+    features = Xv[:, 1:] if has_const else Xv
+    model = make_logistic('l2', alpha, len(y), get_int('model', 'max_iter'))
+    model.set_params(warm_start=False)
+    model.fit(features, np.asarray(y))
+    params = np.r_[model.intercept_, model.coef_.ravel()] if has_const else model.coef_.ravel()
+    p = 1 / (1 + np.exp(-(Xv @ params)))
+    penalty = np.full(len(params), alpha * len(y))
+    if has_const:
+        penalty[0] = 0.0
+    information = (Xv * (p * (1 - p))[:, None]).T @ Xv + np.diag(penalty)
+    se = np.sqrt(np.diag(np.linalg.pinv(information)))
+    z = params / se
+    results_df = pd.DataFrame({
+        'coefficient': params,
+        'odds_ratio': np.exp(params),
+        'conf_int_lower': np.exp(params - 1.96 * se),
+        'conf_int_upper': np.exp(params + 1.96 * se),
+        'p_value': 2 * stats.norm.sf(np.abs(z))
+    }, index=X.columns)
+    return model, results_df, se
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validate regularized logistic and gradient-boosted hesitancy models")
+    parser.add_argument("--workers", type=int, default=get_workers('model'),
+                        help="Processes for the CV folds (default: [workers] model in vh.ini, else one per fold)")
+    args = parser.parse_args()
+    train_models(workers=args.workers)
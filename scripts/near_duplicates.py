@@ -0,0 +1,153 @@
+"""
+Near-Duplicate Detection for Vaccine Hesitancy Research
+Groups copy-paste and lightly edited tweets into clusters with MinHash
+signatures of word shingles and locality-sensitive hashing (banding), so
+campaigns can be down-weighted before aggregation. Signatures are computed
+in vectorized batches over distinct texts and candidates come from shared
+LSH buckets, never from pairwise comparison
+"""
+
+from lazy_imports import lazy_import
+from pipeline_config import get_int, settings
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+csgraph = lazy_import("scipy.sparse.csgraph")
+sparse = lazy_import("scipy.sparse")
+
+def mix64(x):
+    """splitmix64 finalizer: a fast, well-spread 64-bit hash of uint64 values (wrapping arithmetic)"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def shingle_hashes(text, k):
+    """64-bit hashes of the k-word shingles of each text, and the text each shingle belongs to;
+    texts shorter than k words get one shingle of all their words"""
+    tokens = pc.utf8_split_whitespace(text)
+    lengths = pc.list_value_length(tokens).to_numpy(zero_copy_only=False).astype(np.int64)
+    words = pc.dictionary_encode(pc.list_flatten(tokens))
+    # Hash each distinct word once, then gather
+    vocab = pd.util.hash_array(words.dictionary.to_numpy(zero_copy_only=False)).astype(np.uint64)
+    h = vocab[words.indices.to_numpy()]
+
+    doc = np.repeat(np.arange(len(lengths)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    pos = np.arange(len(h)) - starts[doc]
+    length = lengths[doc]
+
+    shingle = h.copy()
+    last = max(len(h) - 1, 0)
+    for t in range(1, k):
+        more = pos + t < length
+        nxt = h[np.minimum(np.arange(len(h)) + t, last)]
+        shingle = np.where(more, mix64(shingle * np.uint64(0x9E3779B97F4A7C15) + nxt), shingle)
+    keep = (pos + k <= length) | ((pos == 0) & (length < k))
+    return shingle[keep], doc[keep]
+
+class MinHashLSH:
+    """MinHash signatures in bands; texts sharing a band bucket and enough signature agreement are linked"""
+
+    def __init__(self, num_perm=None, bands=None, shingle=None, threshold=None, seed=None):
+        self.num_perm = num_perm or get_int('dedup', 'num_perm')
+        self.bands = bands or get_int('dedup', 'bands')
+        self.shingle = shingle or get_int('dedup', 'shingle')
+        self.threshold = threshold if threshold is not None else settings.getfloat('dedup', 'threshold')
+        if self.num_perm % self.bands:
+            raise ValueError(f"num_perm ({self.num_perm}) must be a multiple of bands ({self.bands})")
+        # Multiply-shift hash family over the mixed shingle hashes: odd multipliers, high 32 bits kept
+        rng = np.random.default_rng(seed if seed is not None else get_int('dedup', 'seed'))
+        self.mult = rng.integers(0, 2**63, self.num_perm, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+        self.add = rng.integers(0, 2**63, self.num_perm, dtype=np.int64).astype(np.uint64)
+
+    def signatures(self, text):
+        """uint32 MinHash signature (texts x num_perm) of an Arrow string array of non-empty texts"""
+        shingles, doc = shingle_hashes(text, self.shingle)
+        shingles = mix64(shingles)
+        sig = np.empty((len(text), self.num_perm), dtype=np.uint32)
+        if len(text) == 0:
+            return sig
+        # Shingles are grouped by text in order, so each text's minimum is one reduceat segment
+        first = np.flatnonzero(np.r_[True, doc[1:] != doc[:-1]])
+        hashed = np.empty_like(shingles)
+        for j in range(self.num_perm):
+            np.multiply(shingles, self.mult[j], out=hashed)
+            np.add(hashed, self.add[j], out=hashed)
+            np.right_shift(hashed, np.uint64(32), out=hashed)
+            sig[:, j] = np.minimum.reduceat(hashed, first)
+        return sig
+
+    def candidate_edges(self, sig):
+        """(text, bucket leader) pairs sharing a band bucket whose signatures agree above the threshold"""
+        rows = self.num_perm // self.bands
+        n = len(sig)
+        src, dst = [], []
+        for b in range(self.bands):
+            band = sig[:, b * rows:(b + 1) * rows].astype(np.uint64)
+            key = np.zeros(n, dtype=np.uint64)
+            for c in range(rows):
+                key = mix64(key ^ (band[:, c] + np.uint64((c + 1) * 0x9E3779B97F4A7C15 % 2**64)))
+            order = np.argsort(key, kind='stable')
+            sorted_key = key[order]
+            new_bucket = np.r_[True, sorted_key[1:] != sorted_key[:-1]]
+            # Each text links to the first (lowest-index) text in its bucket
+            leader = order[np.maximum.accumulate(np.where(new_bucket, np.arange(n), 0))]
+            linked = leader != order
+            src.append(order[linked])
+            dst.append(leader[linked])
+        src, dst = np.concatenate(src), np.concatenate(dst)
+        if len(src):
+            # A pair may share several bands; verify each once
+            pairs = np.unique(np.stack([src, dst], axis=1), axis=0)
+            src, dst = pairs[:, 0], pairs[:, 1]
+            agree = (sig[src] == sig[dst]).mean(axis=1)
+            src, dst = src[agree >= self.threshold], dst[agree >= self.threshold]
+        return src, dst
+
+    def cluster(self, text, batch_rows=None):
+        """Cluster id per distinct text (int32, numbered 0.. in order of first appearance)"""
+        n = len(text)
+        # Small batches keep each pass over the shingle hashes in cache
+        batch_rows = batch_rows or get_int('dedup', 'batch_rows') or max(n, 1)
+        sig = np.concatenate([self.signatures(text.slice(start, batch_rows))
+                              for start in range(0, n, batch_rows)] or [np.empty((0, self.num_perm), np.uint32)])
+        src, dst = self.candidate_edges(sig)
+        graph = sparse.coo_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n)).tocsr()
+        _, labels = csgraph.connected_components(graph, directed=False)
+        # Renumber so cluster ids follow the texts' order
+        _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        return np.argsort(np.argsort(first)).astype(np.int32)[inverse]
+
+def cluster_tweets(clean_text, batch_rows=None, lsh=None):
+    """Near-duplicate cluster id per tweet; identical texts are collapsed before hashing"""
+    uniques = pc.unique(clean_text)
+    positions = pc.index_in(clean_text, value_set=uniques).to_numpy(zero_copy_only=False)
+    return (lsh or MinHashLSH()).cluster(uniques, batch_rows)[positions]
+
+def cluster_table(store, top=None):
+    """Largest near-duplicate clusters: size, distinct texts, date span, mean sentiment and an example"""
+    clusters = store.table['cluster'].to_numpy()
+    sizes = np.bincount(clusters)
+    repeated = np.flatnonzero(sizes > 1)
+    if top:
+        repeated = repeated[np.argsort(-sizes[repeated], kind='stable')][:top]
+    members = np.isin(clusters, repeated)
+    df = pd.DataFrame({
+        'cluster': clusters[members],
+        'day': store.days()[members],
+        'sentiment': store.scores()[members],
+        'text': store.table['clean_text'].filter(pa.array(members)).to_numpy(zero_copy_only=False),
+    })
+    df['day'] = df['day'].where(df['day'] >= 0)
+    grouped = df.groupby('cluster', sort=False)
+    out = grouped.agg(tweets=('text', 'size'), distinct_texts=('text', 'nunique'),
+                      first_day=('day', 'min'), last_day=('day', 'max'),
+                      sentiment=('sentiment', 'mean'), example=('text', 'first')).reset_index()
+    for col in ('first', 'last'):
+        out[f'{col}_date'] = pd.to_datetime(out.pop(f'{col}_day'), unit='D').dt.strftime('%Y-%m-%d')
+    return (out.round({'sentiment': 3})
+            .sort_values(['tweets', 'cluster'], ascending=[False, True]).reset_index(drop=True))
@@ -0,0 +1,280 @@
+"""
+News Fetcher for Vaccine Hesitancy Research
+Fetches news article URLs concurrently (a bounded worker pool with per-host
+connection limits, so one slow site cannot hold every worker), extracts the
+body text, drops duplicate URLs and duplicate content, and scores sentiment
+in batches with the same engine and cleaning rules as tweets
+"""
+
+from collections import namedtuple
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import argparse
+import asyncio
+import hashlib
+import re
+import time
+
+from lazy_imports import lazy_import
+from pipeline_config import DATA_DIR, OUTPUTS, get_int, get_chunk_rows, settings
+from tweet_store import clean_text_array, score_unique, route_unique, label_array
+from sentiment_backends import BACKENDS, get_backend
+from language_routing import LANGUAGES, LanguageRouter, routing_enabled
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+aiohttp = lazy_import("aiohttp")
+
+NEWS_DIR = DATA_DIR/"news"
+TABS = OUTPUTS/"tables"
+ARTICLES_PATH = TABS/"news_articles.csv"
+DUPLICATES_PATH = TABS/"news_duplicates.csv"
+FAILURES_PATH = TABS/"news_failures.csv"
+
+ARTICLE_COLUMNS = ['url', 'final_url', 'host', 'source', 'title', 'date', 'fetched_at',
+                   'content_hash', 'words', 'text', 'sentiment', 'label', 'backend', 'language']
+
+# Query parameters that only track the click and never change the article
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|ref|ref_src|cmpid|ocid)$', re.I)
+
+Fetched = namedtuple("Fetched", ["url", "final_url", "status", "html", "error"])
+
+def normalize_url(url):
+    """Canonical form for URL dedupe: lowercase scheme and host, no fragment, tracking
+    parameters or trailing slash, remaining query parameters sorted"""
+    parts = urlsplit(str(url).strip())
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not TRACKING_PARAMS.match(k)))
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip('/') or '/', query, ''))
+
+def content_hash(text):
+    """Hash of the text with case and whitespace normalized, for dedupe across URLs"""
+    return hashlib.sha1(' '.join(text.lower().split()).encode('utf-8')).hexdigest()
+
+class ArticleParser(HTMLParser):
+    """Title, publication date and paragraph text of an article page"""
+
+    SKIP = {'script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'figure', 'svg'}
+    BLOCKS = {'p', 'h1', 'h2', 'h3', 'li', 'blockquote'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.published = ''
+        self.paragraphs = []
+        self.loose = []
+        self._skip = 0
+        self._in_title = False
+        self._block = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag == 'title':
+            self._in_title = True
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            key = attrs.get('property') or attrs.get('name') or ''
+            if key in ('og:title',) and attrs.get('content'):
+                self.title = attrs['content']
+            elif key in ('article:published_time', 'date', 'pubdate') and attrs.get('content'):
+                self.published = self.published or attrs['content'][:10]
+        elif tag in self.BLOCKS and not self._skip:
+            self._block = []
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(self._skip - 1, 0)
+        elif tag == 'title':
+            self._in_title = False
+        elif tag in self.BLOCKS and self._block is not None:
+            text = ' '.join(''.join(self._block).split())
+            if text:
+                self.paragraphs.append(text)
+            self._block = None
+
+    def handle_data(self, data):
+        if self._in_title and not self.title:
+            self.title = data.strip()
+        elif self._skip:
+            return
+        elif self._block is not None:
+            self._block.append(data)
+        elif data.strip():
+            self.loose.append(data.strip())
+
+    @property
+    def text(self):
+        # Pages without paragraph markup fall back to all visible text
+        return '\n'.join(self.paragraphs) if self.paragraphs else ' '.join(self.loose)
+
+def extract_article(html):
+    """(title, published date, body text) from an HTML page"""
+    parser = ArticleParser()
+    parser.feed(html)
+    parser.close()
+    return parser.title, parser.published, parser.text
+
+def read_url_lists(directory=NEWS_DIR):
+    """URLs to fetch from *.txt (one per line) and *.csv (a url column, plus optional source, title, date)"""
+    frames = []
+    for path in sorted(directory.glob("*.csv")):
+        df = pd.read_csv(path, dtype=str)
+        if 'url' in df.columns:
+            frames.append(df)
+    for path in sorted(directory.glob("*.txt")):
+        with open(path, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        frames.append(pd.DataFrame({'url': urls}))
+    if not frames:
+        return pd.DataFrame(columns=['url'])
+    urls = pd.concat(frames, ignore_index=True)
+    return urls[urls['url'].notna()]
+
+class NewsFetcher:
+    """Bounded concurrent fetching over one pooled session, limited per host"""
+
+    def __init__(self, workers=None, per_host=None, timeout=None, max_bytes=None):
+        self.workers = workers or get_int('news', 'workers')
+        self.per_host = per_host or get_int('news', 'per_host')
+        self.timeout = timeout or get_int('news', 'timeout')
+        self.max_bytes = max_bytes or get_int('news', 'max_bytes')
+        self.user_agent = settings.get('news', 'user_agent')
+
+    async def fetch_one(self, session, slots, host_slots, url):
+        # Wait for the host first, so URLs queued behind a slow site do not hold a worker slot
+        async with host_slots[urlsplit(url).netloc], slots:
+            try:
+                async with session.get(url) as resp:
+                    body = await resp.content.read(self.max_bytes)
+                    if resp.status != 200:
+                        return Fetched(url, str(resp.url), resp.status, None, f"HTTP {resp.status}")
+                    if 'html' not in resp.headers.get('Content-Type', 'text/html'):
+                        return Fetched(url, str(resp.url), resp.status, None, "not an HTML page")
+                    return Fetched(url, str(resp.url), resp.status,
+                                   body.decode(resp.get_encoding() or 'utf-8', errors='replace'), None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError, LookupError) as e:
+                return Fetched(url, url, None, None, type(e).__name__ + (f": {e}" if str(e) else ""))
+
+    async def fetch_all(self, urls, progress_every=500):
+        """Fetched results for every URL, in completion order"""
+        slots = asyncio.Semaphore(self.workers)
+        host_slots = {host: asyncio.Semaphore(self.per_host) for host in {urlsplit(u).netloc for u in urls}}
+        connector = aiohttp.TCPConnector(limit=self.workers, limit_per_host=self.per_host, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        results = []
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={'User-Agent': self.user_agent}) as session:
+            tasks = [asyncio.create_task(self.fetch_one(session, slots, host_slots, u)) for u in urls]
+            for done in asyncio.as_completed(tasks):
+                results.append(await done)
+                if len(results) % progress_every == 0:
+                    print(f"  ... {len(results):,}/{len(urls):,} fetched")
+        return results
+
+def score_articles(texts, backend=None):
+    """Sentiment, labels and language for article texts, cleaned as tweets are and scored in batches
+    (language is None without language routing)"""
+    backend = backend or get_backend()
+    clean = clean_text_array(pa.array(texts, type=pa.string()))
+    batch_rows = get_chunk_rows('tweet_rows') or max(len(clean), 1)
+    starts = range(0, len(clean), batch_rows)
+    languages, thresholds = None, backend.thresholds
+    if routing_enabled():
+        router = LanguageRouter(backend)
+        routed = [route_unique(clean.slice(start, batch_rows), router) for start in starts]
+        sentiment = np.concatenate([s for s, _ in routed] or [np.empty(0)])
+        codes = np.concatenate([lang for _, lang in routed] or [np.empty(0, np.int8)])
+        languages, thresholds = np.array(LANGUAGES)[codes], router.thresholds(codes)
+    else:
+        sentiment = np.concatenate([score_unique(clean.slice(start, batch_rows), backend)
+                                    for start in starts] or [np.empty(0)])
+    return sentiment, label_array(sentiment, thresholds).to_pandas().astype(str).to_numpy(), languages
+
+def ingest_news(min_words=None, backend=None):
+    """Fetch every URL not already ingested, then dedupe, score and append the new articles"""
+    listed = read_url_lists()
+    if listed.empty:
+        print(f"⚠ No news URL lists found in {NEWS_DIR}. Run data extraction first:")
+        print("  python vh.py extract")
+        return
+    min_words = min_words or get_int('news', 'min_words')
+
+    existing = pd.read_csv(ARTICLES_PATH, dtype=str) if ARTICLES_PATH.exists() else pd.DataFrame(columns=ARTICLE_COLUMNS)
+    known_duplicates = (pd.read_csv(DUPLICATES_PATH, dtype=str) if DUPLICATES_PATH.exists()
+                        else pd.DataFrame(columns=['url', 'duplicate_of']))
+    # Each kept article is reachable by its listed and final URL; duplicates are not fetched again
+    by_url = dict(zip(existing['url'], existing['url']))
+    by_url.update(zip(existing['final_url'], existing['url']))
+    by_hash = dict(zip(existing['content_hash'], existing['url']))
+    seen_urls = set(by_url) | set(known_duplicates['url'])
+
+    listed = listed.assign(url=listed['url'].map(normalize_url)).drop_duplicates('url')
+    todo = listed[~listed['url'].isin(seen_urls)]
+    print(f"📰 {len(listed):,} distinct URLs listed, {len(todo):,} not yet ingested")
+    if todo.empty:
+        return
+
+    start = time.perf_counter()
+    fetched = asyncio.run(NewsFetcher().fetch_all(todo['url'].tolist()))
+    elapsed = time.perf_counter() - start
+
+    meta = todo.set_index('url')
+    rows, duplicates, failures = [], [], []
+    fetched_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    for item in fetched:
+        if item.error:
+            failures.append({'url': item.url, 'status': item.status, 'error': item.error})
+            continue
+        title, published, text = extract_article(item.html)
+        if len(text.split()) < min_words:
+            failures.append({'url': item.url, 'status': item.status, 'error': f"under {min_words} words of text"})
+            continue
+        final_url = normalize_url(item.final_url)
+        digest = content_hash(text)
+        # Redirects and syndicated copies land on a URL or text already ingested
+        original = by_url.get(final_url) or by_hash.get(digest)
+        if original:
+            duplicates.append({'url': item.url, 'duplicate_of': original})
+            continue
+        by_url[final_url] = by_url[item.url] = by_hash[digest] = item.url
+        listed_row = meta.loc[item.url]
+        rows.append({
+            'url': item.url, 'final_url': final_url, 'host': urlsplit(final_url).netloc,
+            'source': listed_row.get('source') if pd.notna(listed_row.get('source')) else urlsplit(final_url).netloc,
+            'title': title or (listed_row.get('title') if pd.notna(listed_row.get('title')) else ''),
+            'date': published or (listed_row.get('date') if pd.notna(listed_row.get('date')) else ''),
+            'fetched_at': fetched_at, 'content_hash': digest, 'words': len(text.split()), 'text': text,
+        })
+
+    articles = pd.DataFrame(rows, columns=ARTICLE_COLUMNS)
+    if len(articles):
+        backend = get_backend(backend)
+        articles['sentiment'], articles['label'], articles['language'] = score_articles(articles['text'].tolist(), backend)
+        articles['backend'] = backend.name
+        articles['sentiment'] = articles['sentiment'].round(6)
+    TABS.mkdir(parents=True, exist_ok=True)
+    pd.concat([existing, articles], ignore_index=True).to_csv(ARTICLES_PATH, index=False)
+    pd.concat([known_duplicates, pd.DataFrame(duplicates, columns=['url', 'duplicate_of'])],
+              ignore_index=True).to_csv(DUPLICATES_PATH, index=False)
+    # Failures are retried on the next run, so only the latest ones are kept
+    pd.DataFrame(failures, columns=['url', 'status', 'error']).to_csv(FAILURES_PATH, index=False)
+
+    print(f"✅ Fetched {len(fetched):,} URLs in {elapsed:.1f}s ({len(fetched) / max(elapsed, 1e-9):,.0f}/s): "
+          f"{len(articles):,} new articles, {len(duplicates):,} duplicates, {len(failures):,} failed")
+    if len(articles):
+        print(f"📊 Sentiment distribution: {articles['label'].value_counts().to_dict()}")
+    if failures:
+        print(f"⚠ Failures listed in {FAILURES_PATH}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fetch, extract, dedupe and score news articles listed in data/news")
+    ap.add_argument("--min-words", type=int, help="Shortest article body kept (default from vh.ini [news])")
+    ap.add_argument("--backend", choices=list(BACKENDS), help="Sentiment backend (default: [sentiment] backend)")
+    args = ap.parse_args()
+    ingest_news(args.min_words, args.backend)
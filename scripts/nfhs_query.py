@@ -0,0 +1,140 @@
+"""
+NFHS Query Engine for Vaccine Hesitancy Research
+Bitmap indexes over categorical codes for fast filtered hesitancy rates
+"""
+
+import json
+
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS, get_path
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+TABLES = OUTPUTS/"tables"
+INDEX_PATH = get_path('cache', 'query_index')
+
+# Columns that can be filtered or grouped on, in dashboard order
+INDEX_COLUMNS = ['state', 'district', 'gender', 'education', 'rural_urban',
+                 'wealth_index', 'religion', 'income']
+
+# Above this many values a column is filtered on its codes instead of bitmaps
+BITMAP_MAX_CARDINALITY = 64
+
+def build_query_index(df, path=INDEX_PATH):
+    """Encode categorical columns as integer codes with packed bitmaps and save the index"""
+    arrays = {'outcome': df['vaccine_hesitant'].to_numpy(dtype=np.uint8)}
+    categories = {}
+
+    for col in INDEX_COLUMNS:
+        if col not in df.columns:
+            continue
+        codes, uniques = pd.factorize(_as_text(df[col]), sort=True)
+        codes = codes.astype(np.min_scalar_type(-max(len(uniques), 1)))
+
+        arrays[f"codes_{col}"] = codes
+        categories[col] = [str(u) for u in uniques]
+
+        if len(uniques) <= BITMAP_MAX_CARDINALITY:
+            arrays[f"bitmap_{col}"] = _packed_bitmaps(codes, len(uniques))
+
+    arrays['categories'] = np.array(json.dumps(categories))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **arrays)
+    print(f"✅ Query index saved: {len(df):,} rows, {len(categories)} indexed columns")
+
+def _as_text(series):
+    """Values as strings with missing values as 'nan' (a category of their own, so every row has a
+    code); a categorical column is converted through its categories rather than row by row"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(str).fillna('nan')
+    text = series.cat.rename_categories([str(c) for c in series.cat.categories])
+    if text.isna().any():
+        if 'nan' not in text.cat.categories:
+            text = text.cat.add_categories(['nan'])
+        text = text.fillna('nan')
+    return text.cat.reorder_categories(sorted(text.cat.categories))
+
+def _packed_bitmaps(codes, n_values):
+    """One packed bitmap row per category value (a byte-wide mask per value at a time, so the
+    scratch memory is one byte per row)"""
+    bitmaps = np.empty((n_values, (len(codes) + 7) // 8), dtype=np.uint8)
+    for value in range(n_values):
+        bitmaps[value] = np.packbits(codes == value)
+    return bitmaps
+
+class NFHSQueryEngine:
+    """Answer filtered, grouped hesitancy-rate queries from a bitmap index"""
+
+    def __init__(self, arrays):
+        self.outcome = arrays['outcome']
+        self.n_rows = len(self.outcome)
+        self.categories = json.loads(str(arrays['categories']))
+        self.codes = {col: arrays[f"codes_{col}"] for col in self.categories}
+        self.bitmaps = {col: arrays[f"bitmap_{col}"] for col in self.categories
+                        if f"bitmap_{col}" in arrays}
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """Load a saved index fully into memory"""
+        with np.load(path) as npz:
+            return cls({key: npz[key] for key in npz.files})
+
+    @property
+    def columns(self):
+        return list(self.categories)
+
+    def mask(self, filters=None):
+        """Combine per-value bitmaps into a row mask; None means no filtering"""
+        packed = None
+        code_masks = []
+        for col, values in (filters or {}).items():
+            if not values or col not in self.categories:
+                continue
+            lookup = {v: i for i, v in enumerate(self.categories[col])}
+            selected = [lookup[v] for v in values if v in lookup]
+
+            if col not in self.bitmaps:
+                code_masks.append(np.isin(self.codes[col], selected))
+                continue
+
+            # OR within a column, AND across columns
+            col_bits = np.bitwise_or.reduce(self.bitmaps[col][selected], axis=0) if selected \
+                else np.zeros(self.bitmaps[col].shape[1], dtype=np.uint8)
+            packed = col_bits if packed is None else packed & col_bits
+
+        if packed is None and not code_masks:
+            return None
+        mask = np.ones(self.n_rows, dtype=bool) if packed is None \
+            else np.unpackbits(packed, count=self.n_rows).view(bool)
+        for code_mask in code_masks:
+            mask &= code_mask
+        return mask
+
+    def rates(self, group_by, filters=None):
+        """Grouped respondent counts and hesitancy rates for the filtered rows"""
+        mask = self.mask(filters)
+        codes = self.codes[group_by]
+        outcome = self.outcome
+        if mask is not None:
+            codes = codes[mask]
+            outcome = outcome[mask]
+
+        k = len(self.categories[group_by])
+        counts = np.bincount(codes, minlength=k)
+        hesitant = np.bincount(codes, weights=outcome, minlength=k)
+
+        result = pd.DataFrame({
+            group_by: self.categories[group_by],
+            'count': counts,
+            'hesitant': hesitant.astype(np.int64)
+        })
+        result = result[result['count'] > 0].copy()
+        result['hesitancy_rate'] = result['hesitant'] / result['count']
+        return result.reset_index(drop=True)
+
+    def overall(self, filters=None):
+        """Respondent count and hesitancy rate for the filtered rows"""
+        mask = self.mask(filters)
+        outcome = self.outcome if mask is None else self.outcome[mask]
+        return len(outcome), (outcome.mean() if len(outcome) else float('nan'))
@@ -0,0 +1,153 @@
+"""
+NFHS Columnar Store for Vaccine Hesitancy Research
+The cleaned NFHS data materialized once as memory-mapped column files
+(categorical codes in the narrowest signed integer type, outcome as uint8) that any number of
+worker processes can attach to without copying or pickling the frame
+"""
+
+from functools import lru_cache
+import hashlib
+import json
+import shutil
+
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS, get_path
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+STORE_PATH = get_path('paths', 'nfhs_store')
+CSV_PATH = OUTPUTS/"tables"/"nfhs_clean.csv"
+OUTCOME = 'vaccine_hesitant'
+
+def write_nfhs_store(df, path=STORE_PATH):
+    """Write df as one .npy file per column plus meta.json, replacing any previous store"""
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    meta = {'rows': len(df), 'columns': {}}
+    digest = hashlib.sha256()
+    for col in df.columns:
+        series = df[col]
+        if col == OUTCOME:
+            values, entry = series.to_numpy(dtype=np.uint8), {'kind': 'outcome'}
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            values = pd.to_numeric(series, downcast='integer').to_numpy()
+            entry = {'kind': 'numeric'}
+        else:
+            # Missing values get code -1 and decode back to NaN; the code type must hold -1 and len - 1
+            codes, uniques = pd.factorize(series, sort=True)
+            values = codes.astype(np.min_scalar_type(-max(len(uniques), 1)))
+            entry = {'kind': 'categorical', 'categories': [str(u) for u in uniques]}
+
+        entry.update({'file': f"{col}.npy", 'dtype': values.dtype.str})
+        np.save(tmp/entry['file'], np.ascontiguousarray(values))
+        digest.update(col.encode())
+        digest.update(values.tobytes())
+        meta['columns'][col] = entry
+
+    # The digest changes only when the data does, so meta.json can stand in for the store in caches
+    meta['digest'] = digest.hexdigest()
+    with open(tmp/"meta.json", "w") as f:
+        json.dump(meta, f, indent=1)
+
+    # Workers still attached to the old files keep their mappings until they exit
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.rename(path)
+    size_mb = sum(f.stat().st_size for f in path.glob("*.npy")) / 1e6
+    print(f"✅ NFHS store saved: {len(df):,} rows, {len(meta['columns'])} columns, {size_mb:.1f} MB")
+
+class NFHSStore:
+    """Read-only, memory-mapped view of the NFHS columnar store"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        with open(path/"meta.json", "r") as f:
+            self.meta = json.load(f)
+        self.n_rows = self.meta['rows']
+        self._arrays = {}
+
+    @classmethod
+    def open(cls, path=STORE_PATH):
+        return cls(path)
+
+    # Only the path crosses process boundaries; each worker maps the files itself
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    @property
+    def columns(self):
+        return list(self.meta['columns'])
+
+    @property
+    def categories(self):
+        return {col: entry['categories'] for col, entry in self.meta['columns'].items()
+                if entry['kind'] == 'categorical'}
+
+    def __contains__(self, col):
+        return col in self.meta['columns']
+
+    def column(self, col):
+        """Raw stored array for col (codes for categorical columns), memory-mapped read-only"""
+        if col not in self._arrays:
+            self._arrays[col] = np.load(self.path/self.meta['columns'][col]['file'], mmap_mode='r')
+        return self._arrays[col]
+
+    @property
+    def outcome(self):
+        return self.column(OUTCOME)
+
+    def code_of(self, col, value):
+        """Code of one category value, or None if it does not occur"""
+        try:
+            return self.meta['columns'][col]['categories'].index(str(value))
+        except ValueError:
+            return None
+
+    def group_rows(self, col):
+        """Row indices for each value of a column, from one stable sort of its codes (numeric
+        columns are factorized first; missing values belong to no group)"""
+        if col in self.categories:
+            codes, labels = self.column(col), self.categories[col]
+        else:
+            codes, uniques = pd.factorize(np.asarray(self.column(col)), sort=True)
+            labels = uniques.tolist()
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        return {value: order[bounds[i]:bounds[i + 1]]
+                for i, value in enumerate(labels) if bounds[i + 1] > bounds[i]}
+
+    def values(self, col, rows=None):
+        """Decoded values of col, for all rows or only the given row indices"""
+        data = self.column(col)
+        data = np.asarray(data) if rows is None else data[rows]
+        entry = self.meta['columns'][col]
+        if entry['kind'] != 'categorical':
+            # Compact integers are widened back so arithmetic like 1 - y cannot wrap around
+            return data.astype(np.int64) if data.dtype.kind in 'iu' else np.asarray(data)
+        # Code -1 indexes the trailing None, i.e. a missing value
+        labels = np.array(entry['categories'] + [None], dtype=object)
+        return labels[data]
+
+    def to_frame(self, columns=None, rows=None):
+        """Materialize a DataFrame of the given columns and rows (all by default)"""
+        columns = [c for c in (columns or self.columns) if c in self]
+        return pd.DataFrame({col: self.values(col, rows) for col in columns})
+
+@lru_cache(maxsize=None)
+def _attached(path):
+    return NFHSStore.open(path)
+
+def attach(path=None):
+    """The store for this process, opened once and shared by every caller"""
+    return _attached(path or STORE_PATH)
+
+def load_nfhs_frame(columns=None):
+    """Cleaned NFHS data from the columnar store, falling back to nfhs_clean.csv"""
+    if (STORE_PATH/"meta.json").exists():
+        return attach().to_frame(columns)
+    return pd.read_csv(CSV_PATH, usecols=columns)
@@ -0,0 +1,178 @@
+"""
+Pipeline Configuration for Vaccine Hesitancy Research
+Paths, chunk sizes, worker counts and cache locations, read once from vh.ini
+(or the file named by $VH_CONFIG) so throughput can be tuned without code edits
+"""
+
+from pathlib import Path
+import configparser
+import os
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CONFIG_PATH = Path(os.environ.get("VH_CONFIG", PROJECT_ROOT/"vh.ini")).resolve()
+
+# Used for any key the config file leaves out; relative paths resolve against [paths] base,
+# which itself resolves against the directory holding the config file (default: project root)
+DEFAULTS = {
+    'paths': {
+        'base': str(PROJECT_ROOT),
+        'data': 'data',
+        'outputs': 'outputs',
+        'nfhs_store': 'outputs/tables/nfhs_store',
+        'tweet_store': 'outputs/tables/tweets.arrow',
+        'gazetteer': 'data/geo/india_places.csv',
+        'trends_store': 'outputs/tables/trends',
+        'tweets_collected': 'data/twitter/collected',
+        'topic_index': 'outputs/tables/topic_index',
+    },
+    'cache': {
+        'plot_cache': 'outputs/plots/.plot_cache.json',
+        'export_manifest': 'outputs/reports/.export_manifest.json',
+        'query_index': 'outputs/tables/nfhs_index.npz',
+    },
+    # 0 lets the stage pick (one per CPU, capped by the amount of work)
+    'workers': {
+        'viz': '0',
+        'manuscript': '0',
+        'model': '0',
+        'importance': '0',
+    },
+    # Rows per CSV chunk (NFHS) or per cleaning and scoring batch (tweets); 0 means all at once
+    'chunks': {
+        'nfhs_rows': '0',
+        'tweet_rows': '0',
+    },
+    # Input checks run as each stage loads its data (rules in data_validation.RULES): whether failed
+    # error-level rules stop the stage, and the share of empty values or bad dates a column may have
+    'validation': {
+        'enabled': 'true',
+        'enforce': 'true',
+        'max_null_rate': '0.01',
+        'max_bad_date_rate': '0.001',
+    },
+    'viz': {
+        'max_points': '1000',
+        'max_bins': '50',
+    },
+    # X API v2 search collection: endpoint, query, slicing, concurrency and rate limit (requests per window seconds)
+    'collector': {
+        'api_url': 'https://api.twitter.com/2/tweets/search/all',
+        'query': '(vaccine OR vaccination OR vaccinated OR #VaccineHesitancy) place_country:IN -is:retweet',
+        'slice_hours': '24',
+        'page_size': '100',
+        'concurrency': '8',
+        'rate_limit': '300',
+        'rate_window': '900',
+        'queue_pages': '64',
+        'max_retries': '5',
+        'timeout': '30',
+    },
+    # News page fetching: total and per-host concurrent requests, seconds and bytes per page, shortest body kept
+    'news': {
+        'workers': '64',
+        'per_host': '4',
+        'timeout': '20',
+        'max_bytes': '2000000',
+        'min_words': '40',
+        'user_agent': 'vaccine-hesitancy-research/1.0 (news fetcher)',
+    },
+    # Google Trends region to analyze, trailing window and season length in days, spike z-score threshold
+    'trends': {
+        'region': 'India',
+        'window': '28',
+        'season_period': '7',
+        'spike_z': '3.0',
+    },
+    # Near-duplicate tweet clustering: MinHash permutations in LSH bands, words per shingle, texts per batch,
+    # signature agreement (estimated Jaccard similarity) to link two texts, clusters listed in the report
+    'dedup': {
+        'enabled': 'true',
+        'num_perm': '64',
+        'bands': '16',
+        'shingle': '2',
+        'threshold': '0.5',
+        'seed': '42',
+        'batch_rows': '20000',
+        'top_clusters': '100',
+    },
+    # Tweet and article scoring: backend (textblob, lexicon or onnx), texts per batch, label thresholds
+    # (blank keeps the backend's own), lexicon file and the local ONNX classifier with its tokenizer
+    'sentiment': {
+        'backend': 'textblob',
+        'batch_size': '1024',
+        'negative_threshold': '',
+        'positive_threshold': '',
+        'lexicon': 'data/lexicons/en.csv',
+        'onnx_model': 'models/sentiment.onnx',
+        'onnx_tokenizer': 'models/tokenizer.json',
+        'onnx_labels': 'negative,neutral,positive',
+        'onnx_max_length': '128',
+        'onnx_threads': '0',
+    },
+    # Language routing: per-language lexicons (<code>.csv) and Hinglish marker words needed to treat
+    # Latin-script text as Romanized Hindi
+    'languages': {
+        'enabled': 'true',
+        'lexicons': 'data/lexicons',
+        'hinglish_markers': '2',
+    },
+    # Topic index: shortest indexed word, and segments kept before they are merged into one
+    'topics': {
+        'min_term_length': '3',
+        'max_segments': '8',
+    },
+    # Model track: CV folds, logistic penalty types and strengths (per respondent, strongest first on the
+    # warm-started path), boosting settings, permutation-importance sample, and the ridge strength used
+    # when the Logit fails under separation
+    'model': {
+        'folds': '5',
+        'penalties': 'l1,l2',
+        'alphas': '0.1,0.01,0.001,0.0001,0.00001',
+        'max_iter': '200',
+        'boosting_iter': '200',
+        'learning_rate': '0.1',
+        'max_leaf_nodes': '31',
+        'leaf_respondents': '500',
+        'validation_fraction': '0.1',
+        'patience': '10',
+        'importance_rows': '200000',
+        'importance_repeats': '5',
+        'batch_rows': '65536',
+        'seed': '42',
+        'fallback_alpha': '0.001',
+    },
+    # Coverage of the intervals around the small-area (state and district) hesitancy estimates
+    'small_area': {
+        'interval': '0.95',
+    },
+    # Period of the fused (state, period) panel (day, week or month) and largest correlation lag
+    'fusion': {
+        'period': 'month',
+        'max_lag': '6',
+    },
+}
+
+settings = configparser.ConfigParser()
+settings.read_dict(DEFAULTS)
+settings.read(CONFIG_PATH, encoding="utf-8")
+
+BASE = (CONFIG_PATH.parent/settings.get('paths', 'base')).resolve()
+
+def get_path(section, key):
+    """A configured path, resolved against BASE when relative"""
+    path = Path(settings.get(section, key)).expanduser()
+    return path if path.is_absolute() else BASE/path
+
+def get_int(section, key):
+    return settings.getint(section, key)
+
+def get_workers(stage):
+    """Configured worker count for a stage, or None to let the stage decide"""
+    return settings.getint('workers', stage) or None
+
+def get_chunk_rows(key):
+    """Configured CSV chunk size, or None to read whole files"""
+    return settings.getint('chunks', key) or None
+
+DATA_DIR = get_path('paths', 'data')
+OUTPUTS = get_path('paths', 'outputs')
@@ -0,0 +1,105 @@
+"""
+Plot Data Reduction for Vaccine Hesitancy Research
+Caps points per trace (LTTB / min-max downsampling) and bins distributions
+so shipped charts stay small regardless of data granularity
+"""
+
+from lazy_imports import lazy_import
+from pipeline_config import get_int
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Most points a single line trace may carry into a chart
+MAX_POINTS = get_int('viz', 'max_points')
+# Most bars a binned distribution may have
+MAX_BINS = get_int('viz', 'max_bins')
+
+def _as_numeric(x):
+    """Numeric view of an x axis (dates, periods and date strings become int64 nanoseconds)"""
+    x = pd.Series(x)
+    if isinstance(x.dtype, pd.PeriodDtype):
+        x = x.dt.to_timestamp()
+    elif x.dtype == object or pd.api.types.is_string_dtype(x):
+        x = pd.to_datetime(x, errors='coerce')
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return x.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.to_numpy(dtype=np.float64)
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that preserve the visual shape"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Interior points split into n_out - 2 buckets; first and last points always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+def minmax_downsample(x, y, n_out):
+    """Keep the min and max of each bucket: indices of at most n_out points, peaks preserved"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    starts = np.linspace(0, n, n_out // 2, endpoint=False).astype(np.int64)
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+
+    # Sort by (bucket, y) once; the first and last entry of each bucket are its min and max
+    order = np.lexsort((y, bucket))
+    counts = np.bincount(bucket)
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    last = first + counts - 1
+    return np.unique(np.concatenate((order[first], order[last])))
+
+def reduce_series(df, x, y, max_points=MAX_POINTS, method='lttb'):
+    """Rows of df to plot as a line of y against x, capped at max_points"""
+    if len(df) <= max_points:
+        return df
+
+    df = df.dropna(subset=[y])
+    xs = _as_numeric(df[x])
+    order = np.argsort(xs, kind='stable')
+    df, xs = df.iloc[order], xs[order]
+    ys = df[y].to_numpy(dtype=np.float64)
+
+    if method == 'minmax':
+        keep = minmax_downsample(xs, ys, max_points)
+    else:
+        keep = lttb(xs, ys, max_points)
+    return df.iloc[keep]
+
+def auto_bin(values, max_bins=MAX_BINS):
+    """Histogram table (bin_start, bin_end, bin_center, count) with an automatic, capped bin count"""
+    values = pd.Series(values).dropna().to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        return pd.DataFrame(columns=['bin_start', 'bin_end', 'bin_center', 'count'])
+
+    edges = np.histogram_bin_edges(values, bins='auto')
+    if len(edges) - 1 > max_bins:
+        edges = np.linspace(values.min(), values.max(), max_bins + 1)
+    counts, edges = np.histogram(values, bins=edges)
+
+    return pd.DataFrame({
+        'bin_start': edges[:-1],
+        'bin_end': edges[1:],
+        'bin_center': (edges[:-1] + edges[1:]) / 2,
+        'count': counts
+    })
@@ -0,0 +1,324 @@
+"""
+Search Trends Analysis for Vaccine Hesitancy Research
+Google Trends data as a wide float32 matrix (days x terms) with trailing rolling
+means, z-scores, weekly seasonal profiles and spike flags. The statistics are
+kept as running sums, so each new day updates in O(terms) rather than O(history)
+"""
+
+import argparse
+import hashlib
+import json
+import time
+
+from lazy_imports import lazy_import
+from pipeline_config import DATA_DIR, OUTPUTS, settings, get_int, get_path
+from data_validation import require_valid
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+STORE_PATH = get_path('paths', 'trends_store')
+TABS = OUTPUTS/"tables"
+VIEWS = OUTPUTS/"views"
+LATEST_PATH = TABS/"trends_latest.csv"
+SPIKES_PATH = TABS/"trends_spikes.csv"
+SEASONAL_PATH = VIEWS/"trends_seasonal.csv"
+
+REGION = settings.get('trends', 'region')
+WINDOW = get_int('trends', 'window')
+SEASON = get_int('trends', 'season_period')
+SPIKE_Z = settings.getfloat('trends', 'spike_z')
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def min_history(window):
+    """Values a window needs before its SD (and so any z-score) is trusted"""
+    return max(window // 2, 2)
+
+def read_trends(files):
+    """Raw Google Trends rows from every file"""
+    return pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+
+def load_trends_matrix(trends, region=REGION):
+    """(first day number, terms, days x terms float32 matrix) with NaN where a term has no value"""
+    if region and 'region' in trends.columns:
+        trends = trends[trends['region'] == region]
+    dates = pd.to_datetime(trends['date'], errors='coerce')
+    keep = (dates.notna() & trends['trend_value'].notna()).to_numpy()
+    trends = trends[keep]
+    if len(trends) == 0:
+        return None
+    days = dates[keep].to_numpy('datetime64[D]').astype(np.int64)
+
+    term_codes, terms = pd.factorize(trends['search_term'], sort=True)
+    first = int(days.min())
+    values = np.full((int(days.max()) - first + 1, len(terms)), np.nan, dtype=np.float32)
+    values[days - first, term_codes] = trends['trend_value'].to_numpy(dtype=np.float32)
+    return first, [str(t) for t in terms], values
+
+def phase_label(phase, period=SEASON):
+    """Weekday name for weekly seasonality (day 0, 1970-01-01, was a Thursday)"""
+    if period == 7:
+        return WEEKDAYS[(int(phase) + 3) % 7]
+    return f"day {int(phase) + 1} of {period}"
+
+def phase_order(period=SEASON):
+    """Phases in display order (Monday first for weekly seasonality)"""
+    if period == 7:
+        return [(weekday - 3) % 7 for weekday in range(7)]
+    return list(range(period))
+
+class RollingTrends:
+    """Trailing-window sums, seasonal sums and a ring buffer of the last window days, for every term.
+
+    A day's rolling mean and SD cover the window days before it, so a spike is judged
+    against history it is not part of; the seasonal profile is the mean deviation
+    from that trailing mean at each phase of the season (day of week by default).
+    """
+
+    def __init__(self, terms, window=WINDOW, period=SEASON):
+        n_terms = len(terms)
+        self.terms = list(terms)
+        self.window = window
+        self.period = period
+        self.buffer = np.full((window, n_terms), np.nan)
+        self.sum = np.zeros(n_terms)
+        self.sumsq = np.zeros(n_terms)
+        self.count = np.zeros(n_terms, dtype=np.int64)
+        self.phase_sum = np.zeros((period, n_terms))
+        self.phase_count = np.zeros((period, n_terms), dtype=np.int64)
+        self.last_day = None
+        self.n_days = 0
+
+    def stats(self):
+        """Trailing mean and SD per term (SD is NaN until the window holds min_history values)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.sum / self.count
+            var = np.where(self.count >= min_history(self.window),
+                           (self.sumsq - self.sum * mean) / (self.count - 1), np.nan)
+        return mean, np.sqrt(np.maximum(var, 0))
+
+    def update(self, day, row):
+        """Feed one day's values (one per term); returns that day's trailing mean, SD and z-score"""
+        if self.last_day is not None and day <= self.last_day:
+            raise ValueError(f"Day {day} is not after the last day fed ({self.last_day})")
+        # Days with no data still move the window along
+        while self.last_day is not None and day > self.last_day + 1:
+            self.update(self.last_day + 1, np.full(len(self.terms), np.nan))
+
+        row = np.asarray(row, dtype=np.float64)
+        mean, sd = self.stats()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = (row - mean) / sd
+        deviation = row - mean
+        seen = np.isfinite(deviation)
+        self.phase_sum[day % self.period, seen] += deviation[seen]
+        self.phase_count[day % self.period] += seen
+
+        slot = self.n_days % self.window
+        old, new = self.buffer[slot], row
+        old_ok, new_ok = np.isfinite(old), np.isfinite(new)
+        self.sum += np.where(new_ok, new, 0) - np.where(old_ok, old, 0)
+        self.sumsq += np.where(new_ok, new * new, 0) - np.where(old_ok, old * old, 0)
+        self.count += new_ok.astype(np.int64) - old_ok
+        self.buffer[slot] = new
+        self.last_day = day
+        self.n_days += 1
+        return mean, sd, z
+
+    @classmethod
+    def from_history(cls, first_day, terms, values, window=WINDOW, period=SEASON):
+        """State after feeding every row of values, plus the per-day mean, SD and z-score matrices.
+
+        Computed at once with cumulative sums; gives the same result as calling update day by day.
+        """
+        x = values.astype(np.float64)
+        n_days = len(x)
+        ok = np.isfinite(x)
+        pad = np.zeros((1, x.shape[1]))
+        cs = np.vstack([pad, np.cumsum(np.where(ok, x, 0), axis=0)])
+        cs2 = np.vstack([pad, np.cumsum(np.where(ok, x * x, 0), axis=0)])
+        cn = np.vstack([pad, np.cumsum(ok, axis=0)])
+        # Row t summarizes days t - window .. t - 1
+        end = np.arange(n_days)
+        start = np.maximum(end - window, 0)
+        s, s2, n = cs[end] - cs[start], cs2[end] - cs2[start], cn[end] - cn[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = s / n
+            sd = np.sqrt(np.maximum(np.where(n >= min_history(window), (s2 - s * mean) / (n - 1), np.nan), 0))
+            z = (x - mean) / sd
+
+        state = cls(terms, window, period)
+        deviation = x - mean
+        phases = (first_day + end) % period
+        for phase in range(period):
+            rows = deviation[phases == phase]
+            seen = np.isfinite(rows)
+            state.phase_sum[phase] = np.where(seen, rows, 0).sum(axis=0)
+            state.phase_count[phase] = seen.sum(axis=0)
+
+        tail = np.arange(max(n_days - window, 0), n_days)
+        state.buffer[tail % window] = x[tail]
+        state.sum, state.sumsq = cs[-1] - cs[tail[0]], cs2[-1] - cs2[tail[0]]
+        state.count = (cn[-1] - cn[tail[0]]).astype(np.int64)
+        state.last_day = first_day + n_days - 1
+        state.n_days = n_days
+        return state, mean, sd, z
+
+    def seasonal_profile(self):
+        """Period x terms mean deviation per phase, centered to average zero over the season"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profile = self.phase_sum / self.phase_count
+        return profile - np.nanmean(profile, axis=0)
+
+    def save(self, path):
+        np.savez(path, buffer=self.buffer, sum=self.sum, sumsq=self.sumsq, count=self.count,
+                 phase_sum=self.phase_sum, phase_count=self.phase_count,
+                 last_day=self.last_day, n_days=self.n_days, window=self.window, period=self.period,
+                 terms=np.array(self.terms))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        state = cls(data['terms'].tolist(), int(data['window']), int(data['period']))
+        for name in ('buffer', 'sum', 'sumsq', 'count', 'phase_sum', 'phase_count'):
+            setattr(state, name, data[name])
+        state.last_day, state.n_days = int(data['last_day']), int(data['n_days'])
+        return state
+
+def spike_table(first_day, terms, values, mean, z, spike_z=SPIKE_Z):
+    """One row per (day, term) whose z-score exceeds spike_z"""
+    with np.errstate(invalid='ignore'):
+        day_idx, term_idx = np.nonzero(z > spike_z)
+    return pd.DataFrame({
+        'date': np.datetime_as_string((first_day + day_idx).astype('datetime64[D]')),
+        'term': np.array(terms, dtype=object)[term_idx],
+        'value': values[day_idx, term_idx],
+        'rolling_mean': mean[day_idx, term_idx].round(2),
+        'zscore': z[day_idx, term_idx].round(2),
+    })
+
+def latest_table(state, values, mean, sd, z):
+    """Per-term summary on the most recent day, with the seasonal peak and amplitude"""
+    profile = state.seasonal_profile()
+    peak = np.nanargmax(np.where(np.isfinite(profile), profile, -np.inf), axis=0)
+    with np.errstate(invalid='ignore'):
+        spike = z > SPIKE_Z
+    return pd.DataFrame({
+        'term': state.terms,
+        'date': str(np.datetime64(state.last_day, 'D')),
+        'value': values,
+        'rolling_mean': mean.round(2),
+        'rolling_sd': sd.round(2),
+        'zscore': z.round(2),
+        'spike': spike,
+        'seasonal_amplitude': (np.nanmax(profile, axis=0) - np.nanmin(profile, axis=0)).round(2),
+        'seasonal_peak': [phase_label(p, state.period) for p in peak],
+    })
+
+def history_digest(values):
+    """Digest of the day x term values, to tell whether rows already fed to the saved state changed"""
+    return hashlib.sha256(np.ascontiguousarray(values, dtype=np.float32).tobytes()).hexdigest()
+
+def save_matrix(first_day, terms, values, path=STORE_PATH):
+    """The wide matrix as a memory-mappable .npy plus meta.json, for the dashboard; the digest
+    covers every row, all of which the saved state has seen"""
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path/"values.npy", values)
+    with open(path/"meta.json", "w") as f:
+        json.dump({'first_day': str(np.datetime64(first_day, 'D')), 'terms': terms,
+                   'window': WINDOW, 'season_period': SEASON, 'spike_z': SPIKE_Z,
+                   'digest': history_digest(values)}, f, indent=1)
+
+def load_matrix(path=STORE_PATH):
+    """(dates, terms, values) with values memory-mapped read-only"""
+    with open(path/"meta.json", "r") as f:
+        meta = json.load(f)
+    values = np.load(path/"values.npy", mmap_mode='r')
+    dates = np.datetime64(meta['first_day'], 'D') + np.arange(len(values))
+    return dates, meta['terms'], values
+
+def update_trends(rebuild=False):
+    """Bring the trend statistics up to date, feeding only days newer than the saved state"""
+    files = sorted((DATA_DIR/"trends").glob("*.csv"))
+    if not files:
+        print("⚠ No trends data found. Run data extraction first:")
+        print("  python vh.py extract")
+        return
+
+    start = time.perf_counter()
+    trends = read_trends(files)
+    require_valid('trends', trends)
+    loaded = load_trends_matrix(trends)
+    if loaded is None:
+        print(f"⚠ No trends rows for region '{REGION}'")
+        return
+    first_day, terms, values = loaded
+    last_day = first_day + len(values) - 1
+    print(f"🔍 Trends matrix: {len(values):,} days x {len(terms)} terms ({values.nbytes / 1e6:.1f} MB float32)")
+
+    state_path = STORE_PATH/"state.npz"
+    state = None
+    if not rebuild and state_path.exists() and (STORE_PATH/"meta.json").exists():
+        state = RollingTrends.load(state_path)
+        with open(STORE_PATH/"meta.json", "r") as f:
+            saved = json.load(f)
+        # A changed term list, window, season or spike threshold, or rewritten history (Trends
+        # rescales past days when it re-normalizes a series), means starting over
+        if (state.terms != terms or state.window != WINDOW or state.period != SEASON
+                or saved.get('spike_z') != SPIKE_Z or not first_day <= state.last_day <= last_day
+                or saved.get('first_day') != str(np.datetime64(first_day, 'D'))
+                or saved.get('digest') != history_digest(values[:state.last_day - first_day + 1])):
+            print("🔄 Saved trend state no longer matches the data or settings; rebuilding")
+            state = None
+
+    outputs = [state_path, LATEST_PATH, SPIKES_PATH, SEASONAL_PATH]
+    if state is not None and state.last_day == last_day and all(p.exists() for p in outputs):
+        # Nothing to recompute; refresh timestamps so the pipeline plan sees the stage as current
+        for path in outputs:
+            path.touch()
+        print(f"✅ Trend statistics already up to date through {np.datetime64(last_day, 'D')}")
+        return
+
+    if state is not None and SPIKES_PATH.exists():
+        # Spikes found on earlier runs are kept; only the new days are scored
+        new_days = range(state.last_day + 1, last_day + 1)
+        spikes = [pd.read_csv(SPIKES_PATH)]
+        for day in new_days:
+            row = values[day - first_day]
+            mean, sd, z = state.update(day, row)
+            spikes.append(spike_table(day, terms, row[None], mean[None], z[None]))
+        spikes = pd.concat(spikes, ignore_index=True)
+        mode = f"{len(new_days)} new day(s) fed to the saved state"
+    else:
+        state, mean_all, sd_all, z_all = RollingTrends.from_history(first_day, terms, values)
+        spikes = spike_table(first_day, terms, values, mean_all, z_all)
+        mean, sd, z = mean_all[-1], sd_all[-1], z_all[-1]
+        mode = "rebuilt from full history"
+
+    STORE_PATH.mkdir(parents=True, exist_ok=True)
+    state.save(state_path)
+    save_matrix(first_day, terms, values)
+
+    latest = latest_table(state, values[-1], mean, sd, z)
+    latest.to_csv(LATEST_PATH, index=False)
+    spikes.to_csv(SPIKES_PATH, index=False)
+
+    profile = state.seasonal_profile()
+    VIEWS.mkdir(parents=True, exist_ok=True)
+    order = phase_order(state.period)
+    pd.DataFrame({
+        'term': np.repeat(np.array(terms, dtype=object), state.period),
+        'phase': np.tile([phase_label(p, state.period) for p in order], len(terms)),
+        'seasonal': profile[order].T.ravel().round(3),
+    }).to_csv(SEASONAL_PATH, index=False)
+
+    print(f"✅ Trend statistics updated ({mode}) in {time.perf_counter() - start:.2f}s")
+    print(f"📈 {len(spikes):,} spike days (z > {SPIKE_Z}) across {spikes['term'].nunique() if len(spikes) else 0} terms; "
+          f"{int(latest['spike'].sum())} term(s) spiking on {latest['date'].iloc[0]}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Rolling statistics, seasonality and spikes for Google Trends data")
+    ap.add_argument("--rebuild", action="store_true", help="Recompute from full history instead of the saved state")
+    args = ap.parse_args()
+    update_trends(rebuild=args.rebuild)
@@ -0,0 +1,310 @@
+"""
+Sentiment Backends for Vaccine Hesitancy Research
+Interchangeable sentiment scorers behind one interface: each backend scores a
+batch of cleaned texts at a time (score_batch -> float array on -1..+1) and
+carries its own positive / negative thresholds, so a run can trade accuracy
+for throughput through [sentiment] backend in vh.ini or --backend, on CPU only
+"""
+
+from pathlib import Path
+import argparse
+import importlib.util
+import time
+
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS, get_int, get_path, settings
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+textblob = lazy_import("textblob")
+ort = lazy_import("onnxruntime")
+tokenizers = lazy_import("tokenizers")
+
+BENCHMARK_PATH = OUTPUTS/"reports"/"sentiment_backend_benchmark.csv"
+
+BACKENDS = {}
+
+class BackendUnavailable(RuntimeError):
+    """A backend's optional packages or model files are missing"""
+
+def register_backend(cls):
+    """Class decorator adding a backend to the registry under its name"""
+    BACKENDS[cls.name] = cls
+    return cls
+
+def as_arrow(texts):
+    """Texts as an Arrow string array (lists, numpy arrays and chunked arrays are converted)"""
+    if isinstance(texts, pa.ChunkedArray):
+        return texts.combine_chunks()
+    if isinstance(texts, pa.Array):
+        return texts
+    return pa.array(list(texts), type=pa.string())
+
+class SentimentBackend:
+    """Base backend: batching, thresholds and labels; subclasses implement score_batch"""
+
+    name = None
+    # Methods text for the manuscript
+    description = None
+    # Modules the backend imports; checked before it is built
+    requires = ()
+    # Default (negative, positive) label thresholds on the backend's scale
+    default_thresholds = (-0.1, 0.1)
+
+    def __init__(self, batch_size=None):
+        missing = [m for m in self.requires if importlib.util.find_spec(m) is None]
+        if missing:
+            raise BackendUnavailable(f"sentiment backend '{self.name}' needs {', '.join(missing)} "
+                                     f"(pip install {' '.join(missing)})")
+        self.batch_size = batch_size or get_int('sentiment', 'batch_size') or None
+        # Blank thresholds in the config keep the backend's own
+        negative = settings.get('sentiment', 'negative_threshold').strip()
+        positive = settings.get('sentiment', 'positive_threshold').strip()
+        self.thresholds = (float(negative) if negative else self.default_thresholds[0],
+                           float(positive) if positive else self.default_thresholds[1])
+
+    def score_batch(self, texts):
+        """Sentiment of each text in an Arrow string array, as a float64 array"""
+        raise NotImplementedError
+
+    def score(self, texts):
+        """Score any number of texts, batch_size at a time"""
+        texts = as_arrow(texts)
+        size = self.batch_size or max(len(texts), 1)
+        return np.concatenate([np.asarray(self.score_batch(texts.slice(start, size)), dtype=np.float64)
+                               for start in range(0, len(texts), size)] or [np.empty(0)])
+
+@register_backend
+class TextBlobBackend(SentimentBackend):
+    """TextBlob pattern-lexicon polarity, one text at a time (the original scorer)"""
+
+    name = 'textblob'
+    description = "TextBlob polarity analysis"
+    requires = ('textblob',)
+
+    def score_batch(self, texts):
+        return np.fromiter((textblob.TextBlob(t or '').sentiment.polarity for t in texts.to_pylist()),
+                           dtype=np.float64, count=len(texts))
+
+class Lexicon:
+    """Word valences plus the negators, boosters / dampeners and contrast words ('but') of one language.
+    Negators precede the word they negate ("not safe"); post-negators follow it, as Hindi's
+    नहीं does ("सुरक्षित नहीं है")"""
+
+    # English defaults, for lexicons without a role column. Punctuation is already stripped by
+    # cleaning, so contractions appear without apostrophes
+    NEGATORS = ['not', 'no', 'never', 'nothing', 'nobody', 'none', 'neither', 'nor', 'nowhere', 'cannot',
+                'without', 'dont', 'doesnt', 'didnt', 'isnt', 'arent', 'wasnt', 'werent', 'wont', 'wouldnt',
+                'cant', 'couldnt', 'shouldnt', 'hasnt', 'havent', 'hadnt', 'aint', 'neednt', 'mustnt']
+    BOOSTERS = ['absolutely', 'completely', 'extremely', 'highly', 'hugely', 'incredibly', 'really', 'so',
+                'such', 'totally', 'truly', 'very', 'most', 'more', 'fully', 'deeply', 'especially']
+    DAMPENERS = ['barely', 'hardly', 'slightly', 'somewhat', 'partly', 'marginally', 'little', 'less']
+    CONTRAST = ['but']
+
+    def __init__(self, words, valence, negators, boosters, dampeners, contrast, post_negators=()):
+        self.words = pa.array(words, type=pa.string())
+        self.valence = np.asarray(valence, dtype=np.float64)
+        self.negators, self.boosters, self.dampeners, self.contrast = negators, boosters, dampeners, contrast
+        self.post_negators = list(post_negators)
+
+    @classmethod
+    def load(cls, path):
+        """A word,valence[,role] CSV or a VADER-format tab-separated .txt lexicon; role is negator,
+        post_negator, booster, dampener or contrast (those rows need no valence)"""
+        path = Path(path)
+        if not path.exists():
+            raise BackendUnavailable(f"sentiment lexicon not found at {path}")
+        if path.suffix == '.txt':
+            df = pd.read_csv(path, sep='\t', header=None, usecols=[0, 1], names=['word', 'valence'],
+                             quoting=3, dtype={'word': str})
+        else:
+            df = pd.read_csv(path, dtype={'word': str, 'role': str})
+        df['word'] = df['word'].str.strip().str.lower()
+        roles = df.pop('role') if 'role' in df.columns else pd.Series(pd.NA, index=df.index)
+        scored = df[roles.isna()].dropna().drop_duplicates('word', keep='last')
+        if roles.isna().all():
+            return cls(scored['word'].tolist(), scored['valence'], cls.NEGATORS, cls.BOOSTERS, cls.DAMPENERS, cls.CONTRAST)
+        role_words = {role: df.loc[roles == role, 'word'].tolist()
+                      for role in ('negator', 'post_negator', 'booster', 'dampener', 'contrast')}
+        return cls(scored['word'].tolist(), scored['valence'], role_words['negator'], role_words['booster'],
+                   role_words['dampener'], role_words['contrast'], role_words['post_negator'])
+
+    def merge(self, other):
+        """Both lexicons in one, for code-mixed text; other's valence wins where both list a word"""
+        words = pd.Series(np.r_[self.valence, other.valence],
+                          index=self.words.to_pylist() + other.words.to_pylist())
+        words = words[~words.index.duplicated(keep='last')]
+        return Lexicon(words.index.tolist(), words.to_numpy(), self.negators + other.negators,
+                       self.boosters + other.boosters, self.dampeners + other.dampeners,
+                       self.contrast + other.contrast, self.post_negators + other.post_negators)
+
+@register_backend
+class LexiconBackend(SentimentBackend):
+    """VADER-style valence lexicon with negation, boosters and 'but', scored for a whole batch in array operations"""
+
+    name = 'lexicon'
+    description = "VADER-style valence lexicon scoring"
+    # VADER's compound thresholds
+    default_thresholds = (-0.05, 0.05)
+
+    BOOST = 0.293
+    NEGATE = -0.74
+    # A booster or negator up to this many words before a sentiment word (or a post-negator up to this
+    # many words after it) modifies it; farther boosters count less
+    WINDOW = 3
+    DAMPING = (1.0, 0.95, 0.9)
+    ALPHA = 15.0
+
+    def __init__(self, batch_size=None, lexicon=None):
+        """lexicon: a Lexicon, or the path of one (default: [sentiment] lexicon)"""
+        super().__init__(batch_size)
+        if not isinstance(lexicon, Lexicon):
+            lexicon = Lexicon.load(lexicon or get_path('sentiment', 'lexicon'))
+        self.lexicon = lexicon
+        self.words, self.valence = lexicon.words, lexicon.valence
+        self.negators = pa.array(lexicon.negators, type=pa.string())
+        self.post_negators = pa.array(lexicon.post_negators, type=pa.string())
+        self.contrast = pa.array(lexicon.contrast, type=pa.string())
+        self.modifiers = pa.array(lexicon.boosters + lexicon.dampeners, type=pa.string())
+        self.modifier_values = np.array([self.BOOST] * len(lexicon.boosters) + [-self.BOOST] * len(lexicon.dampeners))
+
+    def score_batch(self, texts):
+        n = len(texts)
+        tokens = pc.utf8_split_whitespace(texts)
+        words = pc.list_flatten(tokens)
+        doc = pc.list_parent_indices(tokens).to_numpy().astype(np.int64)
+        if len(words) == 0:
+            return np.zeros(n)
+        first = np.r_[0, np.flatnonzero(doc[1:] != doc[:-1]) + 1]
+        pos = np.arange(len(doc)) - np.repeat(first, np.diff(np.r_[first, len(doc)]))
+
+        hit = pc.index_in(words, value_set=self.words).to_numpy(zero_copy_only=False)
+        valence = np.where(np.isnan(hit), 0.0, self.valence[np.nan_to_num(hit).astype(np.int64)])
+        negator = pc.is_in(words, value_set=self.negators).to_numpy(zero_copy_only=False)
+        post_negator = pc.is_in(words, value_set=self.post_negators).to_numpy(zero_copy_only=False)
+        modifier = pc.index_in(words, value_set=self.modifiers).to_numpy(zero_copy_only=False)
+        boost = np.where(np.isnan(modifier), 0.0, self.modifier_values[np.nan_to_num(modifier).astype(np.int64)])
+
+        # Look back over the preceding words of the same text: boosters push the valence away
+        # from zero (dampeners toward it), each negator flips and shrinks it
+        scored = valence != 0
+        sign = np.sign(valence)
+        out = valence.copy()
+        for k in range(1, self.WINDOW + 1):
+            before = np.maximum(np.arange(len(doc)) - k, 0)
+            near = scored & (pos >= k)
+            out += np.where(near, boost[before] * sign * self.DAMPING[k - 1], 0.0)
+            out *= np.where(near & negator[before], self.NEGATE, 1.0)
+            # Post-negators look forward over the following words of the same text
+            later = np.minimum(np.arange(len(doc)) + k, len(doc) - 1)
+            out *= np.where(scored & (doc[later] == doc) & (later > np.arange(len(doc))) & post_negator[later],
+                            self.NEGATE, 1.0)
+
+        # 'but' shifts the weight of a text to what follows it
+        but = pc.is_in(words, value_set=self.contrast).to_numpy(zero_copy_only=False)
+        has_but = np.bincount(doc, weights=but.astype(np.float64), minlength=n)[doc] > 0
+        after = (np.cumsum(but) - np.repeat(np.cumsum(but)[first] - but[first], np.diff(np.r_[first, len(doc)]))) > 0
+        out *= np.where(has_but, np.where(after & ~but, 1.5, 0.5), 1.0)
+
+        total = np.bincount(doc, weights=out, minlength=n)
+        return total / np.sqrt(total * total + self.ALPHA)
+
+@register_backend
+class OnnxBackend(SentimentBackend):
+    """A small local transformer classifier exported to ONNX, run with onnxruntime on the CPU"""
+
+    name = 'onnx'
+    description = "a local transformer sentiment classifier (ONNX, CPU inference)"
+    requires = ('onnxruntime', 'tokenizers')
+    default_thresholds = (-0.1, 0.1)
+
+    def __init__(self, batch_size=None):
+        super().__init__(batch_size)
+        model, tokenizer = get_path('sentiment', 'onnx_model'), get_path('sentiment', 'onnx_tokenizer')
+        for label, path in (('onnx_model', model), ('onnx_tokenizer', tokenizer)):
+            if not path.is_file():
+                raise BackendUnavailable(f"sentiment backend 'onnx' needs [sentiment] {label}; {path} not found")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = get_int('sentiment', 'onnx_threads')
+        self.session = ort.InferenceSession(str(model), options, providers=['CPUExecutionProvider'])
+        self.inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = tokenizers.Tokenizer.from_file(str(tokenizer))
+        self.tokenizer.enable_truncation(get_int('sentiment', 'onnx_max_length'))
+        self.tokenizer.enable_padding()
+        labels = [label.strip().lower() for label in settings.get('sentiment', 'onnx_labels').split(',')]
+        self.negative, self.positive = labels.index('negative'), labels.index('positive')
+
+    def score_batch(self, texts):
+        if len(texts) == 0:
+            return np.empty(0)
+        encoded = self.tokenizer.encode_batch([t or '' for t in texts.to_pylist()])
+        feed = {'input_ids': np.array([e.ids for e in encoded], dtype=np.int64),
+                'attention_mask': np.array([e.attention_mask for e in encoded], dtype=np.int64),
+                'token_type_ids': np.array([e.type_ids for e in encoded], dtype=np.int64)}
+        logits = self.session.run(None, {k: v for k, v in feed.items() if k in self.inputs})[0]
+        # P(positive) - P(negative) puts the classifier on the same -1..+1 scale as the lexicons
+        p = np.exp(logits - logits.max(axis=1, keepdims=True))
+        p /= p.sum(axis=1, keepdims=True)
+        return p[:, self.positive] - p[:, self.negative]
+
+def get_backend(name=None, batch_size=None):
+    """Build the named backend (default: [sentiment] backend)"""
+    name = (name or settings.get('sentiment', 'backend')).strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"unknown sentiment backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](batch_size=batch_size)
+
+def benchmark(texts, names=None, batch_sizes=None, reference='textblob'):
+    """Throughput of each available backend at each batch size, and label agreement with the reference backend"""
+    texts = as_arrow(texts)
+    rows, labels = [], {}
+    for name in names or list(BACKENDS):
+        for size in batch_sizes or [None]:
+            try:
+                backend = get_backend(name, batch_size=size)
+            except BackendUnavailable as e:
+                print(f"⚠ Skipping {name}: {e}")
+                break
+            # Warm up first, so lexicon loading and session start-up are not timed
+            backend.score(texts.slice(0, 16))
+            start = time.perf_counter()
+            scores = backend.score(texts)
+            seconds = time.perf_counter() - start
+            labels[name] = np.select([scores > backend.thresholds[1], scores < backend.thresholds[0]], [2, 0], 1)
+            rows.append({'backend': name, 'batch_size': backend.batch_size or len(texts), 'texts': len(texts),
+                         'seconds': round(seconds, 3), 'texts_per_second': round(len(texts) / max(seconds, 1e-9)),
+                         'mean_score': round(float(scores.mean()), 4) if len(scores) else np.nan})
+            print(f"  {name:<9} batch {rows[-1]['batch_size']:>7,}: {rows[-1]['texts_per_second']:>10,} texts/s")
+    result = pd.DataFrame(rows)
+    if reference in labels and len(result):
+        result[f'agreement_{reference}'] = [round(float((labels[b] == labels[reference]).mean()), 4)
+                                            for b in result['backend']]
+    return result
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="List sentiment backends or benchmark their throughput on the stored tweets")
+    ap.add_argument("--list", action="store_true", help="List the registered backends and whether each is available")
+    ap.add_argument("--backends", nargs="+", help="Backends to benchmark (default: all)")
+    ap.add_argument("--batch-sizes", nargs="+", type=int, help="Batch sizes to try (default: [sentiment] batch_size)")
+    ap.add_argument("--limit", type=int, default=50000, help="Distinct tweet texts to score")
+    args = ap.parse_args()
+
+    if args.list:
+        for name in BACKENDS:
+            try:
+                backend = get_backend(name)
+                print(f"✅ {name:<9} thresholds {backend.thresholds}  {backend.description}")
+            except BackendUnavailable as e:
+                print(f"❌ {name:<9} {e}")
+    else:
+        from tweet_store import TweetStore, STORE_PATH
+        if not STORE_PATH.exists():
+            raise SystemExit(f"⚠ No tweet store at {STORE_PATH}. Run the sentiment stage first: python vh.py sentiment")
+        texts = pc.unique(TweetStore.open().table['clean_text']).slice(0, args.limit)
+        print(f"⏱ Benchmarking sentiment backends on {len(texts):,} distinct tweet texts...")
+        result = benchmark(texts, args.backends, args.batch_sizes)
+        BENCHMARK_PATH.parent.mkdir(parents=True, exist_ok=True)
+        result.to_csv(BENCHMARK_PATH, index=False)
+        print(f"✅ Benchmark saved to {BENCHMARK_PATH}")
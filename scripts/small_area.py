@@ -0,0 +1,295 @@
+"""
+Small-Area Estimation for Vaccine Hesitancy Research
+Hesitancy by state and district from a hierarchical logistic model with random
+intercepts for state and for district within state. Respondents are collapsed to
+(state, district) cells of hesitant and total counts in one bincount pass, so
+millions of rows become at most a few thousand binomial cells. Random effects
+come from penalized IRLS on the sparse cell design and the two variance
+components from the Laplace approximation to the marginal likelihood; areas with
+little data are pulled toward their state, and states toward the national level,
+and intervals come from the sparse Hessian at the mode
+"""
+
+import argparse
+import time
+
+from lazy_imports import lazy_import
+from pipeline_config import OUTPUTS, settings
+from nfhs_store import NFHSStore, STORE_PATH
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+sparse = lazy_import("scipy.sparse")
+splinalg = lazy_import("scipy.sparse.linalg")
+optimize = lazy_import("scipy.optimize")
+stats = lazy_import("scipy.stats")
+
+OUTR = OUTPUTS/"reports"
+ESTIMATES_PATH = OUTR/"hesitancy_small_area.csv"
+SUMMARY_PATH = OUTR/"small_area_summary.txt"
+
+INTERVAL = settings.getfloat('small_area', 'interval')
+
+# log SD bounds for the variance components; the lower one is effectively "no variation"
+LOG_SD_BOUNDS = (-7.0, 3.0)
+
+# Weak N(0, 10^2) prior on the intercept (logit scale): negligible next to real data, but it keeps
+# the mode finite and the Hessian invertible when every respondent gives the same answer
+INTERCEPT_SD = 10.0
+
+def expit(x):
+    return 1 / (1 + np.exp(-x))
+
+def wilson_interval(rate, n, interval=INTERVAL):
+    """Wilson score interval for a binomial proportion (used when no model estimate exists)"""
+    z = stats.norm.ppf(0.5 + interval / 2)
+    centre = (rate + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * np.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return centre - half, centre + half
+
+def cells_from_codes(state, district, outcome, states, districts=None):
+    """(state, district) cells with respondent and hesitant counts from integer codes (-1 = missing);
+    a missing district leaves the respondent in a state-only cell"""
+    keep = state >= 0
+    state, outcome = state[keep].astype(np.int64), outcome[keep]
+    n_districts = len(districts) if districts is not None else 0
+    district = district[keep].astype(np.int64) + 1 if districts is not None else np.zeros(len(state), np.int64)
+    key = state * (n_districts + 1) + district
+    size = len(states) * (n_districts + 1)
+    total = np.bincount(key, minlength=size)
+    hesitant = np.bincount(key, weights=outcome, minlength=size)
+    used = np.flatnonzero(total)
+    cells = pd.DataFrame({
+        'state': np.asarray(states, dtype=object)[used // (n_districts + 1)],
+        'district': (np.asarray(list(districts) + [None], dtype=object)[used % (n_districts + 1) - 1]
+                     if districts is not None else None),
+        'respondents': total[used],
+        'hesitant': hesitant[used].round().astype(np.int64),
+    })
+    return cells, int((~keep).sum())
+
+def cells_from_frame(df):
+    """Cells from a DataFrame with state, vaccine_hesitant and optionally district columns"""
+    state, states = pd.factorize(df['state'])
+    if 'district' in df.columns:
+        district, districts = pd.factorize(df['district'].astype(str).where(df['district'].notna()))
+    else:
+        district, districts = None, None
+    return cells_from_codes(state, district, df['vaccine_hesitant'].to_numpy(), list(states),
+                            list(districts) if districts is not None else None)
+
+def cells_from_store(store):
+    """Cells straight from the memory-mapped store columns, without materializing a frame"""
+    categories = store.categories
+    if 'state' not in categories:
+        return None, 0
+    district = store.column('district') if 'district' in categories else None
+    return cells_from_codes(np.asarray(store.column('state')), np.asarray(district) if district is not None else None,
+                            np.asarray(store.outcome), categories['state'], categories.get('district'))
+
+class HierarchicalLogit:
+    """logit P(hesitant) = intercept + state effect + district effect, with
+    state ~ N(0, sd_state^2) and district ~ N(0, sd_district^2), fitted to binomial cells"""
+
+    def __init__(self, cells):
+        self.cells = cells.reset_index(drop=True)
+        self.n = self.cells['respondents'].to_numpy(dtype=np.float64)
+        self.y = self.cells['hesitant'].to_numpy(dtype=np.float64)
+        n_cells = len(self.cells)
+
+        # Sparse design: intercept, one column per state, one per (state, district) present
+        self.state_codes, self.states = pd.factorize(self.cells['state'])
+        has_district = self.cells['district'].notna().to_numpy()
+        district_key = self.cells['state'].astype(str) + "\x1f" + self.cells['district'].astype(str)
+        district_codes, self.districts = pd.factorize(district_key.where(has_district))
+        # With one state its effect cannot be told apart from the intercept
+        self.n_states = len(self.states) if len(self.states) > 1 else 0
+        self.n_districts = len(self.districts)
+
+        rows = [np.arange(n_cells)]
+        cols = [np.zeros(n_cells, dtype=np.int64)]
+        if self.n_states:
+            rows.append(np.arange(n_cells))
+            cols.append(1 + self.state_codes)
+        if self.n_districts:
+            rows.append(np.flatnonzero(has_district))
+            cols.append(1 + self.n_states + district_codes[has_district])
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        self.n_params = 1 + self.n_states + self.n_districts
+        self.Z = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_cells, self.n_params))
+        self.Zt = self.Z.T.tocsr()
+
+        self.b = np.zeros(self.n_params)
+        rate = (self.y.sum() + 0.5) / (self.n.sum() + 1)
+        self.b[0] = np.log(rate / (1 - rate))
+        self.log_sd = np.array([np.log(0.5), np.log(0.5)])
+        self.newton_steps = 0
+
+    def precision(self, log_sd):
+        """Prior precision per parameter (the intercept's is weak, from INTERCEPT_SD)"""
+        return np.concatenate([[INTERCEPT_SD ** -2], np.full(self.n_states, np.exp(-2 * log_sd[0])),
+                               np.full(self.n_districts, np.exp(-2 * log_sd[1]))])
+
+    def penalized_loglik(self, b, prec):
+        eta = self.Z @ b
+        return float(self.y @ eta - self.n @ np.logaddexp(0, eta) - 0.5 * prec @ (b * b))
+
+    def hessian(self, b, prec):
+        """Negative Hessian of the penalized log-likelihood: Z' W Z + diag(precision), sparse"""
+        p = expit(self.Z @ b)
+        w = self.n * p * (1 - p)
+        return (self.Zt @ sparse.diags(w) @ self.Z + sparse.diags(prec)).tocsc()
+
+    def mode(self, log_sd, b=None, tol=1e-8, max_steps=50):
+        """Penalized IRLS (Newton with step halving) for the posterior mode of all effects"""
+        prec = self.precision(log_sd)
+        b = self.b.copy() if b is None else b
+        current = self.penalized_loglik(b, prec)
+        for _ in range(max_steps):
+            p = expit(self.Z @ b)
+            grad = self.Zt @ (self.y - self.n * p) - prec * b
+            step = splinalg.splu(self.hessian(b, prec)).solve(grad)
+            scale = 1.0
+            while True:
+                trial = b + scale * step
+                value = self.penalized_loglik(trial, prec)
+                if value >= current - 1e-10 or scale < 1e-4:
+                    break
+                scale /= 2
+            self.newton_steps += 1
+            b, improvement, current = trial, value - current, value
+            if np.max(np.abs(scale * step)) < tol or abs(improvement) < tol:
+                break
+        return b
+
+    def laplace(self, log_sd, b=None):
+        """Laplace approximation to the log marginal likelihood (intercept integrated under its weak prior)"""
+        log_sd = np.clip(log_sd, *LOG_SD_BOUNDS)
+        prec = self.precision(log_sd)
+        b = self.mode(log_sd, b)
+        lu = splinalg.splu(self.hessian(b, prec))
+        log_det = np.log(np.abs(lu.U.diagonal())).sum()
+        value = (self.penalized_loglik(b, prec) - 0.5 * log_det
+                 - self.n_states * log_sd[0] - self.n_districts * log_sd[1])
+        return value, b
+
+    def fit(self):
+        """Variance components by maximizing the Laplace marginal likelihood, then the effects at the mode"""
+        free = [i for i, k in enumerate((self.n_states, self.n_districts)) if k]
+        self.log_sd[[i for i in range(2) if i not in free]] = LOG_SD_BOUNDS[0]
+        warm = {'b': self.b}
+
+        def objective(x):
+            log_sd = self.log_sd.copy()
+            log_sd[free] = x
+            value, warm['b'] = self.laplace(log_sd, warm['b'])
+            return -value
+
+        if free:
+            result = optimize.minimize(objective, self.log_sd[free], method='L-BFGS-B',
+                                       bounds=[LOG_SD_BOUNDS] * len(free))
+            self.log_sd[free] = result.x
+        self.loglik, self.b = self.laplace(self.log_sd, warm['b'])
+        self.lu = splinalg.splu(self.hessian(self.b, self.precision(self.log_sd)))
+        return self
+
+    @property
+    def sd_state(self):
+        return float(np.exp(self.log_sd[0])) if self.n_states else 0.0
+
+    @property
+    def sd_district(self):
+        return float(np.exp(self.log_sd[1])) if self.n_districts else 0.0
+
+    def group_estimates(self, groups, interval=INTERVAL):
+        """Respondent-weighted mean of the cells' fitted probabilities per group code (-1 leaves a
+        cell out), with delta-method intervals on the logit scale"""
+        p = expit(self.Z @ self.b)
+        cell = np.flatnonzero(groups >= 0)
+        codes = groups[cell]
+        totals = np.bincount(codes, weights=self.n[cell])
+        G = sparse.csr_matrix((self.n[cell] / totals[codes], (codes, cell)), shape=(len(totals), len(groups)))
+        estimate = G @ p
+        # Gradient of each group's estimate with respect to the effects, then g' H^-1 g per group
+        grad = (G @ sparse.diags(p * (1 - p)) @ self.Z).toarray()
+        variance = np.einsum('ij,ji->i', grad, self.lu.solve(grad.T))
+        se_logit = np.sqrt(np.maximum(variance, 0)) / (estimate * (1 - estimate))
+        z = stats.norm.ppf(0.5 + interval / 2)
+        logit = np.log(estimate / (1 - estimate))
+        return estimate, expit(logit - z * se_logit), expit(logit + z * se_logit)
+
+def estimate_table(model, interval=INTERVAL):
+    """National, state and district rows: respondents, observed rate, model estimate and interval"""
+    cells = model.cells
+    has_district = cells['district'].notna().to_numpy()
+    levels = {'national': np.zeros(len(cells), dtype=np.int64), 'state': model.state_codes}
+    if model.n_districts:
+        # Each (state, district) is its own cell; respondents without a district only count above
+        levels['district'] = np.where(has_district, np.cumsum(has_district) - 1, -1)
+
+    tables = []
+    for level, groups in levels.items():
+        keep = groups >= 0
+        table = (cells[keep].groupby(groups[keep], sort=True)
+                 .agg(state=('state', 'first'), district=('district', 'first'),
+                      respondents=('respondents', 'sum'), hesitant=('hesitant', 'sum'))
+                 .reset_index(drop=True))
+        if level != 'district':
+            table['district'] = None
+        if level == 'national':
+            table['state'] = None
+        table.insert(0, 'level', level)
+        table['observed_rate'] = table['hesitant'] / table['respondents']
+        table['estimate'], table['ci_lower'], table['ci_upper'] = model.group_estimates(groups, interval)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+def estimate_frame(df):
+    """Small-area table for an in-memory slice of the data (e.g. one subgroup manuscript)"""
+    cells, _ = cells_from_frame(df)
+    return estimate_table(HierarchicalLogit(cells).fit())
+
+def estimate_small_areas(store_path=STORE_PATH):
+    """Fit the model to the cleaned NFHS store and write the estimates and a model summary"""
+    try:
+        store = NFHSStore.open(store_path)
+    except FileNotFoundError:
+        print("⚠ NFHS store not found. Run data cleaning first:")
+        print("  python vh.py clean")
+        return
+
+    start = time.perf_counter()
+    cells, dropped = cells_from_store(store)
+    if cells is None:
+        print("⚠ No state column in the NFHS data; skipping small-area estimation")
+        return
+    if dropped:
+        print(f"⚠ {dropped:,} respondents without a state left out of the small-area model")
+    model = HierarchicalLogit(cells).fit()
+    table = estimate_table(model)
+    seconds = time.perf_counter() - start
+
+    OUTR.mkdir(parents=True, exist_ok=True)
+    table.round({'observed_rate': 4, 'estimate': 4, 'ci_lower': 4, 'ci_upper': 4}).to_csv(ESTIMATES_PATH, index=False)
+    with open(SUMMARY_PATH, "w") as f:
+        f.write("VACCINE HESITANCY SMALL-AREA ESTIMATION\n")
+        f.write("="*50 + "\n\n")
+        f.write("Model: logit P(hesitant) = intercept + state + district(state), random intercepts\n")
+        f.write("Fit: penalized IRLS for the effects, Laplace approximation for the variance components\n\n")
+        f.write(f"Respondents: {int(cells['respondents'].sum()):,}\n")
+        f.write(f"Cells: {len(cells):,} ({model.n_states} states, {model.n_districts} districts)\n")
+        f.write(f"Intercept (logit): {model.b[0]:.4f}\n")
+        f.write(f"SD of state effects (logit): {model.sd_state:.4f}\n")
+        f.write(f"SD of district effects (logit): {model.sd_district:.4f}\n")
+        f.write(f"Laplace log-likelihood: {model.loglik:.3f}\n")
+        f.write(f"Newton steps: {model.newton_steps}\n")
+        f.write(f"Interval: {INTERVAL:.0%}\n")
+        f.write(f"Seconds: {seconds:.2f}\n")
+
+    areas = f"{model.n_states or 1} states" + (f" and {model.n_districts} districts" if model.n_districts else "")
+    print(f"✅ Small-area estimates for {areas} saved to reports/{ESTIMATES_PATH.name} ({seconds:.2f}s)")
+    print(f"📊 Between-state SD {model.sd_state:.3f}, between-district SD {model.sd_district:.3f} (logit scale)")
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Shrunken state and district hesitancy estimates from a hierarchical logistic model").parse_args()
+    estimate_small_areas()
@@ -0,0 +1,323 @@
+"""
+Topic Index for Vaccine Hesitancy Research
+Inverted index from hashtags and normalized terms (words and word pairs of
+clean_text) to the tweets that use them, with each tweet's day, state,
+location and sentiment alongside, so questions like "monthly sentiment of
+tweets mentioning side effects in Karnataka" read only the matching postings.
+New tweets are indexed as an extra segment; segments are merged when there
+are too many, and every array is memory-mapped when queried
+"""
+
+import argparse
+import json
+import shutil
+import unicodedata
+
+from lazy_imports import lazy_import
+from pipeline_config import get_int, get_path
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+
+INDEX_PATH = get_path('paths', 'topic_index')
+
+# Words too common to be worth a posting list
+STOPWORDS = [
+    'a', 'about', 'after', 'all', 'also', 'am', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'been', 'but',
+    'by', 'can', 'did', 'do', 'does', 'for', 'from', 'get', 'got', 'had', 'has', 'have', 'he', 'her', 'his',
+    'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'just', 'me', 'more', 'my', 'no', 'not', 'now', 'of',
+    'on', 'or', 'our', 'out', 'she', 'so', 'than', 'that', 'the', 'their', 'them', 'then', 'there', 'these',
+    'they', 'this', 'to', 'today', 'too', 'up', 'us', 'very', 'was', 'we', 'were', 'what', 'when', 'which',
+    'who', 'why', 'will', 'with', 'you', 'your',
+]
+
+# Per-tweet columns of a segment; posting lists hold row numbers into these
+DOC_COLUMNS = ['key', 'day', 'state', 'location', 'sentiment']
+
+PERIODS = ['day', 'week', 'month']
+
+# Bumped when the segment layout or term extraction changes, so older indexes are rebuilt
+INDEX_FORMAT = 2
+
+def tweet_keys(store):
+    """Stable 64-bit key per tweet (id, text, day and location, plus an occurrence number for exact repeats)"""
+    table = store.table
+    parts = pd.DataFrame({
+        'id': table['id'].to_pandas() if 'id' in table.column_names else '',
+        'text': table['text'].to_pandas(),
+        'day': store.days(),
+        'location': table['user_location'].to_pandas().astype(object) if 'user_location' in table.column_names else '',
+    })
+    keys = pd.util.hash_pandas_object(parts, index=False).to_numpy()
+    occurrence = pd.Series(keys).groupby(keys).cumcount().to_numpy().astype(np.uint64)
+    return pd.util.hash_array(keys ^ (occurrence * np.uint64(0x9E3779B97F4A7C15)))
+
+def extract_terms(text, clean_text, min_length):
+    """(term, row) pairs: hashtags from the raw text, and words and adjacent word pairs from clean_text"""
+    # Hashtags are dropped by clean_text, so they come from the raw text
+    raw_tokens = pc.utf8_split_whitespace(pc.utf8_lower(text))
+    raw_rows = pc.list_parent_indices(raw_tokens)
+    raw_flat = pc.list_flatten(raw_tokens)
+    is_tag = pc.match_substring_regex(raw_flat, pattern=r'^#[\p{L}\p{M}\p{N}_]')
+    # Trailing punctuation or emoji is not part of the tag
+    tags = pc.extract_regex(raw_flat, pattern=r'^(?P<tag>#[\p{L}\p{M}\p{N}_]+)').field('tag')
+
+    tokens = pc.utf8_split_whitespace(clean_text)
+    rows = pc.list_parent_indices(tokens)
+    words = pc.list_flatten(tokens)
+    keep = pc.and_(pc.invert(pc.is_in(words, value_set=pa.array(STOPWORDS))),
+                   pc.greater_equal(pc.utf8_length(words), min_length))
+    words, rows = words.filter(keep), rows.filter(keep)
+
+    # Word pairs adjacent once stopwords are gone ("side effects", "effects vaccine")
+    same_tweet = pc.equal(rows.slice(1), rows.slice(0, len(rows) - 1)) if len(rows) > 1 else pa.array([], pa.bool_())
+    pairs = pc.binary_join_element_wise(words.slice(0, len(words) - 1), words.slice(1), ' ').filter(same_tweet)
+    pair_rows = rows.slice(1).filter(same_tweet)
+
+    terms = pa.concat_arrays([tags.filter(is_tag), words, pairs.cast(pa.string())])
+    term_rows = pa.concat_arrays([raw_rows.filter(is_tag), rows, pair_rows]).cast(pa.int64())
+    return terms, term_rows.to_numpy()
+
+def build_segment(store, rows, keys, path, min_length):
+    """Index the given store rows as one segment directory of .npy arrays"""
+    table = store.table.take(pa.array(rows))
+    terms, term_rows = extract_terms(table['text'].combine_chunks(), table['clean_text'].combine_chunks(), min_length)
+
+    # Terms are looked up by a 64-bit hash, so the dictionary is a sorted uint64 array
+    encoded = pc.dictionary_encode(terms)
+    names = encoded.dictionary
+    hashes = term_hash(names.to_numpy(zero_copy_only=False))
+    order = np.argsort(hashes, kind='stable')
+    rank = np.empty(len(names), dtype=np.int64)
+    rank[order] = np.arange(len(names))
+
+    # Each (term, tweet) once, grouped by term in hash order
+    term_ids = rank[encoded.indices.to_numpy()] if len(terms) else np.empty(0, dtype=np.int64)
+    postings = np.sort(term_ids * max(len(rows), 1) + term_rows)
+    postings = postings[np.r_[True, postings[1:] != postings[:-1]]] if len(postings) else postings
+    term_of, docs = postings // max(len(rows), 1), (postings % max(len(rows), 1)).astype(np.int32)
+    offsets = np.searchsorted(term_of, np.arange(len(names) + 1)).astype(np.int64)
+    names = names.take(pa.array(order))
+
+    columns = {'key': keys[rows], 'day': store.days()[rows].astype(np.int32),
+               'sentiment': store.sentiment[rows].astype(np.float32)}
+    categories = {}
+    for name, column in (('state', 'state'), ('location', 'user_location')):
+        if column in store.columns:
+            codes, values = store.codes(column)
+            columns[name] = codes[rows].astype(np.int32)
+            categories[name] = values
+        else:
+            columns[name] = np.full(len(rows), -1, dtype=np.int32)
+            categories[name] = []
+
+    path.mkdir(parents=True, exist_ok=True)
+    for name, values in columns.items():
+        np.save(path/f"{name}.npy", values)
+    np.save(path/"hashes.npy", hashes[order])
+    np.save(path/"hashtag.npy", pc.starts_with(names, '#').to_numpy(zero_copy_only=False))
+    with pa.OSFile(str(path/"terms.arrow"), 'wb') as sink, \
+            pa.ipc.new_file(sink, pa.schema([('term', pa.string())])) as writer:
+        writer.write_table(pa.table({'term': names}))
+    np.save(path/"offsets.npy", offsets)
+    np.save(path/"docs.npy", docs)
+    with open(path/"categories.json", "w") as f:
+        json.dump(categories, f)
+    return len(names)
+
+class Segment:
+    """One memory-mapped segment: sorted term hashes, CSR posting lists and per-tweet columns"""
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = np.load(path/"hashes.npy", mmap_mode='r')
+        self.hashtag = np.load(path/"hashtag.npy", mmap_mode='r')
+        self.offsets = np.load(path/"offsets.npy", mmap_mode='r')
+        self.docs = np.load(path/"docs.npy", mmap_mode='r')
+        self.columns = {name: np.load(path/f"{name}.npy", mmap_mode='r') for name in DOC_COLUMNS}
+        with open(path/"categories.json", "r") as f:
+            self.categories = json.load(f)
+
+    def __len__(self):
+        return len(self.columns['key'])
+
+    def position(self, term_hashes):
+        """Dictionary position of each term hash, -1 where the segment lacks the term"""
+        i = np.minimum(np.searchsorted(self.hashes, term_hashes), max(len(self.hashes) - 1, 0))
+        found = (self.hashes[i] == term_hashes) if len(self.hashes) else np.zeros(len(term_hashes), dtype=bool)
+        return np.where(found, i, -1)
+
+    def postings(self, term):
+        """Row numbers of the tweets using a term"""
+        i = int(self.position(term_hash([term]))[0])
+        if i < 0:
+            return np.empty(0, dtype=np.int32)
+        return np.asarray(self.docs[self.offsets[i]:self.offsets[i + 1]])
+
+    def names(self, positions):
+        """Term strings at dictionary positions"""
+        with pa.memory_map(str(self.path/"terms.arrow")) as source:
+            terms = pa.ipc.open_file(source).read_all()['term']
+            return terms.take(pa.array(positions, type=pa.int64())).to_pylist()
+
+    def match(self, terms, match_all=False):
+        """Rows using any (or all) of the terms"""
+        lists = [self.postings(t) for t in terms]
+        if not lists:
+            return np.arange(len(self), dtype=np.int32)
+        rows = lists[0]
+        for other in lists[1:]:
+            rows = np.intersect1d(rows, other) if match_all else np.union1d(rows, other)
+        return rows
+
+    def frame(self, rows):
+        """(day, state, location, sentiment) of the given rows"""
+        out = {'day': self.columns['day'][rows], 'sentiment': self.columns['sentiment'][rows]}
+        for name in ('state', 'location'):
+            codes = self.columns[name][rows]
+            values = np.array(self.categories[name] + [None], dtype=object)
+            out[name] = values[codes]
+        return pd.DataFrame(out)
+
+
+class TopicIndex:
+    """All segments of the index, queried together"""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        meta = read_meta(path)
+        self.segments = [Segment(path/name) for name in meta['segments']]
+
+    def __len__(self):
+        return sum(len(s) for s in self.segments)
+
+    @property
+    def states(self):
+        return sorted({state for s in self.segments for state in s.categories['state']})
+
+    def query(self, terms, states=None, match_all=False):
+        """(day, state, location, sentiment) of every tweet using the terms, optionally in given states"""
+        terms = [normalize_term(t) for t in terms if normalize_term(t)]
+        frames = [s.frame(s.match(terms, match_all)) for s in self.segments]
+        hits = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['day', 'sentiment', 'state', 'location'])
+        if states:
+            hits = hits[hits['state'].isin(states)]
+        return hits
+
+    def summary(self, terms, states=None, period='month', match_all=False):
+        """Tweets and mean sentiment per period for tweets using the terms"""
+        hits = self.query(terms, states, match_all)
+        days = hits['day'].to_numpy()
+        hits, days = hits[days >= 0], days[days >= 0]
+        if period == 'week':
+            # Weeks labelled by their Monday (day 0, 1970-01-01, was a Thursday)
+            periods = (days - (days + 3) % 7).astype('datetime64[D]')
+        else:
+            periods = days.astype('datetime64[D]').astype('datetime64[M]' if period == 'month' else 'datetime64[D]')
+        grouped = hits.assign(period=periods.astype(str)).groupby('period', sort=True)['sentiment']
+        return grouped.agg(tweets='size', sentiment='mean').round({'sentiment': 3}).reset_index()
+
+    def top_terms(self, n=20, hashtags=False):
+        """Most used terms (or hashtags) across all segments"""
+        if not self.segments:
+            return pd.DataFrame(columns=['term', 'tweets'])
+        # Sum tweets per term hash across segments
+        hashes = np.concatenate([s.hashes[s.hashtag == hashtags] for s in self.segments])
+        counts = np.concatenate([np.diff(s.offsets)[s.hashtag == hashtags] for s in self.segments])
+        unique, inverse = np.unique(hashes, return_inverse=True)
+        totals = np.bincount(inverse, weights=counts).astype(np.int64)
+        top = np.argsort(-totals, kind='stable')[:n]
+        top_hashes, names = unique[top], np.full(len(top), None, dtype=object)
+        for segment in self.segments:
+            missing = np.flatnonzero(pd.isna(names))
+            if not len(missing):
+                break
+            positions = segment.position(top_hashes[missing])
+            found = positions >= 0
+            names[missing[found]] = segment.names(positions[found])
+        return pd.DataFrame({'term': names, 'tweets': totals[top]})
+
+def term_hash(terms):
+    """Stable 64-bit hash of each term string"""
+    return pd.util.hash_array(np.asarray(terms, dtype=object), categorize=False)
+
+def normalize_term(term):
+    """A query term as the index spells it: lowercase hashtag, or words cleaned like clean_text"""
+    term = str(term).strip().lower()
+    if term.startswith('#'):
+        return term
+    words = [w for w in ''.join(c if c.isalnum() or c == '_' or c.isspace() or unicodedata.category(c)[0] == 'M'
+                                else ' ' for c in term).split()
+             if w not in STOPWORDS]
+    return ' '.join(words)
+
+def read_meta(path=INDEX_PATH):
+    if not (path/"meta.json").exists():
+        return {'segments': [], 'next_segment': 0}
+    with open(path/"meta.json", "r") as f:
+        return json.load(f)
+
+def write_meta(meta, path=INDEX_PATH):
+    tmp = path/"meta.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=1)
+    tmp.replace(path/"meta.json")
+
+def update_index(store, path=INDEX_PATH, rebuild=False):
+    """Index the store's tweets not yet in the index as a new segment; merge segments past max_segments"""
+    min_length = get_int('topics', 'min_term_length')
+    meta = read_meta(path)
+    # Postings carry each tweet's sentiment, so rescoring with another backend rebuilds the index
+    settings_now = {'format': INDEX_FORMAT, 'min_term_length': min_length, 'backend': store.backend,
+                    'languages': 'language' in store.columns}
+    if rebuild or any(meta.get(k) != v for k, v in settings_now.items()):
+        shutil.rmtree(path, ignore_errors=True)
+        meta = {'segments': [], 'next_segment': 0}
+
+    keys = tweet_keys(store)
+    indexed = np.concatenate([np.load(path/name/"key.npy") for name in meta['segments']] or [np.empty(0, np.uint64)])
+    new_rows = np.flatnonzero(~np.isin(keys, indexed))
+    merge = len(meta['segments']) + (len(new_rows) > 0) > get_int('topics', 'max_segments')
+
+    if merge:
+        # Re-index the whole store as one segment, which also drops tweets no longer in it
+        new_rows, retired = np.arange(len(store)), meta['segments']
+    else:
+        retired = []
+    if len(new_rows) == 0:
+        # Marks the index current for `vh.py plan`
+        (path/"meta.json").touch()
+        print(f"✅ Topic index up to date ({len(indexed):,} tweets in {len(meta['segments'])} segments)")
+        return
+
+    name = f"segment_{meta['next_segment']:05d}"
+    n_terms = build_segment(store, new_rows, keys, path/name, min_length)
+    meta = {'segments': [s for s in meta['segments'] if s not in retired] + [name],
+            'next_segment': meta['next_segment'] + 1, **settings_now}
+    write_meta(meta, path)
+    for old in retired:
+        shutil.rmtree(path/old, ignore_errors=True)
+    action = "Merged" if merge else "Indexed"
+    print(f"🔍 {action} {len(new_rows):,} tweets ({n_terms:,} terms) into topic index segment {name}; "
+          f"{len(meta['segments'])} segments")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Update or query the hashtag and term index over scored tweets")
+    ap.add_argument("terms", nargs="*", help="Terms or hashtags to query (quote multi-word terms)")
+    ap.add_argument("--state", action="append", help="Only tweets resolved to this state (repeatable)")
+    ap.add_argument("--all", action="store_true", help="Tweets must use every term, not any")
+    ap.add_argument("--period", choices=PERIODS, default='month')
+    ap.add_argument("--rebuild", action="store_true", help="Re-index every tweet in the store")
+    args = ap.parse_args()
+
+    if args.terms:
+        index = TopicIndex()
+        print(index.summary(args.terms, args.state, args.period, args.all).to_string(index=False))
+    else:
+        from tweet_store import TweetStore, STORE_PATH
+        if not STORE_PATH.exists():
+            print("⚠ Tweet store not found. Run: python vh.py sentiment")
+        else:
+            update_index(TweetStore.open(), rebuild=args.rebuild)
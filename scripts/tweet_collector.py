@@ -0,0 +1,315 @@
+"""
+Tweet Collector for Vaccine Hesitancy Research
+Collects tweets from the X (Twitter) API v2 search endpoint with asyncio: the
+collection window is split into time slices whose paginated searches run
+concurrently over one pooled connection set, within a shared rate limit.
+Pages stream straight to one CSV per slice, and a checkpoint of every slice's
+cursor and file offset lets an interrupted run resume without duplicates
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import time
+
+from lazy_imports import lazy_import
+from pipeline_config import settings, get_int, get_path
+
+aiohttp = lazy_import("aiohttp")
+
+COLLECTED_DIR = get_path('paths', 'tweets_collected')
+CHECKPOINT_PATH = COLLECTED_DIR/"_checkpoint.json"
+
+# Columns twitter_sentiment reads, plus the tweet id
+COLUMNS = ['id', 'text', 'date', 'user_location', 'retweets', 'likes']
+
+TWEET_FIELDS = "created_at,public_metrics,author_id"
+USER_FIELDS = "location"
+
+# One independently paginated search: tweets created in [start, end)
+Slice = namedtuple("Slice", ["key", "start", "end"])
+
+class CollectorError(Exception):
+    """A request that retrying cannot fix (bad query, credentials, or retries exhausted)"""
+
+def time_slices(start, end, hours):
+    """Consecutive slices of `hours` covering [start, end)"""
+    slices = []
+    step = timedelta(hours=hours)
+    while start < end:
+        stop = min(start + step, end)
+        slices.append(Slice(start.strftime('%Y-%m-%dT%H%M'), start, stop))
+        start = stop
+    return slices
+
+def iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class RateLimiter:
+    """Token bucket shared by every request: at most `rate` requests per `per` seconds.
+
+    A 429 response empties the bucket until the server's reset time.
+    """
+
+    def __init__(self, rate, per):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+
+    def block(self, seconds):
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+def retry_after(headers):
+    """Seconds to wait after a 429, from Retry-After or the x-rate-limit-reset epoch"""
+    if 'Retry-After' in headers:
+        return float(headers['Retry-After'])
+    if 'x-rate-limit-reset' in headers:
+        return max(float(headers['x-rate-limit-reset']) - time.time(), 0) + 1
+    return 60.0
+
+class Checkpoint:
+    """Per-slice cursor, pages, tweets and bytes written, saved atomically as JSON"""
+
+    def __init__(self, path, query):
+        self.path = path
+        self.query = query
+        self.slices = {}
+        if path.exists():
+            with open(path, "r") as f:
+                saved = json.load(f)
+            if saved.get('query') == query:
+                self.slices = saved['slices']
+            else:
+                print(f"⚠ Checkpoint at {path} is for a different query; starting over")
+
+    def state(self, key):
+        return self.slices.setdefault(key, {'next_token': None, 'offset': 0, 'pages': 0,
+                                            'tweets': 0, 'done': False})
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({'query': self.query, 'slices': self.slices}, f)
+        tmp.replace(self.path)
+
+def page_rows(payload):
+    """CSV rows for one API response page"""
+    users = {u['id']: u.get('location') or '' for u in payload.get('includes', {}).get('users', [])}
+    rows = []
+    for tweet in payload.get('data', []):
+        metrics = tweet.get('public_metrics', {})
+        rows.append([tweet['id'], tweet['text'], tweet.get('created_at', '')[:10],
+                     users.get(tweet.get('author_id'), ''),
+                     metrics.get('retweet_count', 0), metrics.get('like_count', 0)])
+    return rows
+
+class Collector:
+    """Concurrent, rate-limited, resumable collection of one query over a time range"""
+
+    def __init__(self, api_url, query, bearer_token=None, out_dir=COLLECTED_DIR,
+                 concurrency=None, rate_limit=None, rate_window=None, page_size=None,
+                 queue_pages=None, max_retries=None, timeout=None):
+        self.api_url = api_url
+        self.query = query
+        self.bearer_token = bearer_token
+        self.out_dir = out_dir
+        self.concurrency = concurrency or get_int('collector', 'concurrency')
+        self.rate_limit = rate_limit or get_int('collector', 'rate_limit')
+        self.rate_window = rate_window or get_int('collector', 'rate_window')
+        self.page_size = page_size or get_int('collector', 'page_size')
+        self.queue_pages = queue_pages or get_int('collector', 'queue_pages')
+        self.max_retries = max_retries if max_retries is not None else get_int('collector', 'max_retries')
+        self.timeout = timeout or get_int('collector', 'timeout')
+        self.checkpoint = Checkpoint(out_dir/CHECKPOINT_PATH.name, query)
+        self.stats = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'pages': 0, 'tweets': 0}
+
+    def slice_path(self, slice_):
+        return self.out_dir/f"tweets_{slice_.key}.csv"
+
+    def prepare(self, slices):
+        """Cut each unfinished slice's file back to its last checkpointed page"""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        for slice_ in slices:
+            state = self.checkpoint.state(slice_.key)
+            path = self.slice_path(slice_)
+            if path.exists() and path.stat().st_size != state['offset']:
+                with open(path, "r+b") as f:
+                    f.truncate(state['offset'])
+
+    async def get_page(self, session, limiter, params):
+        """One search page, retrying 429s after the reset and transient failures with backoff"""
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            self.stats['requests'] += 1
+            try:
+                async with session.get(self.api_url, params=params) as resp:
+                    if resp.status == 429:
+                        self.stats['rate_limited'] += 1
+                        limiter.block(retry_after(resp.headers))
+                        continue
+                    if 400 <= resp.status < 500:
+                        raise CollectorError(f"HTTP {resp.status}: {(await resp.text())[:200]}")
+                    resp.raise_for_status()
+                    return await resp.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise CollectorError(f"giving up after {attempt + 1} attempts: {e!r}") from e
+                self.stats['retries'] += 1
+                await asyncio.sleep(min(2 ** attempt, 60) * random.uniform(0.5, 1.0))
+        raise CollectorError(f"still rate limited after {self.max_retries + 1} attempts")
+
+    async def fetch_slice(self, session, limiter, queue, slice_):
+        """Page through one slice from its checkpointed cursor; pages go to the writer queue"""
+        state = self.checkpoint.state(slice_.key)
+        token, page = state['next_token'], state['pages']
+        params = {'query': self.query, 'start_time': iso(slice_.start), 'end_time': iso(slice_.end),
+                  'max_results': str(self.page_size), 'tweet.fields': TWEET_FIELDS,
+                  'expansions': 'author_id', 'user.fields': USER_FIELDS}
+        while True:
+            if token:
+                params['next_token'] = token
+            payload = await self.get_page(session, limiter, params)
+            token = payload.get('meta', {}).get('next_token')
+            # Blocks when the writer falls behind, so fetchers never outrun the disk
+            await queue.put((slice_, page, page_rows(payload), token))
+            page += 1
+            if not token:
+                return
+
+    def write_page(self, slice_, rows, token):
+        """Append one page to its slice file, then record the new cursor and offset"""
+        state = self.checkpoint.state(slice_.key)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if state['offset'] == 0:
+            writer.writerow(COLUMNS)
+        writer.writerows(rows)
+        with open(self.slice_path(slice_), "ab") as f:
+            f.write(buffer.getvalue().encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            state['offset'] = f.tell()
+        state['next_token'] = token
+        state['pages'] += 1
+        state['tweets'] += len(rows)
+        state['done'] = token is None
+        self.stats['pages'] += 1
+        self.stats['tweets'] += len(rows)
+
+    async def write_pages(self, queue, checkpoint_every=2.0):
+        """Single writer: drains the queue in order and saves the checkpoint every few seconds"""
+        last_save = time.monotonic()
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            slice_, _, rows, token = item
+            await asyncio.to_thread(self.write_page, slice_, rows, token)
+            if time.monotonic() - last_save > checkpoint_every:
+                # A checkpoint behind the files is safe: resume truncates back to it
+                self.checkpoint.save()
+                last_save = time.monotonic()
+        self.checkpoint.save()
+
+    async def run(self, slices):
+        """Collect every unfinished slice; returns the slices that failed"""
+        pending = [s for s in slices if not self.checkpoint.state(s.key)['done']]
+        self.prepare(pending)
+        if not pending:
+            return []
+
+        limiter = RateLimiter(self.rate_limit, self.rate_window)
+        queue = asyncio.Queue(maxsize=self.queue_pages)
+        slots = asyncio.Semaphore(self.concurrency)
+        headers = {'Authorization': f"Bearer {self.bearer_token}"} if self.bearer_token else {}
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        failed = []
+
+        async def collect_slice(slice_):
+            async with slots:
+                try:
+                    await self.fetch_slice(session, limiter, queue, slice_)
+                except CollectorError as e:
+                    print(f"❌ Slice {slice_.key} failed: {e}")
+                    failed.append(slice_)
+
+        async with aiohttp.ClientSession(connector=connector, headers=headers,
+                                         timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            writer = asyncio.create_task(self.write_pages(queue))
+            try:
+                await asyncio.gather(*(collect_slice(s) for s in pending))
+            finally:
+                await queue.put(None)
+                await writer
+        return failed
+
+def parse_day(text):
+    return datetime.strptime(text, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Collect tweets from the X API v2 search endpoint (resumable)")
+    ap.add_argument("--start", required=True, help="First day to collect (YYYY-MM-DD)")
+    ap.add_argument("--end", required=True, help="Day after the last one to collect (YYYY-MM-DD)")
+    ap.add_argument("--query", default=settings.get('collector', 'query'), help="Search query")
+    ap.add_argument("--api-url", default=settings.get('collector', 'api_url'),
+                    help="Search endpoint (point at mock_twitter_api.py to test offline)")
+    ap.add_argument("--slice-hours", type=int, default=get_int('collector', 'slice_hours'),
+                    help="Hours per independently paginated slice")
+    ap.add_argument("--concurrency", type=int, help="Slices fetched at once (default from vh.ini)")
+    ap.add_argument("--rate-limit", type=int, help="Requests allowed per rate window (default from vh.ini)")
+    ap.add_argument("--rate-window", type=int, help="Rate window in seconds (default from vh.ini)")
+    ap.add_argument("--out", default=str(COLLECTED_DIR), help="Directory for the per-slice CSV files")
+    args = ap.parse_args(argv)
+
+    slices = time_slices(parse_day(args.start), parse_day(args.end), args.slice_hours)
+    collector = Collector(args.api_url, args.query, bearer_token=os.environ.get("TWITTER_BEARER_TOKEN"),
+                          out_dir=Path(args.out), concurrency=args.concurrency,
+                          rate_limit=args.rate_limit, rate_window=args.rate_window)
+    done_before = sum(collector.checkpoint.state(s.key)['done'] for s in slices)
+    print(f"🐦 Collecting {len(slices)} slices ({done_before} already done) from {args.api_url}")
+
+    start = time.perf_counter()
+    try:
+        failed = asyncio.run(collector.run(slices))
+    except KeyboardInterrupt:
+        print("\n⚠ Interrupted; progress is checkpointed and the next run resumes from it")
+        return 130
+    elapsed = time.perf_counter() - start
+
+    s = collector.stats
+    print(f"✅ Collected {s['tweets']:,} tweets in {s['pages']:,} pages in {elapsed:.1f}s "
+          f"({s['tweets'] / max(elapsed, 1e-9):,.0f} tweets/s, {s['requests']:,} requests, "
+          f"{s['retries']} retries, {s['rate_limited']} rate-limited)")
+    print(f"📁 Files in {args.out}")
+    if failed:
+        print(f"⚠ {len(failed)} slice(s) failed; run again to resume them")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
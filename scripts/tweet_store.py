@@ -0,0 +1,319 @@
+"""
+Tweet Store for Vaccine Hesitancy Research
+Columnar tweet records backed by Arrow: string arrays for text, dictionary-encoded
+location and label, int32 day numbers and float32 sentiment, saved as a
+memory-mappable Arrow file and aggregated without building per-tweet Python objects
+"""
+
+from datetime import date
+import json
+
+from lazy_imports import lazy_import
+from pipeline_config import get_path
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+pacsv = lazy_import("pyarrow.csv")
+
+STORE_PATH = get_path('paths', 'tweet_store')
+
+LABELS = ['negative', 'neutral', 'positive']
+
+# Tweet cleaning rules (URLs, mentions, hashtags, punctuation) in RE2 syntax; \w is spelled out as letters,
+# combining marks, digits and underscore so Indic words keep their vowel signs through the punctuation pass
+CLEAN_PATTERNS = [r'http\S+', r'@[\p{L}\p{M}\p{N}_]+', r'#[\p{L}\p{M}\p{N}_]+', r'[^\p{L}\p{M}\p{N}_\s]']
+
+# Raw columns read as strings; any other column is left to Arrow's type inference
+TEXT_COLUMNS = ['text', 'date', 'user_location']
+# Kept in the store as strings (tweet ids overflow int32 and lose digits as floats)
+ID_COLUMNS = ['id']
+
+def read_tweet_csvs(files):
+    """Raw tweet CSVs as one Arrow table, without going through pandas object columns"""
+    tables = []
+    for f in files:
+        convert = pacsv.ConvertOptions(column_types={c: pa.string() for c in TEXT_COLUMNS + ID_COLUMNS})
+        tables.append(pacsv.read_csv(f, convert_options=convert))
+    return pa.concat_tables(tables, promote_options="default")
+
+def clean_text_array(text):
+    """Clean tweets for sentiment analysis: lowercase, strip URLs, mentions, hashtags and punctuation"""
+    text = pc.utf8_lower(text)
+    for pattern in CLEAN_PATTERNS:
+        text = pc.replace_substring_regex(text, pattern=pattern, replacement='')
+    return pc.utf8_trim_whitespace(text)
+
+def day_numbers(dates):
+    """Days since 1970-01-01 as int32, null where a date cannot be parsed"""
+    try:
+        stamps = pc.cast(dates, pa.timestamp('s'))
+    except pa.ArrowInvalid:
+        # Mixed or zoned formats: let pandas parse just this one column
+        parsed = pd.to_datetime(dates.to_pandas(), errors='coerce', format='mixed', utc=True)
+        stamps = pa.array(parsed.dt.tz_localize(None), type=pa.timestamp('ns'))
+    return pc.cast(pc.cast(stamps, pa.date32()), pa.int32())
+
+def score_unique(clean_text, backend):
+    """Score each distinct text once with a sentiment backend and broadcast the scores back"""
+    uniques = pc.unique(clean_text)
+    scores = backend.score(uniques)
+    positions = pc.index_in(clean_text, value_set=uniques).to_numpy(zero_copy_only=False)
+    return scores[positions]
+
+def route_unique(clean_text, router):
+    """Score and detect the language of each distinct text once, and broadcast both back"""
+    uniques = pc.unique(clean_text)
+    scores, languages = router.score(uniques)
+    positions = pc.index_in(clean_text, value_set=uniques).to_numpy(zero_copy_only=False)
+    return scores[positions], languages[positions]
+
+def label_array(sentiment, thresholds=(-0.1, 0.1)):
+    """Dictionary-encoded positive / neutral / negative labels from sentiment scores and (negative, positive)
+    thresholds, either scalars or one per score"""
+    negative, positive = thresholds
+    codes = np.select([sentiment > positive, sentiment < negative], [2, 0], default=1).astype(np.int8)
+    return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int8()), pa.array(LABELS))
+
+class TweetStore:
+    """Scored tweets as a compact Arrow table with vectorized aggregations"""
+
+    def __init__(self, table):
+        self.table = table
+
+    @classmethod
+    def from_raw(cls, raw, backend, batch_rows=None, router=None):
+        """Clean and score a raw tweet table with a sentiment backend, batch_rows at a time, and build the compact store;
+        with a language router, each language is scored by its own route and recorded in a language column"""
+        raw = raw.filter(pc.invert(pc.is_null(raw['text'])))
+        clean = clean_text_array(raw['text'])
+        keep = pc.greater(pc.utf8_length(clean), 0)
+        raw, clean = raw.filter(keep), clean.filter(keep)
+
+        batch_rows = batch_rows or max(len(raw), 1)
+        starts = range(0, len(raw), batch_rows)
+        if router is None:
+            sentiment = np.concatenate([score_unique(clean.slice(start, batch_rows), backend)
+                                        for start in starts] or [np.empty(0)])
+        else:
+            routed = [route_unique(clean.slice(start, batch_rows), router) for start in starts]
+            sentiment = np.concatenate([s for s, _ in routed] or [np.empty(0)])
+            languages = np.concatenate([lang for _, lang in routed] or [np.empty(0, np.int8)])
+
+        if 'date' in raw.column_names:
+            days = day_numbers(raw['date'])
+        else:
+            days = pa.array(np.full(len(raw), (date.today() - date(1970, 1, 1)).days, dtype=np.int32))
+
+        columns = {'text': raw['text'], 'clean_text': clean, 'day': days}
+        if 'user_location' in raw.column_names:
+            columns['user_location'] = pc.dictionary_encode(raw['user_location'].combine_chunks())
+        columns['sentiment'] = pa.array(sentiment, type=pa.float32())
+        # Labels come from the full-precision scores so threshold ties match twitter_sentiment
+        columns['label'] = label_array(sentiment, backend.thresholds if router is None else router.thresholds(languages))
+        if router is not None:
+            columns['language'] = pa.DictionaryArray.from_arrays(pa.array(languages, type=pa.int8()),
+                                                                 pa.array(router.languages))
+        for name in raw.column_names:
+            if name not in columns and name not in TEXT_COLUMNS:
+                col = raw[name]
+                columns[name] = pc.cast(col, pa.int32()) if pa.types.is_integer(col.type) else col
+        # Which backend scored the store travels with it, for the index, manuscript and dashboard
+        metadata = {'sentiment_backend': backend.name, 'sentiment_thresholds': json.dumps(list(backend.thresholds))}
+        return cls(pa.table(columns, metadata=metadata).combine_chunks())
+
+    @classmethod
+    def open(cls, path=STORE_PATH):
+        """Memory-map a saved store; columns are read from the page cache without copying"""
+        with pa.memory_map(str(path)) as source:
+            return cls(pa.ipc.open_file(source).read_all())
+
+    def save(self, path=STORE_PATH):
+        tmp = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, self.table.schema) as writer:
+            writer.write_table(self.table)
+        tmp.replace(path)
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    @property
+    def columns(self):
+        return self.table.column_names
+
+    @property
+    def backend(self):
+        """Name of the sentiment backend that scored the store ('textblob' for stores saved before backends)"""
+        return (self.table.schema.metadata or {}).get(b'sentiment_backend', b'textblob').decode()
+
+    @property
+    def thresholds(self):
+        """(negative, positive) label thresholds the store was labelled with"""
+        raw = (self.table.schema.metadata or {}).get(b'sentiment_thresholds')
+        return tuple(json.loads(raw)) if raw else (-0.1, 0.1)
+
+    @property
+    def sentiment(self):
+        return self.table['sentiment'].to_numpy()
+
+    def scores(self):
+        """Sentiment as float64 for aggregation, rounded to the 6 decimals float32 reliably holds"""
+        return self.sentiment.astype(np.float64).round(6)
+
+    def codes(self, name):
+        """Dictionary indices (-1 for nulls) and values of an encoded column"""
+        column = self.table[name].combine_chunks()
+        return pc.fill_null(column.indices, -1).to_numpy(), column.dictionary.to_pylist()
+
+    def days(self):
+        """Day number (days since 1970-01-01) per tweet, -1 where the date is missing"""
+        return pc.fill_null(self.table['day'], -1).to_numpy()
+
+    def months(self):
+        """Month number since 1970-01 per tweet, -1 where the date is missing"""
+        days = self.table['day'].to_numpy(zero_copy_only=False)
+        valid = ~np.isnan(days) if days.dtype.kind == 'f' else np.ones(len(days), dtype=bool)
+        months = np.full(len(days), -1, dtype=np.int32)
+        months[valid] = days[valid].astype('datetime64[D]').astype('datetime64[M]').astype(np.int32)
+        return months
+
+    def with_clusters(self, clusters):
+        """Copy of the store with an int32 near-duplicate cluster id per tweet"""
+        table = self.table.drop_columns(['cluster']) if 'cluster' in self.columns else self.table
+        return TweetStore(table.append_column('cluster', pa.array(clusters, type=pa.int32())))
+
+    def cluster_weights(self, groups):
+        """Per-tweet weight 1 / (tweets of the same near-duplicate cluster in the same group), so each
+        cluster counts once per group; all ones when the store has no clusters"""
+        if 'cluster' not in self.columns:
+            return np.ones(len(self))
+        clusters = self.table['cluster'].to_numpy().astype(np.int64)
+        _, cell, sizes = np.unique(clusters * (int(groups.max(initial=0)) + 2) + (groups + 1),
+                                   return_inverse=True, return_counts=True)
+        return 1.0 / sizes[cell]
+
+    def monthly_summary(self):
+        """Mean, SD and count of sentiment plus label counts per month, as twitter_sentiment has always written;
+        with near-duplicate clusters, the mean and SD count each cluster once per month"""
+        months = self.months()
+        valid = months >= 0
+        labels, label_names = self.codes('label')
+        sentiment = self.scores()
+        weights = self.cluster_weights(months)[valid]
+
+        month_ids, month_idx = np.unique(months[valid], return_inverse=True)
+        k = len(month_ids)
+        s, lab = sentiment[valid], labels[valid]
+        count = np.bincount(month_idx, minlength=k)
+        effective = np.bincount(month_idx, weights=weights, minlength=k)
+        total = np.bincount(month_idx, weights=s * weights, minlength=k)
+        mean = total / np.maximum(effective, 1e-12)
+        sq = np.bincount(month_idx, weights=weights * (s - mean[month_idx]) ** 2, minlength=k)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(sq / (effective - 1))
+
+        # Label counts per month, largest first and ties in order of first appearance
+        n_labels = len(label_names)
+        cell = month_idx * n_labels + lab
+        label_counts = np.bincount(cell, minlength=k * n_labels).reshape(k, n_labels)
+        first_seen = np.full(k * n_labels, len(cell), dtype=np.int64)
+        np.minimum.at(first_seen, cell, np.arange(len(cell)))
+        first_seen = first_seen.reshape(k, n_labels)
+        label_dicts = []
+        for row_counts, row_first in zip(label_counts, first_seen):
+            order = sorted(np.flatnonzero(row_counts), key=lambda j: (-row_counts[j], row_first[j]))
+            label_dicts.append({label_names[j]: int(row_counts[j]) for j in order})
+
+        summary = pd.DataFrame({
+            'month': month_ids.astype('datetime64[M]').astype(str),
+            'sentiment_mean': mean.round(3),
+            'sentiment_std': std.round(3),
+            'sentiment_count': count,
+            'label_<lambda>': label_dicts
+        })
+        if 'cluster' in self.columns:
+            summary['sentiment_raw_mean'] = (np.bincount(month_idx, weights=s, minlength=k) / np.maximum(count, 1)).round(3)
+            summary['sentiment_clusters'] = effective.round().astype(np.int64)
+        return summary
+
+    def label_counts(self):
+        """Tweets per label, largest first"""
+        labels, label_names = self.codes('label')
+        counts = pd.Series(np.bincount(labels, minlength=len(label_names)), index=label_names, name='count')
+        return counts[counts > 0].sort_values(ascending=False, kind='stable').rename_axis('label')
+
+    def language_summary(self):
+        """Tweets, share, mean sentiment and label counts per detected language, largest first"""
+        if 'language' not in self.columns:
+            return None
+        codes, names = self.codes('language')
+        labels, label_names = self.codes('label')
+        k = len(names)
+        counts = np.bincount(codes, minlength=k)
+        result = pd.DataFrame({'language': names, 'tweets': counts, 'share': counts / max(len(self), 1),
+                               'sentiment': np.bincount(codes, weights=self.scores(), minlength=k) / np.maximum(counts, 1)})
+        for i, label in enumerate(label_names):
+            result[label] = np.bincount(codes[labels == i], minlength=k)
+        return (result[result['tweets'] > 0].round({'share': 4, 'sentiment': 3})
+                .sort_values('tweets', ascending=False, kind='stable').reset_index(drop=True))
+
+    def location_sentiment(self):
+        """Mean sentiment per user location"""
+        if 'user_location' not in self.columns:
+            return None
+        codes, names = self.codes('user_location')
+        valid = codes >= 0
+        sums = np.bincount(codes[valid], weights=self.scores()[valid], minlength=len(names))
+        counts = np.bincount(codes[valid], minlength=len(names))
+        means = pd.Series(sums / np.maximum(counts, 1), index=pd.Index(names, name='user_location'), name='sentiment')
+        return means[counts > 0].sort_index().round(3)
+
+    def with_states(self, resolver):
+        """Copy of the store with a dictionary-encoded state column resolved from user_location"""
+        if 'user_location' not in self.columns:
+            return self
+        codes, names = self.codes('user_location')
+        # The location dictionary already holds each distinct string once
+        states = resolver.resolve(names)['state'].to_numpy(dtype=object)
+        state = pc.dictionary_encode(pa.array(states, type=pa.string()).take(pa.array(codes)))
+        table = self.table.drop_columns(['state']) if 'state' in self.columns else self.table
+        return TweetStore(table.append_column('state', state).combine_chunks())
+
+    def state_sentiment(self):
+        """Tweet count and mean sentiment per resolved state, counting each near-duplicate cluster once per state"""
+        if 'state' not in self.columns:
+            return None
+        codes, names = self.codes('state')
+        valid = codes >= 0
+        weights = self.cluster_weights(codes)[valid]
+        counts = np.bincount(codes[valid], minlength=len(names))
+        effective = np.bincount(codes[valid], weights=weights, minlength=len(names))
+        sums = np.bincount(codes[valid], weights=self.scores()[valid] * weights, minlength=len(names))
+        result = pd.DataFrame({'state': names, 'tweets': counts, 'sentiment': sums / np.maximum(effective, 1e-12)})
+        return result[result['tweets'] > 0].sort_values('state').round({'sentiment': 3}).reset_index(drop=True)
+
+    def write_detailed_csv(self, path):
+        """Per-tweet CSV export, with dates and months written back as text"""
+        dates = pc.cast(self.table['day'], pa.date32())
+        stamps = pc.cast(dates, pa.timestamp('s'))
+        out = {}
+        for name in self.columns:
+            if name == 'day':
+                out['date'] = dates
+            elif name not in ('clean_text', 'sentiment', 'label'):
+                out[name] = self.table[name]
+        out['clean_text'] = self.table['clean_text']
+        out['sentiment'] = self.table['sentiment']
+        out['label'] = self.table['label']
+        # The CSV writer needs plain strings in place of dictionary columns
+        out = {name: pc.cast(col, pa.string()) if pa.types.is_dictionary(col.type) else col
+               for name, col in out.items()}
+        out['month'] = pc.strftime(stamps, format='%Y-%m')
+        out['year'] = pc.year(dates)
+        pacsv.write_csv(pa.table(out), str(path), write_options=pacsv.WriteOptions(quoting_style='needed'))
@@ -1,90 +1,118 @@
-import tweepy, pandas as pd, os
-from textblob import TextBlob
-from pathlib import Path
-from datetime import datetime, timedelta
-import re
-
-BASE = Path("projects/vaccine_hesitancy")
-OUTT = BASE/"outputs/tables"
+import argparse
+import time
+
+from pipeline_config import DATA_DIR, OUTPUTS, get_chunk_rows, get_int, get_path, settings
+from plot_reduction import auto_bin
+from tweet_store import TweetStore, STORE_PATH, read_tweet_csvs
+from geo_resolver import GeoResolver, GAZETTEER_PATH
+from near_duplicates import cluster_tweets, cluster_table
+from topic_index import update_index
+from sentiment_backends import BACKENDS, BackendUnavailable, get_backend
+from language_routing import LANGUAGE_NAMES, LanguageRouter, routing_enabled
+from data_validation import require_valid
+
+OUTT = OUTPUTS/"tables"
+VIEWS = OUTPUTS/"views"
 OUTT.mkdir(parents=True, exist_ok=True)
+VIEWS.mkdir(parents=True, exist_ok=True)
 
-def analyze_text(text):
-    """Analyze sentiment of text using TextBlob"""
-    return TextBlob(str(text)).sentiment.polarity
-
-def clean_text(text):
-    """Clean text for better sentiment analysis"""
-    text = str(text).lower()
-    text = re.sub(r'http\S+', '', text)  # Remove URLs
-    text = re.sub(r'@\w+', '', text)     # Remove mentions
-    text = re.sub(r'#\w+', '', text)     # Remove hashtags
-    text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
-    return text.strip()
-
-def fetch_or_load():
+def fetch_or_load(backend=None, batch_size=None, languages=None):
     """Load Twitter data and perform sentiment analysis"""
-    twdir = BASE/"data/twitter"
+    twdir = DATA_DIR/"twitter"
     twdir.mkdir(parents=True, exist_ok=True)
-    files = list(twdir.glob("*.csv"))
+    # Sample or manually added files, plus the per-slice files from `python vh.py collect`
+    files = list(twdir.glob("*.csv")) + sorted(get_path('paths', 'tweets_collected').glob("tweets_*.csv"))
 
     if files:
         print(f"🐦 Found {len(files)} Twitter data files")
-        df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
-        print(f"📊 Loaded {len(df)} tweets")
+        raw = read_tweet_csvs(files)
+        print(f"📊 Loaded {raw.num_rows} tweets")
+        # Unparseable or impossible dates would otherwise become null days without a word
+        require_valid('tweets', raw)
     else:
         print("⚠ No Twitter data files found. Run data extraction first:")
-        print("  python projects/vaccine_hesitancy/scripts/data_extraction.py")
+        print("  python vh.py extract")
         return
 
-    # Clean text data
-    df["clean_text"] = df["text"].apply(clean_text)
+    try:
+        backend = get_backend(backend, batch_size)
+    except BackendUnavailable as e:
+        print(f"❌ {e}")
+        return
 
-    # Remove empty tweets
-    df = df[df["clean_text"].str.len() > 0].copy()
+    # Hindi, Romanized Hindi and other Indian languages go to their own lexicons
+    router = LanguageRouter(backend) if (routing_enabled() if languages is None else languages) else None
+
+    # Clean, score (each distinct text once) and pack into the compact store
+    print(f"📝 Analyzing sentiment for {raw.num_rows} tweets with the {backend.name} backend"
+          f"{' and language routing' if router else ''}...")
+    start = time.perf_counter()
+    store = TweetStore.from_raw(raw, backend, batch_rows=get_chunk_rows('tweet_rows'), router=router)
+    print(f"⏱ Scored in {time.perf_counter() - start:.1f}s")
+    if GAZETTEER_PATH.exists():
+        store = store.with_states(GeoResolver.load())
+    else:
+        print(f"⚠ Gazetteer not found at {GAZETTEER_PATH}; tweets will not be resolved to states")
 
-    if len(df) == 0:
+    if len(store) == 0:
         print("⚠ No valid tweets found after cleaning")
         return
 
-    print(f"📝 Analyzing sentiment for {len(df)} tweets...")
-
-    # Analyze sentiment
-    df["sentiment"] = df["clean_text"].apply(analyze_text)
-    df["label"] = df["sentiment"].apply(lambda x: "positive" if x > 0.1 else "negative" if x < -0.1 else "neutral")
+    # Copy-paste campaigns: near-duplicate clusters count once per month and state in the summaries
+    if settings.getboolean('dedup', 'enabled'):
+        store = store.with_clusters(cluster_tweets(store.table['clean_text']))
+        clusters = cluster_table(store, top=get_int('dedup', 'top_clusters'))
+        clusters.to_csv(OUTT/"twitter_duplicate_clusters.csv", index=False)
+        n_clusters = int(store.table['cluster'].to_numpy().max()) + 1
+        print(f"🔍 {n_clusters:,} near-duplicate clusters among {len(store):,} tweets "
+              f"({1 - n_clusters / len(store):.0%} of tweets repeat a cluster)")
 
-    # Convert date column
-    if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"], errors='coerce')
-    else:
-        df["date"] = datetime.now()
-
-    # Create monthly aggregation
-    df["month"] = df["date"].dt.to_period("M")
-    df["year"] = df["date"].dt.year
+    store.save()
+    print(f"📦 Tweet store: {len(store):,} tweets, {store.nbytes / 1e6:.2f} MB "
+          f"({store.nbytes / len(store):.0f} bytes/tweet) saved to {STORE_PATH}")
+    update_index(store)
 
     # Create time series summary
-    summary = df.groupby("month").agg({
-        "sentiment": ["mean", "std", "count"],
-        "label": lambda x: x.value_counts().to_dict()
-    }).round(3)
-
-    # Flatten column names
-    summary.columns = ["_".join(col).strip() for col in summary.columns]
-    summary = summary.reset_index()
+    summary = store.monthly_summary()
 
     # Save results
-    df.to_csv(OUTT/"twitter_sentiment_detailed.csv", index=False)
+    store.write_detailed_csv(OUTT/"twitter_sentiment_detailed.csv")
     summary.to_csv(OUTT/"twitter_sentiment_timeseries.csv", index=False)
 
-    print("✅ Sentiment analysis complete!")
-    print(f"📈 Average sentiment: {df['sentiment'].mean():.3f}")
-    print(f"📊 Sentiment distribution: {df['label'].value_counts().to_dict()}")
+    # Label counts for the dashboard, so it never reads the detailed file
+    label_counts = store.label_counts()
+    label_counts.reset_index(name="count").to_csv(VIEWS/"sentiment_label_counts.csv", index=False)
+    auto_bin(store.scores()).to_csv(VIEWS/"sentiment_score_bins.csv", index=False)
 
-    # State-wise analysis if location data available
-    if "user_location" in df.columns:
-        state_summary = df.groupby("user_location")["sentiment"].mean().round(3)
-        state_summary.to_csv(OUTT/"twitter_sentiment_by_state.csv")
-        print("✅ State-wise sentiment analysis saved.")
+    print("✅ Sentiment analysis complete!")
+    print(f"📈 Average sentiment: {store.scores().mean():.3f}")
+    print(f"📊 Sentiment distribution: {label_counts.to_dict()}")
+
+    # Tweets per detected language, and how each was scored
+    language_summary = store.language_summary()
+    if language_summary is not None:
+        language_summary.insert(1, 'name', language_summary['language'].map(LANGUAGE_NAMES))
+        language_summary['scored_with'] = language_summary['language'].map(router.scored_with(language_summary['language']))
+        language_summary.to_csv(OUTT/"twitter_sentiment_by_language.csv", index=False)
+        print(f"🌐 Languages: {dict(zip(language_summary['language'], language_summary['tweets']))}")
+
+    # Location-wise analysis if location data available
+    location_summary = store.location_sentiment()
+    if location_summary is not None:
+        location_summary.to_csv(OUTT/"twitter_sentiment_by_location.csv")
+
+    # Locations resolved to NFHS state names, so this joins on the survey's state column
+    state_summary = store.state_sentiment()
+    if state_summary is not None:
+        state_summary.to_csv(OUTT/"twitter_sentiment_by_state.csv", index=False)
+        resolved = state_summary['tweets'].sum() / len(store)
+        print(f"✅ State-wise sentiment analysis saved ({resolved:.0%} of tweets resolved to a state).")
 
 if __name__ == "__main__":
-    fetch_or_load()
+    ap = argparse.ArgumentParser(description="Score tweet sentiment and aggregate it by month and location")
+    ap.add_argument("--backend", choices=list(BACKENDS), help="Sentiment backend (default: [sentiment] backend)")
+    ap.add_argument("--batch-size", type=int, help="Texts per scoring batch (default: [sentiment] batch_size)")
+    ap.add_argument("--languages", action=argparse.BooleanOptionalAction,
+                    help="Route non-English tweets to their own lexicons (default: [languages] enabled)")
+    args = ap.parse_args()
+    fetch_or_load(args.backend, args.batch_size, args.languages)
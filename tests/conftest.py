@@ -0,0 +1,9 @@
+"""
+Test Configuration for Vaccine Hesitancy Research
+Puts scripts/ on the import path, as the pipeline stages run from there
+"""
+
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]/"scripts"))
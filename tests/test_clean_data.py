@@ -0,0 +1,43 @@
+"""NFHS cleaning: reading in chunks must give the same frame as one read"""
+
+import numpy as np
+import pandas as pd
+
+import clean_data
+
+def write_survey(path, n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'State': rng.choice(['Bihar', 'Kerala', 'Assam'], n),
+        'gender': rng.choice(['Male', 'Female'], n),
+        'education': rng.choice(['No Education', 'Primary', 'Secondary', 'Higher'], n),
+        'age': rng.integers(18, 66, n),
+        'vaccine_hesitant': rng.integers(0, 2, n),
+    })
+    # A category seen only late in the file, and a column with gaps
+    df.loc[n - 5:, 'State'] = 'Goa'
+    df['religion'] = rng.choice(['Hindu', 'Muslim', None], n)
+    df.to_csv(path, index=False)
+    return df
+
+def test_chunked_read_matches_single_read(tmp_path, monkeypatch):
+    write_survey(tmp_path/"a.csv")
+    write_survey(tmp_path/"b.csv", seed=1)
+    files = sorted(tmp_path.glob("*.csv"))
+
+    monkeypatch.setattr(clean_data, 'get_chunk_rows', lambda key: 0)
+    whole = clean_data.read_nfhs(files)
+    monkeypatch.setattr(clean_data, 'get_chunk_rows', lambda key: 64)
+    chunked = clean_data.read_nfhs(files)
+
+    assert isinstance(chunked['state'].dtype, pd.CategoricalDtype)
+    assert list(chunked['state'].cat.categories) == ['Assam', 'Bihar', 'Goa', 'Kerala']
+    pd.testing.assert_frame_equal(chunked.astype(object), whole.astype(object))
+
+def test_concat_compact_mixed_columns():
+    first = clean_data.compact(pd.DataFrame({'age': ['25', 'unknown'], 'state': ['Goa', 'Bihar']}))
+    second = clean_data.compact(pd.DataFrame({'age': [30, 41], 'district': ['Patna', 'Gaya']}))
+    combined = clean_data.concat_compact([first, second])
+    assert combined['age'].astype(object).tolist() == ['25', 'unknown', 30, 41]
+    assert combined['state'].isna().tolist() == [False, False, True, True]
+    assert combined['district'].astype(object).tolist()[2:] == ['Patna', 'Gaya']
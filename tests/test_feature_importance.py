@@ -0,0 +1,52 @@
+"""Feature importance: deviance changes and Wald tests against statsmodels refits"""
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from feature_importance import compute_importance
+
+def design(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    education = rng.choice(['none', 'primary', 'secondary'], n)
+    X = pd.DataFrame({
+        'const': 1.0,
+        'age_group': rng.integers(1, 5, n).astype(float),
+        'rural': rng.integers(0, 2, n).astype(float),
+        'education_primary': (education == 'primary').astype(float),
+        'education_secondary': (education == 'secondary').astype(float),
+    })
+    eta = -0.5 + 0.3 * X['age_group'] - 0.1 * X['rural'] - 0.6 * X['education_secondary']
+    y = rng.binomial(1, 1 / (1 + np.exp(-eta)))
+    X.attrs['features'] = ['age_group', 'rural', 'education']
+    return X, y
+
+def test_matches_statsmodels():
+    X, y = design()
+    full = sm.Logit(y, X).fit(disp=0)
+    table = compute_importance(X, y, full.params, workers=1)
+
+    terms = table.set_index('term')
+    np.testing.assert_allclose(terms['coefficient'], full.params[terms.index], rtol=1e-6)
+    np.testing.assert_allclose(terms['se'], full.bse[terms.index], rtol=1e-5)
+    np.testing.assert_allclose(terms['p_value'], full.pvalues[terms.index], rtol=1e-4)
+    assert np.isclose(table.attrs['base_deviance'], -2 * full.llf)
+
+    features = table.drop_duplicates('feature').set_index('feature')
+    assert features.loc['education', 'feature_df'] == 2
+    for feature in X.attrs['features']:
+        kept = [c for c in X.columns if not (c == feature or c.startswith(feature + "_"))]
+        reduced = sm.Logit(y, X[kept]).fit(disp=0)
+        assert np.isclose(features.loc[feature, 'deviance_change'], 2 * (full.llf - reduced.llf), rtol=1e-6)
+        cols = [c for c in X.columns if c not in kept]
+        wald = full.wald_test(np.eye(len(X.columns))[[X.columns.get_loc(c) for c in cols]], scalar=True)
+        assert np.isclose(features.loc[feature, 'feature_wald_chi2'], wald.statistic, rtol=1e-5)
+
+    # Ranks follow the deviance change, largest first
+    assert features['rank'].tolist() == features['deviance_change'].rank(ascending=False).astype(int).tolist()
+
+def test_parallel_refits_match_serial():
+    X, y = design(seed=1)
+    params = sm.Logit(y, X).fit(disp=0).params
+    pd.testing.assert_frame_equal(compute_importance(X, y, params, workers=2),
+                                  compute_importance(X, y, params, workers=1))
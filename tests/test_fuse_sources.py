@@ -0,0 +1,41 @@
+"""Source fusion: lagged cross-correlations and panel alignment"""
+
+import numpy as np
+import pandas as pd
+
+import fuse_sources
+
+def test_lag_recovers_a_known_shift():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(5, 60))
+    y = np.full_like(x, np.nan)
+    # y follows x two periods later
+    y[:, 2:] = x[:, :-2] + 0.1 * rng.normal(size=(5, 58))
+    rows = {row['lag']: row for row in fuse_sources.lagged_correlations(x, y, 4)}
+    assert max(rows, key=lambda lag: rows[lag]['r']) == 2
+    assert rows[2]['r'] > 0.99 and rows[2]['n'] == 5 * 58
+    assert abs(rows[0]['r']) < 0.3
+
+def test_lagged_correlations_match_pandas():
+    rng = np.random.default_rng(1)
+    x, y = rng.normal(size=(3, 20)), rng.normal(size=(3, 20))
+    x[0, 5] = y[1, 7] = np.nan
+    for row in fuse_sources.lagged_correlations(x, y, 3):
+        shifted = pd.DataFrame(y).shift(-row['lag'], axis=1).to_numpy()
+        pairs = pd.DataFrame({'x': x.ravel(), 'y': shifted.ravel()}).dropna()
+        assert row['n'] == len(pairs)
+        assert np.isclose(row['r'], pairs['x'].corr(pairs['y']))
+
+def test_panel_fills_states_from_national_trends():
+    day = np.datetime64('2024-01-01', 'D').astype(np.int64)
+    tweets = (np.array(['Bihar', 'Kerala', 'Kerala'], dtype=object), np.array([day, day, day + 7]),
+              np.array([0.5, -0.5, 0.25]))
+    trends = (np.array([None, None, 'Kerala'], dtype=object), np.array([day, day + 7, day]),
+              np.array(['vaccine', 'vaccine', 'vaccine'], dtype=object), np.array([40.0, 60.0, 90.0]))
+    states, periods, grids = fuse_sources.build_panel(tweets, trends, None, 'week')
+
+    assert states == ['Bihar', 'Kerala']
+    assert fuse_sources.period_starts(periods, 'week').tolist() == ['2024-01-01', '2024-01-08']
+    np.testing.assert_array_equal(grids['sentiment'], [[0.5, np.nan], [-0.5, 0.25]])
+    # Bihar has no series of its own and takes the national one; Kerala keeps its own
+    np.testing.assert_array_equal(grids['search_vaccine'], [[40.0, 60.0], [90.0, np.nan]])
@@ -0,0 +1,33 @@
+"""Plot cache: a chart group's fingerprint follows the code that renders it"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import generate_visualizations as viz
+
+def test_reducer_change_only_invalidates_its_groups(tmp_path, monkeypatch):
+    # Point every pipeline module at a copy, so one of them can be edited
+    scripts = Path(viz.__file__).resolve().parent
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if path and Path(path).resolve().parent == scripts:
+            copy = tmp_path/Path(path).name
+            shutil.copyfile(path, copy)
+            monkeypatch.setattr(module, '__file__', str(copy))
+    before = {group.__name__: viz.code_digest(group) for group in viz.CHART_GROUPS}
+
+    with open(tmp_path/"plot_reduction.py", "a") as f:
+        f.write("\n# edited\n")
+    after = {group.__name__: viz.code_digest(group) for group in viz.CHART_GROUPS}
+
+    changed = {name for name in before if before[name] != after[name]}
+    assert changed == {'create_twitter_visualizations', 'create_summary_dashboard'}
+
+def test_fingerprint_follows_chart_parameters(monkeypatch):
+    cache = {'files': {}, 'groups': {}}
+    group = viz.create_regression_visualizations
+    base = viz.chart_fingerprint(group, cache)
+    assert viz.chart_fingerprint(group, cache) == base
+    monkeypatch.setattr(group, 'params', {'top': 5})
+    assert viz.chart_fingerprint(group, cache) != base
@@ -0,0 +1,46 @@
+"""Geography resolver: the bulk Arrow pass must agree with the one-string path"""
+
+import random
+import string
+
+import pyarrow as pa
+import pytest
+
+from geo_resolver import GeoResolver, normalize, normalize_array
+
+@pytest.fixture(scope="module")
+def resolver():
+    return GeoResolver.load()
+
+def test_normalize_array_matches_normalize():
+    rng = random.Random(0)
+    alphabet = string.printable + "ūéñÄİ&🇮🇳िमुंबई"
+    texts = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30))) for _ in range(5000)]
+    texts += ["", "  ", "Bengalūru, Karnataka 🇮🇳", "JAMMU & KASHMIR!!", None]
+    expected = [None if t is None else normalize(t) for t in texts]
+    assert normalize_array(pa.array(texts)).to_pylist() == expected
+    # Sliced arrays carry an offset into their buffers
+    assert normalize_array(pa.array(texts).slice(11, 300)).to_pylist() == expected[11:311]
+
+def test_resolve_matches_resolve_one(resolver):
+    locations = ["Mumbai", "bengaluru!!", "Bengaluru, Karnataka", "Hydrabad", "Aurangabad, Bihar",
+                 "Bilaspur, Himachal Pradesh", "Bilaspur", "Kadapa", "India", "somewhere", "", None, 5]
+    places = resolver.resolve(locations)
+    assert len(places) == len(locations)
+    for location, row in zip(locations, places.itertuples(index=False)):
+        assert tuple(row)[1:] == tuple(resolver.resolve_one(location))
+
+def test_resolve_shared_district_names(resolver):
+    places = resolver.resolve(["Aurangabad, Bihar", "Bilaspur, Himachal Pradesh", "Hamirpur, Uttar Pradesh"])
+    assert places['district_code'].tolist() == ['BR-AURANGABAD', 'HP-BILASPUR', 'UP-HAMIRPUR']
+
+def test_unresolved_fields_are_none(resolver):
+    places = resolver.resolve(["somewhere", None, "India"])
+    assert places.loc[[0, 1], 'state'].tolist() == [None, None]
+    assert places.loc[2, 'match'] == 'country' and places.loc[2, 'state'] is None
+    # Tweet states are built with pa.array(..., type=pa.string()), which rejects NaN
+    pa.array(places['state'].to_numpy(dtype=object), type=pa.string())
+
+def test_gazetteer_covers_districts(resolver):
+    districts = {p.district_code for places in resolver.places.values() for p in places if p.district}
+    assert len(districts) >= 700
@@ -0,0 +1,21 @@
+"""Language detection: scripts, Hinglish markers and string layouts"""
+
+import pyarrow as pa
+import pytest
+
+from language_routing import LANGUAGES, detect_languages
+
+TEXTS = ['vaccine is safe and effective', 'vaccine lagwa liya bahut accha hai', 'वैक्सीन सुरक्षित है',
+         'টিকা নিরাপদ', 'தடுப்பூசி பாதுகாப்பானது', 'ویکسین محفوظ ہے', 'вакцина безопасна', '']
+EXPECTED = ['en', 'hi-Latn', 'hi', 'bn', 'ta', 'ur', 'other', 'en']
+
+@pytest.mark.parametrize("type", [pa.string(), pa.large_string()])
+def test_detect_languages(type):
+    codes = detect_languages(pa.array(TEXTS, type=type), min_markers=2)
+    assert [LANGUAGES[c] for c in codes] == EXPECTED
+
+def test_sliced_and_chunked_input():
+    texts = pa.chunked_array([TEXTS[:3], TEXTS[3:]])
+    assert [LANGUAGES[c] for c in detect_languages(texts, min_markers=2)] == EXPECTED
+    sliced = pa.array(TEXTS).slice(2, 3)
+    assert [LANGUAGES[c] for c in detect_languages(sliced, min_markers=2)] == EXPECTED[2:5]
@@ -0,0 +1,15 @@
+"""Manuscript rendering: reported figures come from the results, formatted as percentages"""
+
+import re
+
+from generate_manuscript import generate_manuscript
+
+def test_sentiment_mix_is_rendered_from_label_shares():
+    results = {'sentiment_scoring': {'backend': 'lexicon', 'thresholds': (-0.05, 0.05),
+                                     'label_shares': {'positive': 0.25, 'neutral': 0.5, 'negative': 0.25}}}
+    shares = dict(re.findall(r"\*\*(\w+) Sentiment:\*\* ([\d.]+)% of posts", generate_manuscript(results)))
+    assert shares == {'Positive': '25.0', 'Neutral': '50.0', 'Negative': '25.0'}
+
+def test_sentiment_mix_without_tweets_is_zero():
+    shares = re.findall(r"Sentiment:\*\* ([\d.]+)% of posts", generate_manuscript({}))
+    assert shares == ['0.0', '0.0', '0.0']
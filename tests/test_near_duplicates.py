@@ -0,0 +1,41 @@
+"""Near-duplicate clustering: MinHash estimates and LSH clusters"""
+
+import numpy as np
+import pyarrow as pa
+
+from near_duplicates import MinHashLSH, cluster_tweets
+
+BASE = "the vaccine is being pushed on us without proper trials share this before they delete it"
+CAMPAIGN = [BASE, BASE + " now", "please " + BASE, BASE.replace("proper", "any")]
+OTHERS = ["got my second dose today at the district hospital no side effects",
+          "vaccination camp in the village on sunday bring your aadhaar card",
+          "is the booster dose needed for people who already had covid"]
+
+def shingles(text, k=2):
+    words = text.split()
+    return {tuple(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+def test_signatures_estimate_jaccard():
+    lsh = MinHashLSH(num_perm=512, bands=16, shingle=2, threshold=0.5, seed=7)
+    texts = CAMPAIGN + OTHERS
+    sig = lsh.signatures(pa.array(texts))
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            a, b = shingles(texts[i]), shingles(texts[j])
+            estimate = (sig[i] == sig[j]).mean()
+            # Standard error of the estimate is at most 0.5 / sqrt(512)
+            assert abs(estimate - len(a & b) / len(a | b)) < 0.1
+
+def test_campaign_forms_one_cluster():
+    lsh = MinHashLSH(num_perm=64, bands=16, shingle=2, threshold=0.5, seed=42)
+    tweets = pa.array(CAMPAIGN + OTHERS + [CAMPAIGN[1], OTHERS[0]])
+    clusters = cluster_tweets(tweets, lsh=lsh)
+    assert clusters.tolist() == [0, 0, 0, 0, 1, 2, 3, 0, 1]
+
+def test_batches_do_not_change_clusters():
+    rng = np.random.default_rng(0)
+    words = np.array(BASE.split() + OTHERS[0].split())
+    texts = pa.array([" ".join(rng.choice(words, 12)) for _ in range(200)] + CAMPAIGN)
+    lsh = MinHashLSH(num_perm=64, bands=16, shingle=2, threshold=0.5, seed=42)
+    np.testing.assert_array_equal(cluster_tweets(texts, batch_rows=7, lsh=lsh),
+                                  cluster_tweets(texts, batch_rows=10000, lsh=lsh))
@@ -0,0 +1,20 @@
+"""NFHS query index: codes stay exact for high-cardinality columns"""
+
+import numpy as np
+import pandas as pd
+
+from nfhs_query import NFHSQueryEngine, build_query_index
+
+def test_high_cardinality_column(tmp_path):
+    n = 40000
+    df = pd.DataFrame({'district': [f"D{i:05d}" for i in range(n)],
+                       'state': np.where(np.arange(n) % 2, 'Bihar', 'Kerala'),
+                       'vaccine_hesitant': np.arange(n) % 3 == 0})
+    build_query_index(df, tmp_path/"index.npz")
+
+    engine = NFHSQueryEngine.load(tmp_path/"index.npz")
+    assert engine.codes['district'].dtype == np.int32
+    rates = engine.rates('district', {'state': ['Kerala']}).set_index('district')
+    assert rates.loc['D39998', 'count'] == 1
+    assert 'D39999' not in rates.index
+    assert len(rates) == rates['count'].sum() == n // 2
@@ -0,0 +1,17 @@
+"""NFHS store: categorical codes round-trip at every width"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nfhs_store import NFHSStore, write_nfhs_store
+
+@pytest.mark.parametrize("n_categories, dtype", [(3, np.int8), (128, np.int8), (300, np.int16), (40000, np.int32)])
+def test_categorical_codes_round_trip(tmp_path, n_categories, dtype):
+    village = [f"V{i:05d}" for i in range(n_categories)] + [None]
+    df = pd.DataFrame({'village': village, 'vaccine_hesitant': np.arange(len(village)) % 2})
+    write_nfhs_store(df, tmp_path/"store")
+
+    store = NFHSStore.open(tmp_path/"store")
+    assert store.column('village').dtype == dtype
+    assert store.values('village').tolist() == village
@@ -0,0 +1,61 @@
+"""Search trends: incremental updates must match a rebuild from full history"""
+
+import numpy as np
+import pandas as pd
+
+import data_validation
+import search_trends
+from search_trends import RollingTrends
+
+def trends_frame(n_days, terms=('COVID vaccine', 'vaccine side effects', 'booster dose'), seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-02', periods=n_days).strftime('%Y-%m-%d')
+    frames = []
+    for t, term in enumerate(terms):
+        values = rng.poisson(30 + 5 * t, n_days).astype(float)
+        values[rng.integers(0, n_days, 3)] = 100
+        frame = pd.DataFrame({'date': dates, 'search_term': term, 'trend_value': values, 'region': 'India'})
+        # A term with gaps, so skipped days still move the window
+        frames.append(frame.iloc[::2] if t == 1 else frame)
+    return pd.concat(frames, ignore_index=True)
+
+def test_update_matches_from_history():
+    _, terms, values = search_trends.load_trends_matrix(trends_frame(90))
+    first_day = 19000
+    state, mean, sd, z = RollingTrends.from_history(first_day, terms, values, window=28, period=7)
+
+    stepped = RollingTrends(terms, window=28, period=7)
+    for i, row in enumerate(values):
+        m, s, zz = stepped.update(first_day + i, row)
+        np.testing.assert_allclose(m, mean[i], rtol=1e-9)
+        np.testing.assert_allclose(s, sd[i], rtol=1e-9)
+        np.testing.assert_allclose(zz, z[i], rtol=1e-9)
+    np.testing.assert_allclose(stepped.seasonal_profile(), state.seasonal_profile(), rtol=1e-9, atol=1e-12)
+    assert stepped.n_days == state.n_days and stepped.last_day == state.last_day
+
+def run(tmp_path, monkeypatch, trends, rebuild):
+    (tmp_path/"data"/"trends").mkdir(parents=True, exist_ok=True)
+    trends.to_csv(tmp_path/"data"/"trends"/"trends.csv", index=False)
+    store = tmp_path/"store"
+    monkeypatch.setattr(search_trends, 'DATA_DIR', tmp_path/"data")
+    monkeypatch.setattr(search_trends, 'STORE_PATH', store)
+    monkeypatch.setattr(search_trends.save_matrix, '__defaults__', (store,))
+    monkeypatch.setattr(data_validation.write_report, '__defaults__', (tmp_path/"validation_report.csv",))
+    for name in ('LATEST_PATH', 'SPIKES_PATH', 'SEASONAL_PATH'):
+        monkeypatch.setattr(search_trends, name, tmp_path/"out"/getattr(search_trends, name).name)
+    monkeypatch.setattr(search_trends, 'VIEWS', tmp_path/"out")
+    (tmp_path/"out").mkdir(exist_ok=True)
+    search_trends.update_trends(rebuild=rebuild)
+    return {name: pd.read_csv(tmp_path/"out"/getattr(search_trends, name).name)
+            for name in ('LATEST_PATH', 'SPIKES_PATH', 'SEASONAL_PATH')}
+
+def test_incremental_run_matches_rebuild(tmp_path, monkeypatch, capsys):
+    full = trends_frame(120)
+    run(tmp_path, monkeypatch, full[full['date'] < '2023-04-01'], rebuild=True)
+    incremental = run(tmp_path, monkeypatch, full, rebuild=False)
+    assert "new day(s) fed to the saved state" in capsys.readouterr().out
+    rebuilt = run(tmp_path, monkeypatch, full, rebuild=True)
+
+    assert len(rebuilt['SPIKES_PATH'])
+    for name, frame in rebuilt.items():
+        pd.testing.assert_frame_equal(incremental[name], frame, atol=0.011)
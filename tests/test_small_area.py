@@ -0,0 +1,40 @@
+"""Small-area estimation: degenerate outcomes and interval coverage"""
+
+import numpy as np
+import pandas as pd
+
+import small_area
+
+def survey(rates, per_district=200, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for (state, district), rate in rates.items():
+        rows.append(pd.DataFrame({'state': state, 'district': district,
+                                  'vaccine_hesitant': rng.binomial(1, rate, per_district)}))
+    return pd.concat(rows, ignore_index=True)
+
+def test_all_same_outcome_is_finite():
+    df = pd.DataFrame({'state': np.repeat(['Bihar', 'Kerala', 'Assam'], 100),
+                       'district': np.tile(['North', 'South'], 150),
+                       'vaccine_hesitant': 0})
+    table = small_area.estimate_frame(df)
+    assert np.isfinite(table[['estimate', 'ci_lower', 'ci_upper']].to_numpy(float)).all()
+    assert (table['estimate'] < 0.01).all()
+
+    table = small_area.estimate_frame(df.assign(vaccine_hesitant=1))
+    assert (table['estimate'] > 0.99).all()
+
+def test_state_intervals_cover_true_rates():
+    rng = np.random.default_rng(42)
+    states = [f"S{i}" for i in range(8)]
+    true_state = dict(zip(states, rng.uniform(0.1, 0.5, len(states))))
+    rates = {(s, f"{s}-D{d}"): true_state[s] for s in states for d in range(4)}
+
+    covered = 0
+    for seed in range(10):
+        table = small_area.estimate_frame(survey(rates, seed=seed))
+        state_rows = table[table['level'] == 'state']
+        truth = state_rows['state'].map(true_state)
+        covered += ((state_rows['ci_lower'] <= truth) & (truth <= state_rows['ci_upper'])).sum()
+    # 80 state intervals at the configured level (95% by default); allow for sampling noise
+    assert covered / 80 >= 0.85
@@ -0,0 +1,208 @@
+"""
+Vaccine Hesitancy Pipeline CLI
+One entry point for every stage, driven by vh.ini:
+
+    python vh.py plan                 # which stages would run, and why
+    python vh.py run [--all]          # run stale stages (or all of them) in order
+    python vh.py viz --workers 4      # run one stage; extra options go to its script
+    python vh.py dashboard            # launch the Streamlit dashboard
+    python vh.py collect --start 2024-01-01 --end 2024-02-01   # collect tweets from the X API
+    python vh.py news                 # fetch, dedupe and score the news articles listed in data/news
+    python vh.py validate             # check the input data against the validation rules
+"""
+
+from pathlib import Path
+from collections import namedtuple
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent
+SCRIPTS = ROOT/"scripts"
+
+# A pipeline stage: the script it runs and the files (glob patterns allowed) it reads and writes
+Stage = namedtuple("Stage", ["script", "inputs", "outputs", "description"])
+
+def pipeline_stages():
+    """Stages in run order, with paths taken from the active config"""
+    sys.path.insert(0, str(SCRIPTS))
+    from pipeline_config import DATA_DIR, OUTPUTS, get_path
+    from generate_visualizations import DATA_FILES
+
+    tables, reports, views = OUTPUTS/"tables", OUTPUTS/"reports", OUTPUTS/"views"
+    return {
+        'extract': Stage("data_extraction.py", [],
+                         [DATA_DIR/"nfhs/*.csv", DATA_DIR/"twitter/*.csv", DATA_DIR/"trends/*.csv"],
+                         "Extract (or create sample) NFHS, Twitter, Trends and news data"),
+        'clean': Stage("clean_data.py", [DATA_DIR/"nfhs/*.csv"],
+                       [tables/"nfhs_clean.csv", tables/"nfhs_summary.csv", get_path('cache', 'query_index'),
+                        get_path('paths', 'nfhs_store')/"meta.json"],
+                       "Clean NFHS data and build the dashboard query index"),
+        'sentiment': Stage("twitter_sentiment.py",
+                           [DATA_DIR/"twitter/*.csv", get_path('paths', 'tweets_collected')/"tweets_*.csv",
+                            get_path('paths', 'gazetteer'), get_path('sentiment', 'lexicon'),
+                            get_path('languages', 'lexicons')/"*.csv"],
+                           [get_path('paths', 'tweet_store'), tables/"twitter_sentiment_timeseries.csv",
+                            tables/"twitter_sentiment_by_state.csv", tables/"twitter_duplicate_clusters.csv",
+                            get_path('paths', 'topic_index')/"meta.json", tables/"twitter_sentiment_by_language.csv",
+                            views/"sentiment_label_counts.csv", views/"sentiment_score_bins.csv"],
+                           "Score tweet sentiment"),
+        'trends': Stage("search_trends.py", [DATA_DIR/"trends/*.csv"],
+                        [get_path('paths', 'trends_store')/"state.npz", tables/"trends_latest.csv",
+                         tables/"trends_spikes.csv", views/"trends_seasonal.csv"],
+                        "Update rolling search-trend statistics, seasonality and spikes"),
+        'fuse': Stage("fuse_sources.py",
+                      [get_path('paths', 'nfhs_store')/"meta.json", get_path('paths', 'tweet_store'),
+                       DATA_DIR/"trends/*.csv", get_path('paths', 'gazetteer')],
+                      [tables/"fusion_panel.csv", reports/"fusion_cross_correlations.csv"],
+                      "Align survey, tweets and trends on (state, period) and cross-correlate them"),
+        'analyze': Stage("analyze_factors.py", [get_path('paths', 'nfhs_store')/"meta.json"],
+                         [reports/"logit_odds_ratios.csv", reports/"hesitancy_by_state.csv",
+                          reports/"summary_statistics.txt", views/"overview.csv", reports/"hesitancy_small_area.csv",
+                          reports/"feature_importance.csv", reports/"model_cv_scores.csv", reports/"permutation_importance.csv",
+                          reports/"model_calibration.csv", tables/"model_predictions.csv"],
+                         "Fit the hesitancy regression, small-area estimates, model track and summary statistics"),
+        'viz': Stage("generate_visualizations.py", list(DATA_FILES.values()),
+                     [get_path('cache', 'plot_cache')],
+                     "Render charts (unchanged charts are skipped by the plot cache)"),
+        'manuscript': Stage("generate_manuscript.py",
+                            [get_path('paths', 'nfhs_store')/"meta.json", tables/"twitter_sentiment_timeseries.csv",
+                             tables/"twitter_sentiment_by_state.csv", tables/"trends_latest.csv",
+                             tables/"trends_spikes.csv", reports/"logit_odds_ratios.csv", reports/"hesitancy_small_area.csv",
+                             reports/"feature_importance.csv", reports/"hesitancy_by_education.csv", SCRIPTS/"templates/manuscript.md"],
+                            [reports/"vaccine_hesitancy_manuscript.md"],
+                            "Render the manuscript and export documents"),
+    }
+
+def expand(pattern):
+    """Existing files matching a path that may contain a glob in its name"""
+    pattern = Path(pattern)
+    if any(ch in pattern.name for ch in "*?["):
+        return sorted(pattern.parent.glob(pattern.name))
+    return [pattern] if pattern.exists() else []
+
+def display(path):
+    path = Path(path)
+    return path.relative_to(ROOT) if path.is_relative_to(ROOT) else path
+
+def plan(stages):
+    """(name, will_run, reason) per stage; a stage runs if an output is missing or older than its inputs"""
+    decisions = []
+    scheduled = []
+    for name, stage in stages.items():
+        reason = None
+
+        missing = [p for p in stage.outputs if not expand(p)]
+        if missing:
+            reason = f"missing {display(missing[0])}"
+
+        if reason is None:
+            upstream = [s for s in scheduled if set(stages[s].outputs) & set(stage.inputs)]
+            if upstream:
+                reason = f"upstream stage '{upstream[0]}' will run"
+
+        if reason is None:
+            oldest_output = min(f.stat().st_mtime for p in stage.outputs for f in expand(p))
+            inputs = [SCRIPTS/stage.script] + [f for p in stage.inputs for f in expand(p)]
+            changed = [f for f in inputs if f.stat().st_mtime > oldest_output]
+            if changed:
+                reason = f"{display(changed[0])} changed since last run"
+
+        if reason:
+            scheduled.append(name)
+        decisions.append((name, reason is not None, reason or "up to date"))
+    return decisions
+
+def run_stage(stage, args=()):
+    """Run one stage script with extra arguments; returns its exit code"""
+    return subprocess.run([sys.executable, str(SCRIPTS/stage.script), *args]).returncode
+
+def cmd_plan(stages, args):
+    print(f"📋 Pipeline plan ({os.environ.get('VH_CONFIG', ROOT/'vh.ini')})")
+    for name, will_run, reason in plan(stages):
+        if args.stages and name not in args.stages:
+            continue
+        print(f"{'🔄' if will_run else '✅'} {name:<11} {'run ' if will_run else 'skip'}  {reason}")
+    return 0
+
+def cmd_run(stages, args):
+    names = args.stages or list(stages)
+    if not args.all:
+        names = [name for name, will_run, _ in plan(stages) if will_run and name in names]
+    if not names:
+        print("✅ Everything is up to date")
+        return 0
+
+    start = time.perf_counter()
+    for name in names:
+        print(f"==> {name}: {stages[name].description}")
+        code = run_stage(stages[name])
+        if code != 0:
+            print(f"❌ Stage '{name}' failed (exit code {code}); later stages were not run")
+            return code
+
+    print(f"\n🎯 Pipeline finished in {time.perf_counter() - start:.1f}s ({', '.join(names)})")
+    print("🚀 Launch dashboard with: python vh.py dashboard")
+    return 0
+
+def cmd_config(stages, args):
+    from pipeline_config import CONFIG_PATH, BASE, settings
+    print(f"# {CONFIG_PATH}{'' if CONFIG_PATH.exists() else ' (not found, using defaults)'}")
+    print(f"# base resolves to {BASE}")
+    settings.write(sys.stdout)
+    return 0
+
+def main(argv=None):
+    stage_names = ['extract', 'clean', 'sentiment', 'trends', 'fuse', 'analyze', 'viz', 'manuscript']
+    parser = argparse.ArgumentParser(prog="vh", description="Vaccine hesitancy research pipeline")
+    parser.add_argument("--config", help="Config file (default: $VH_CONFIG or vh.ini next to this script)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="Show which stages would run and why")
+    plan_parser.add_argument("stages", nargs="*", metavar="STAGE", help="Only show these stages")
+    run_parser = commands.add_parser("run", help="Run stale stages in order (or all with --all)")
+    run_parser.add_argument("stages", nargs="*", metavar="STAGE",
+                            help="Only consider these stages")
+    run_parser.add_argument("--all", action="store_true", help="Run stages even if they are up to date")
+    commands.add_parser("config", help="Print the effective configuration")
+    for name in stage_names:
+        commands.add_parser(name, add_help=False, help=f"Run the {name} stage (options go to its script)")
+    commands.add_parser("dashboard", add_help=False, help="Launch the Streamlit dashboard")
+    commands.add_parser("collect", add_help=False,
+                        help="Collect tweets from the X API into data/twitter (resumable; see --help)")
+    commands.add_parser("news", add_help=False,
+                        help="Fetch, dedupe and score the news articles listed in data/news (see --help)")
+    commands.add_parser("validate", add_help=False,
+                        help="Check NFHS, tweet and trends inputs against the validation rules (see --help)")
+
+    args, extra = parser.parse_known_args(argv)
+    if args.config:
+        # Set before pipeline_config is first imported, and inherited by stage subprocesses
+        os.environ["VH_CONFIG"] = str(Path(args.config).resolve())
+
+    if args.command == "dashboard":
+        return subprocess.run([sys.executable, "-m", "streamlit", "run", str(ROOT/"dashboards/app.py"), *extra]).returncode
+
+    if args.command == "collect":
+        return subprocess.run([sys.executable, str(SCRIPTS/"tweet_collector.py"), *extra]).returncode
+
+    if args.command == "news":
+        return subprocess.run([sys.executable, str(SCRIPTS/"news_fetcher.py"), *extra]).returncode
+
+    if args.command == "validate":
+        return subprocess.run([sys.executable, str(SCRIPTS/"data_validation.py"), *extra]).returncode
+
+    stages = pipeline_stages()
+    if args.command in stages:
+        return run_stage(stages[args.command], extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    unknown = [name for name in getattr(args, 'stages', []) if name not in stages]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(stages)})")
+    return {'plan': cmd_plan, 'run': cmd_run, 'config': cmd_config}[args.command](stages, args)
+
+if __name__ == "__main__":
+    sys.exit(main())